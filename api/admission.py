@@ -0,0 +1,82 @@
+import asyncio
+import os
+from collections import deque
+
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_WAITING, REQUESTS_SHED
+
+# Admission control for every crawl the API starts: /crawl cache misses, each page
+# of a /crawl/stream, /crawl/site or /crawl/sitemap request, /jobs items, and
+# background refreshes (stale hits and recrawls). At most ADMISSION_MAX_IN_FLIGHT crawls
+# run at once; up to ADMISSION_QUEUE_SIZE more wait (for at most
+# ADMISSION_QUEUE_TIMEOUT_SECONDS) for a slot. Anything beyond that is shed with a
+# fast 503 rather than piling more work onto the executor, so latency for admitted
+# requests stays bounded under overload. Cache hits never pass through here.
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))    # 0 disables
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2"))
+ADMISSION_RETRY_AFTER = 1   # seconds; sent with shed responses
+
+
+class Overloaded(Exception):
+    """No crawl slot is available — shed the request."""
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a bounded FIFO wait queue. Slots are handed directly to
+    the oldest waiter on release, so a newcomer can't jump the queue. Event-loop
+    only, no locking.
+    """
+
+    def __init__(self, max_in_flight: int, queue_size: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Take a crawl slot, waiting briefly if needed. Raises Overloaded when shed."""
+        if self.max_in_flight <= 0:
+            return
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            REQUESTS_SHED.labels(reason="queue_full").inc()
+            raise Overloaded
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over just as we gave up — pass it on
+                self.release()
+            elif waiter in self._waiters:
+                # release() may already have popped it (and skipped it) after the timeout
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                REQUESTS_SHED.labels(reason="timeout").inc()
+                raise Overloaded from None
+            raise
+
+    def release(self) -> None:
+        if self.max_in_flight <= 0:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)     # slot moves to the waiter; in_flight unchanged
+                return
+        self.in_flight -= 1
+
+
+admission = AdmissionController(ADMISSION_MAX_IN_FLIGHT, ADMISSION_QUEUE_SIZE, ADMISSION_QUEUE_TIMEOUT)
+ADMISSION_IN_FLIGHT.set_function(lambda: admission.in_flight)
+ADMISSION_WAITING.set_function(lambda: admission.waiting)
@@ -0,0 +1,42 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Minimal two-state breaker. After `failure_threshold` consecutive failures it
+    opens and callers skip the dependency outright; a success (reported by whatever
+    probes for recovery) closes it again.
+
+    State changes may come from executor threads as well as the event loop — they
+    are single attribute writes, so no locking.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+
+    def __init__(self, name: str, failure_threshold: int):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state == self.OPEN:
+            logger.info("%s circuit closed after %.1fs", self.name, time.monotonic() - self.opened_at)
+            self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            logger.warning("%s circuit opened after %d consecutive failures", self.name, self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
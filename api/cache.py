@@ -1,66 +1,344 @@
+import asyncio
 import hashlib
 import json
 import logging
 import os
-from typing import Optional
+import time
+from typing import Iterable, NamedTuple, Optional, Union
+from urllib.parse import urljoin, urlsplit
 
 import redis
+from redis.client import Pipeline
+
+from crawler.metrics import stage_timer
+from crawler.recrawl import default_scheduler
+from crawler.urlnorm import normalize_url
+from .breaker import CircuitBreaker
+from .lru import LRUCache
+from .metrics import CACHE_LOOKUPS, REDIS_CIRCUIT_OPEN
 
 logger = logging.getLogger(__name__)
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 CACHE_TTL = int(os.getenv("CACHE_TTL_SECONDS", "3600"))  # 1 hour default
+# how long past CACHE_TTL an entry may still be served stale while it is refreshed
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL_SECONDS", "3600"))
+
+# L1: in-process LRU in front of Redis for hot URLs. Entry TTL is capped by the
+# Redis TTL, so L1 never serves something Redis has already expired.
+L1_CACHE_MAX_BYTES = int(os.getenv("L1_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+L1_CACHE_TTL = int(os.getenv("L1_CACHE_TTL_SECONDS", "300"))
+
+_l1 = LRUCache(max_bytes=L1_CACHE_MAX_BYTES, default_ttl=L1_CACHE_TTL)
+# failure streaks when Redis is down — "size" 1 per URL, so this caps the entry count
+_local_failures = LRUCache(max_bytes=10_000, default_ttl=24 * 3600)
+
+# Circuit breaker: after REDIS_BREAKER_THRESHOLD consecutive connection errors or
+# timeouts, get_client() returns None at once (callers degrade as if Redis were
+# absent) instead of blocking on connect timeouts. While open, a background task
+# pings Redis every REDIS_PROBE_INTERVAL_SECONDS and closes the breaker when it answers.
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT_SECONDS", "2"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT_SECONDS", "2"))
+REDIS_BREAKER_THRESHOLD = int(os.getenv("REDIS_BREAKER_THRESHOLD", "3"))
+REDIS_PROBE_INTERVAL = float(os.getenv("REDIS_PROBE_INTERVAL_SECONDS", "5"))
+
+breaker = CircuitBreaker("redis", REDIS_BREAKER_THRESHOLD)
+REDIS_CIRCUIT_OPEN.set_function(lambda: int(breaker.is_open))
+
+# only transport problems count — a bad command (ResponseError) says nothing about availability
+_BREAKER_ERRORS = (redis.ConnectionError, redis.TimeoutError)
+
+
+class _BreakerPipeline(Pipeline):
+    def execute(self, raise_on_error: bool = True):
+        try:
+            result = super().execute(raise_on_error)
+        except _BREAKER_ERRORS:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
 
-# module-level client; None if Redis is unavailable (cache degrades gracefully)
+
+class _BreakerRedis(redis.Redis):
+    """Redis client that reports every command's outcome to the breaker."""
+
+    def execute_command(self, *args, **options):
+        try:
+            result = super().execute_command(*args, **options)
+        except _BREAKER_ERRORS:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
+    def pipeline(self, transaction: bool = True, shard_hint=None) -> Pipeline:
+        return _BreakerPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+# module-level client — created lazily; constructing it does not connect
 _client: Optional[redis.Redis] = None
+_probe_task: Optional[asyncio.Task] = None
+_last_inline_probe = 0.0
 
 
 def get_client() -> Optional[redis.Redis]:
+    """The shared Redis client, or None while the breaker is open (callers degrade gracefully)."""
     global _client
     if _client is None:
-        try:
-            _client = redis.from_url(REDIS_URL, decode_responses=True, socket_connect_timeout=2)
-            _client.ping()
-        except Exception as exc:
-            logger.warning("Redis unavailable, caching disabled: %s", exc)
-            _client = None
+        _client = _BreakerRedis.from_url(
+            REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+        )
+    if breaker.is_open:
+        _start_probe()
+        if breaker.is_open:
+            return None
     return _client
 
 
+def _start_probe() -> None:
+    global _probe_task, _last_inline_probe
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # no event loop (scripts, sync callers) — probe inline, at most once per interval
+        now = time.monotonic()
+        if now - _last_inline_probe >= REDIS_PROBE_INTERVAL:
+            _last_inline_probe = now
+            _ping()
+        return
+    if _probe_task is None or _probe_task.done():
+        _probe_task = loop.create_task(_probe_until_closed())
+
+
+def _ping() -> None:
+    try:
+        _client.ping()
+    except Exception as exc:
+        logger.debug("Redis probe failed: %s", exc)
+        return
+    breaker.record_success()
+
+
+async def _probe_until_closed() -> None:
+    loop = asyncio.get_running_loop()
+    while breaker.is_open:
+        await asyncio.sleep(REDIS_PROBE_INTERVAL)
+        # ping blocks for up to the connect timeout — keep it off the event loop
+        await loop.run_in_executor(None, _ping)
+
+
+def _digest(url: str) -> str:
+    # normalize first so trivially different spellings of a URL share an entry,
+    # then hash so keys stay small regardless of URL length
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()[:16]
+
+
 def _cache_key(url: str) -> str:
-    # use a short hash so keys stay small regardless of URL length
-    digest = hashlib.sha256(url.encode()).hexdigest()[:16]
-    return f"crawl:{digest}"
+    # v2: entries are hashes with a soft-expiry field, not plain strings
+    return f"crawl:v2:{_digest(url)}"
 
 
-def get_cached(url: str) -> Optional[dict]:
+def _alias_key(url: str) -> str:
+    # points at the cache key of the entry this URL redirected / canonicalized to
+    return f"crawl:alias:{_digest(url)}"
+
+
+class CacheEntry(NamedTuple):
+    body: bytes             # encoded CrawlResult JSON, served as-is
+    fresh_until: float      # unix time of soft expiry; stale (but servable) after this
+    status_code: int = 200  # non-200 for negative entries (failed / blocked crawls)
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+
+def _to_entry(fields: list) -> Optional[CacheEntry]:
+    body, fresh_until, status_code = fields
+    if not body:
+        return None
+    return CacheEntry(
+        body.encode() if isinstance(body, str) else body,
+        float(fresh_until or 0),
+        int(status_code or 200),
+    )
+
+
+def get_cached_entry(url: str) -> Optional[CacheEntry]:
+    """
+    Look up a cached result in L1, then Redis (directly, or through an alias left
+    by an earlier crawl that redirected or declared a canonical URL). Entries past
+    their soft expiry are still returned (check `is_stale`) until the hard TTL
+    removes them.
+    """
+    key = _cache_key(url)
+    local = _l1.get(key)
+    if local is not None and not local.is_stale:
+        CACHE_LOOKUPS.labels(tier="l1", result="hit").inc()
+        return local
+    # a stale L1 copy may already have been refreshed in Redis by another instance
+    CACHE_LOOKUPS.labels(tier="l1", result="stale" if local else "miss").inc()
+
     client = get_client()
     if client is None:
-        return None
+        CACHE_LOOKUPS.labels(tier="redis", result="unavailable").inc()
+        return local
     try:
-        raw = client.get(_cache_key(url))
-        return json.loads(raw) if raw else None
+        with stage_timer("cache_get"):
+            # entry, its remaining TTL (caps the L1 copy) and any alias — one round trip
+            fields, pttl, target = (
+                client.pipeline(transaction=False)
+                .hmget(key, "body", "fresh_until", "status")
+                .pttl(key)
+                .get(_alias_key(url))
+                .execute()
+            )
+            entry = _to_entry(fields)
+            if entry is None and target:
+                # second round trip only for alias hits, which would otherwise be a full crawl
+                fields, pttl = (
+                    client.pipeline(transaction=False)
+                    .hmget(target, "body", "fresh_until", "status")
+                    .pttl(target)
+                    .execute()
+                )
+                entry = _to_entry(fields)
     except Exception as exc:
         logger.warning("Cache read error: %s", exc)
-        return None
+        CACHE_LOOKUPS.labels(tier="redis", result="error").inc()
+        return local
+    if entry is None:
+        CACHE_LOOKUPS.labels(tier="redis", result="miss").inc()
+        return local
+
+    CACHE_LOOKUPS.labels(tier="redis", result="hit").inc()
+    if pttl > 0:
+        _l1.set(key, entry, ttl=pttl / 1000, size=len(entry.body))
+    return entry
+
+
+def get_cached(url: str) -> Optional[dict]:
+    entry = get_cached_entry(url)
+    return json.loads(entry.body) if entry else None
+
+
+def cache_ttl(url: str) -> int:
+    """
+    Freshness for a successful result: the page's adaptive recrawl interval when the
+    recrawl scheduler tracks it (static pages stay fresh for days, busy ones for
+    minutes), CACHE_TTL otherwise.
+    """
+    scheduler = default_scheduler()
+    interval = scheduler.interval(url) if scheduler is not None else None
+    return CACHE_TTL if interval is None else int(interval)
+
+
+def set_cached(
+    url: str,
+    data: Union[dict, bytes, str],
+    ttl: int = CACHE_TTL,
+    stale_ttl: int = CACHE_STALE_TTL,
+    status_code: int = 200,
+    aliases: Iterable[str] = (),
+) -> None:
+    """
+    Store a result in both tiers. It is fresh for `ttl` seconds, then served stale
+    for a further `stale_ttl` seconds before Redis drops it. Negative entries pass
+    their crawl status_code and stale_ttl=0.
 
+    `aliases` are other URLs known to serve the same page (redirect target,
+    canonical URL); lookups for them resolve to this entry until it expires.
+    """
+    # already-encoded payloads (CrawlResult.to_json) are stored as-is
+    payload = data if isinstance(data, (bytes, str)) else json.dumps(data)
+    if isinstance(payload, str):
+        payload = payload.encode()
+    fresh_until = time.time() + ttl
+    hard_ttl = ttl + stale_ttl
+
+    # write-through: L1 first so this instance serves it even if Redis is down
+    key = _cache_key(url)
+    _l1.set(key, CacheEntry(payload, fresh_until, status_code), ttl=hard_ttl, size=len(payload))
+    if status_code == 200:
+        _local_failures.delete(key)
 
-def set_cached(url: str, data: dict, ttl: int = CACHE_TTL) -> None:
     client = get_client()
     if client is None:
         return
     try:
-        client.setex(_cache_key(url), ttl, json.dumps(data))
+        with stage_timer("cache_set"):
+            pipe = client.pipeline(transaction=True)
+            pipe.hset(key, mapping={"body": payload, "fresh_until": fresh_until, "status": status_code})
+            pipe.expire(key, hard_ttl)
+            if status_code == 200:
+                # a good crawl resets the failure streak used for negative-cache backoff
+                pipe.delete(_failures_key(url))
+            for alias in aliases:
+                if _cache_key(alias) != key:
+                    pipe.set(_alias_key(alias), key, ex=hard_ttl)
+            pipe.execute()
     except Exception as exc:
         logger.warning("Cache write error: %s", exc)
 
 
-def is_cache_healthy() -> bool:
+def aliases_of(result) -> list[str]:
+    """URLs other than the requested one that a crawl showed to be the same page."""
+    aliases = []
+    if result.final_url and result.final_url != result.url:
+        aliases.append(result.final_url)
+    if result.canonical_url:
+        # canonical hrefs are often relative — resolve against where we ended up
+        canonical = urljoin(result.final_url or result.url, result.canonical_url)
+        # a page only speaks for its own host — a cross-host canonical would let any
+        # site plant its body under another site's cache key
+        hosts = {(urlsplit(u).hostname or "").lower() for u in (result.url, result.final_url) if u}
+        if canonical.startswith(("http://", "https://")) and (urlsplit(canonical).hostname or "").lower() in hosts:
+            aliases.append(canonical)
+    return aliases
+
+
+def _failures_key(url: str) -> str:
+    return f"failures:{_cache_key(url)}"
+
+
+def record_failure(url: str, window: int) -> int:
+    """
+    Count consecutive failed crawls of `url` (the streak expires after `window`
+    seconds without a failure). Falls back to an in-process counter without Redis.
+    """
+    client = get_client()
+    if client is not None:
+        try:
+            key = _failures_key(url)
+            count, _ = client.pipeline(transaction=False).incr(key).expire(key, window).execute()
+            return int(count)
+        except Exception as exc:
+            logger.warning("Failure counter error: %s", exc)
+    key = _cache_key(url)
+    count = (_local_failures.get(key) or 0) + 1
+    _local_failures.set(key, count, ttl=window, size=1)
+    return count
+
+
+def acquire_refresh_lock(url: str, timeout: int = 60) -> bool:
+    """
+    Cross-instance guard so only one instance refreshes a stale entry. Falls back
+    to True (allow) when Redis is unavailable — callers still dedupe in-process.
+    """
     client = get_client()
     if client is None:
-        return False
+        return True
     try:
-        client.ping()
+        return bool(client.set(f"refresh:{_cache_key(url)}", "1", nx=True, ex=timeout))
+    except Exception as exc:
+        logger.warning("Refresh lock error: %s", exc)
         return True
-    except Exception:
-        return False
+
+
+def is_cache_healthy() -> bool:
+    # breaker state, not a live ping — health checks must not block on a dead Redis
+    return not breaker.is_open
@@ -0,0 +1,377 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+
+from crawler.core import crawl
+from .admission import ADMISSION_RETRY_AFTER, Overloaded, admission
+from .cache import aliases_of, cache_ttl, get_cached_entry, get_client, set_cached
+from .lru import LRUCache
+from .metrics import JOBS_SUBMITTED
+from .negative import negative_ttl, serves_negative
+
+logger = logging.getLogger(__name__)
+
+# Asynchronous crawl jobs: POST /jobs puts one work item per URL on a bounded queue
+# and returns at once; a pool of worker tasks drains the queue and records results
+# for GET /jobs/{id}. "memory" keeps queue and job state in-process (single
+# instance); "redis" uses a Redis list and hashes so any instance can accept,
+# work on, or report a job.
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "memory")
+JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "1000"))           # queued URLs, across all jobs
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "8"))                  # concurrent crawls per instance
+JOB_MAX_URLS = int(os.getenv("JOB_MAX_URLS", "100"))              # URLs per job
+JOB_TTL = int(os.getenv("JOB_TTL_SECONDS", "3600"))               # how long job results are kept
+# memory backend: total size of stored job results per instance
+JOB_STORE_MAX_BYTES = int(os.getenv("JOB_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+WEBHOOK_TIMEOUT = 5
+
+_REDIS_QUEUE_KEY = "jobs:queue"
+
+
+class QueueFull(Exception):
+    """The job queue has no room for the submitted URLs."""
+
+
+class QueueUnavailable(Exception):
+    """The job backend (Redis) could not be reached."""
+
+
+# --- queues ---
+
+
+class MemoryJobQueue:
+    """Bounded asyncio queue — one instance only."""
+
+    def __init__(self, maxsize: int = JOB_QUEUE_MAX):
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+
+    def put_many(self, items: list[str]) -> None:
+        # all or nothing, so a job is never half-enqueued; nothing awaits in between
+        if self._queue.maxsize - self._queue.qsize() < len(items):
+            raise QueueFull
+        for item in items:
+            self._queue.put_nowait(item)
+
+    async def get(self) -> Optional[str]:
+        return await self._queue.get()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+# check the bound and push in one step, so concurrent instances can't overshoot it
+_ENQUEUE_SCRIPT = """
+local depth = redis.call('LLEN', KEYS[1])
+if depth + #ARGV - 1 > tonumber(ARGV[1]) then
+    return -1
+end
+return redis.call('RPUSH', KEYS[1], unpack(ARGV, 2))
+"""
+
+
+class RedisJobQueue:
+    """Redis list shared by all instances. Items popped by a worker that dies mid-crawl are lost."""
+
+    def __init__(self, get_client=get_client, maxsize: int = JOB_QUEUE_MAX, key: str = _REDIS_QUEUE_KEY):
+        self._get_client = get_client
+        self.maxsize = maxsize
+        self.key = key
+        self._script = None
+        # BLPOP holds a thread per waiting worker — keep them out of the default
+        # executor, which fetches need
+        self._poll_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job-queue")
+
+    def _client(self):
+        client = self._get_client()
+        if client is None:
+            raise QueueUnavailable("Redis unavailable")
+        return client
+
+    def put_many(self, items: list[str]) -> None:
+        client = self._client()
+        if self._script is None:
+            self._script = client.register_script(_ENQUEUE_SCRIPT)
+        try:
+            depth = self._script(keys=[self.key], args=[self.maxsize, *items])
+        except Exception as exc:
+            raise QueueUnavailable(str(exc)) from exc
+        if depth < 0:
+            raise QueueFull
+
+    async def get(self) -> Optional[str]:
+        # the client is synchronous — block in our own pool, with a short timeout so
+        # workers notice shutdown; None means nothing arrived
+        client = self._client()
+        popped = await asyncio.get_running_loop().run_in_executor(self._poll_pool, client.blpop, [self.key], 1)
+        return popped[1] if popped else None
+
+    def qsize(self) -> int:
+        return self._client().llen(self.key)
+
+
+# --- job state ---
+
+
+_JOB_OVERHEAD = 1024     # bytes charged per job record on top of its results
+
+
+class MemoryJobStore:
+    """
+    Job records in an in-process LRU bounded by the bytes of their stored results
+    (plus a fixed charge per job); jobs are forgotten after JOB_TTL, or sooner —
+    least recently touched first — once the store is over `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = JOB_STORE_MAX_BYTES, ttl: int = JOB_TTL):
+        self._jobs = LRUCache(max_bytes=max_bytes, default_ttl=ttl)
+
+    def create(self, job_id: str, total: int, webhook_url: Optional[str]) -> None:
+        job = {
+            "created_at": time.time(), "started_at": None, "finished_at": None,
+            "total": total, "webhook_url": webhook_url, "results": [None] * total,
+            "nbytes": _JOB_OVERHEAD,
+        }
+        self._jobs.set(job_id, job, size=_JOB_OVERHEAD)
+
+    def delete(self, job_id: str) -> None:
+        self._jobs.delete(job_id)
+
+    def mark_started(self, job_id: str) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None and job["started_at"] is None:
+            job["started_at"] = time.time()
+
+    def record_result(self, job_id: str, index: int, body: bytes) -> Optional[dict]:
+        """Store one URL's result. Returns the finished job when this was its last URL."""
+        job = self._jobs.get(job_id)
+        if job is None or job["results"][index] is not None:
+            return None
+        job["results"][index] = body
+        job["nbytes"] += len(body)
+        self._jobs.resize(job_id, job["nbytes"])
+        if all(result is not None for result in job["results"]):
+            job["finished_at"] = time.time()
+            # from the record in hand — a job too big for the store was just evicted, but its webhook still fires
+            return _job_view(job_id, job, job["results"])
+        return None
+
+    def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        return _job_view(job_id, job, job["results"])
+
+
+class RedisJobStore:
+    """Job records as Redis hashes — `job:{id}` for the record, `job:{id}:results` per URL index."""
+
+    def __init__(self, get_client=get_client, ttl: int = JOB_TTL):
+        self._get_client = get_client
+        self.ttl = ttl
+
+    def _client(self):
+        client = self._get_client()
+        if client is None:
+            raise QueueUnavailable("Redis unavailable")
+        return client
+
+    def create(self, job_id: str, total: int, webhook_url: Optional[str]) -> None:
+        key = f"job:{job_id}"
+        mapping = {"created_at": time.time(), "total": total, "remaining": total}
+        if webhook_url:
+            mapping["webhook_url"] = webhook_url
+        try:
+            self._client().pipeline(transaction=True).hset(key, mapping=mapping).expire(key, self.ttl).execute()
+        except QueueUnavailable:
+            raise
+        except Exception as exc:
+            raise QueueUnavailable(str(exc)) from exc
+
+    def delete(self, job_id: str) -> None:
+        self._client().delete(f"job:{job_id}", f"job:{job_id}:results")
+
+    def mark_started(self, job_id: str) -> None:
+        key = f"job:{job_id}"
+        client = self._client()
+        if client.exists(key):      # don't resurrect an expired job as a TTL-less stub
+            client.hsetnx(key, "started_at", time.time())
+
+    def record_result(self, job_id: str, index: int, body: bytes) -> Optional[dict]:
+        key = f"job:{job_id}"
+        client = self._client()
+        if not client.exists(key):
+            return None         # expired or deleted while queued
+        added, _ = (
+            client.pipeline(transaction=True)
+            .hsetnx(f"{key}:results", index, body)
+            .expire(f"{key}:results", self.ttl)
+            .execute()
+        )
+        if not added:
+            return None         # duplicate delivery of an item already recorded
+        remaining = client.hincrby(key, "remaining", -1)
+        if remaining > 0:
+            return None
+        client.hset(key, "finished_at", time.time())
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        key = f"job:{job_id}"
+        record, stored = (
+            self._client().pipeline(transaction=False).hgetall(key).hgetall(f"{key}:results").execute()
+        )
+        if not record:
+            return None
+        total = int(record["total"])
+        results = [stored.get(str(index)) for index in range(total)]
+        job = {
+            "created_at": float(record["created_at"]),
+            "started_at": float(record["started_at"]) if "started_at" in record else None,
+            "finished_at": float(record["finished_at"]) if "finished_at" in record else None,
+            "total": total,
+            "webhook_url": record.get("webhook_url"),
+        }
+        return _job_view(job_id, job, results)
+
+
+def _job_view(job_id: str, job: dict, results: list) -> dict:
+    completed = sum(result is not None for result in results)
+    if job["finished_at"] is not None:
+        status = "done"
+    elif job["started_at"] is not None:
+        status = "running"
+    else:
+        status = "queued"
+    return {
+        "job_id": job_id,
+        "status": status,
+        "total": job["total"],
+        "completed": completed,
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+        "webhook_url": job["webhook_url"],
+        "results": [json.loads(result) if result is not None else None for result in results],
+    }
+
+
+def _make_backend(backend: str):
+    if backend == "redis":
+        return RedisJobQueue(), RedisJobStore()
+    return MemoryJobQueue(), MemoryJobStore()
+
+
+_queue = None
+_store = None
+
+
+def get_backend():
+    """The (queue, store) pair — created lazily, since asyncio.Queue wants a running loop."""
+    global _queue, _store
+    if _queue is None:
+        _queue, _store = _make_backend(JOB_QUEUE_BACKEND)
+    return _queue, _store
+
+
+# --- submit / work ---
+
+
+def submit_job(urls: list[str], respect_robots: bool = True, webhook_url: Optional[str] = None) -> str:
+    """
+    Create a job and enqueue its URLs. Raises QueueFull (nothing is enqueued) when
+    the queue lacks room for all of them, QueueUnavailable when Redis is down.
+    """
+    queue, store = get_backend()
+    job_id = uuid.uuid4().hex
+    store.create(job_id, len(urls), webhook_url)
+    items = [
+        json.dumps({"job": job_id, "i": i, "url": url, "respect_robots": respect_robots})
+        for i, url in enumerate(urls)
+    ]
+    try:
+        queue.put_many(items)
+    except (QueueFull, QueueUnavailable):
+        store.delete(job_id)
+        JOBS_SUBMITTED.labels(result="rejected").inc()
+        raise
+    JOBS_SUBMITTED.labels(result="accepted").inc()
+    return job_id
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    _, store = get_backend()
+    return store.get(job_id)
+
+
+async def _crawl_item(url: str, respect_robots: bool) -> bytes:
+    # same cache policy as POST /crawl: fresh hits are reused, results are cached
+    cached = get_cached_entry(url)
+    if cached and (cached.status_code == 200 and not cached.is_stale or serves_negative(cached, respect_robots)):
+        return cached.body
+    # job crawls share the API's admission slots; a job can wait, so retry rather than shed
+    while True:
+        try:
+            await admission.acquire()
+            break
+        except Overloaded:
+            await asyncio.sleep(ADMISSION_RETRY_AFTER)
+    try:
+        result = await crawl(url, respect_robots=respect_robots)
+    finally:
+        admission.release()
+    body = result.to_json()
+    if result.status_code == 200:
+        set_cached(url, body, ttl=cache_ttl(url), aliases=aliases_of(result))
+    else:
+        ttl = negative_ttl(url, result)
+        if ttl:
+            set_cached(url, body, ttl=ttl, stale_ttl=0, status_code=result.status_code)
+    return body
+
+
+def _post_webhook(job: dict) -> None:
+    try:
+        requests.post(job["webhook_url"], json=job, timeout=WEBHOOK_TIMEOUT).raise_for_status()
+    except Exception as exc:
+        logger.warning("Webhook for job %s failed: %s", job["job_id"], exc)
+
+
+async def _worker(queue, store) -> None:
+    while True:
+        try:
+            raw = await queue.get()
+        except QueueUnavailable:
+            await asyncio.sleep(1)      # Redis down — back off instead of spinning
+            continue
+        if raw is None:
+            continue
+        try:
+            item = json.loads(raw)
+            store.mark_started(item["job"])
+            body = await _crawl_item(item["url"], item["respect_robots"])
+            job = store.record_result(item["job"], item["i"], body)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error("Job worker failed on %s: %s", raw, exc, exc_info=True)
+            continue
+        if job is not None and job["webhook_url"]:
+            await asyncio.get_running_loop().run_in_executor(None, _post_webhook, job)
+
+
+def start_workers(count: int = JOB_WORKERS) -> list[asyncio.Task]:
+    queue, store = get_backend()
+    loop = asyncio.get_running_loop()
+    return [loop.create_task(_worker(queue, store)) for _ in range(count)]
+
+
+async def stop_workers(workers: list[asyncio.Task]) -> None:
+    for task in workers:
+        task.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
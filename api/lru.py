@@ -0,0 +1,81 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class LRUCache:
+    """
+    Bounded in-process cache evicted by LRU order, per-entry TTL and a total size
+    budget in bytes.
+
+    The size of each value is `len(value)` unless given explicitly. Only touched
+    from the event loop, so there is no locking.
+    """
+
+    def __init__(self, max_bytes: int, default_ttl: float):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.nbytes = 0
+        # key -> (value, expires_at, size)
+        self._entries: OrderedDict[str, tuple[Any, float, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, now: Optional[float] = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at, _ = entry
+        if (now if now is not None else time.monotonic()) >= expires_at:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        now: Optional[float] = None,
+        size: Optional[int] = None,
+    ) -> None:
+        ttl = self.default_ttl if ttl is None else min(ttl, self.default_ttl)
+        if size is None:
+            size = len(value)
+        if ttl <= 0 or size > self.max_bytes:
+            self._remove(key)
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = (now if now is not None else time.monotonic()) + ttl
+        self._entries[key] = (value, expires_at, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.nbytes -= evicted_size
+
+    def resize(self, key: str, size: int) -> None:
+        """Update the size of an entry whose value grew in place; evicts LRU entries if now over budget."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        value, expires_at, old_size = entry
+        self._entries[key] = (value, expires_at, size)
+        self.nbytes += size - old_size
+        while self.nbytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.nbytes -= evicted_size
+
+    def delete(self, key: str) -> None:
+        self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
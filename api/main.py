@@ -1,9 +1,15 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 
+from crawler.recrawl import default_scheduler
+from crawler.search import SEARCH_INDEX_PATH, save_default_index, save_index_periodically
+from .jobs import start_workers, stop_workers
 from .middleware import RateLimitMiddleware, RequestLoggingMiddleware
+from .recrawl import run_recrawl_loop
 from .routes import router
 
 logging.basicConfig(
@@ -11,6 +17,26 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # background workers draining the /jobs queue
+    workers = start_workers()
+    # persist the topic index behind /search, if a path is configured
+    saver = asyncio.create_task(save_index_periodically()) if SEARCH_INDEX_PATH else None
+    # re-crawl pages as their estimated change rate says they're due
+    scheduler = default_scheduler()
+    recrawler = asyncio.create_task(run_recrawl_loop(scheduler)) if scheduler is not None else None
+    yield
+    await stop_workers(workers)
+    for task in (saver, recrawler):
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+    if saver is not None:
+        await asyncio.get_running_loop().run_in_executor(None, save_default_index)
+
+
 app = FastAPI(
     title="Web Metadata Crawler",
     description=(
@@ -20,6 +46,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # middleware stack — outermost runs first on request, last on response
@@ -0,0 +1,55 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# API-side metrics; pipeline stage metrics live in crawler.metrics and share the
+# same default registry, so /metrics exposes both.
+
+CACHE_LOOKUPS = Counter(
+    "crawler_cache_lookups_total",
+    "Cache lookups by tier and outcome",
+    ["tier", "result"],     # tier: l1 | redis; result: hit | miss | stale | error | unavailable
+)
+
+REDIS_CIRCUIT_OPEN = Gauge(
+    "crawler_redis_circuit_open",
+    "1 while the Redis circuit breaker is open (Redis calls skipped), else 0",
+)
+
+CACHE_REFRESHES = Counter(
+    "crawler_cache_refreshes_total",
+    "Stale-while-revalidate background refreshes by outcome",
+    ["result"],     # started | deduplicated | succeeded | failed | shed
+)
+
+CRAWLS_COALESCED = Counter(
+    "crawler_crawls_coalesced_total",
+    "Cache-miss requests that joined an identical crawl already in flight",
+)
+
+ADMISSION_IN_FLIGHT = Gauge(
+    "crawler_admission_in_flight",
+    "/crawl cache-miss crawls currently holding an admission slot",
+)
+
+ADMISSION_WAITING = Gauge(
+    "crawler_admission_waiting",
+    "/crawl requests queued for an admission slot",
+)
+
+REQUESTS_SHED = Counter(
+    "crawler_requests_shed_total",
+    "/crawl requests rejected with 503 by admission control",
+    ["reason"],     # queue_full | timeout
+)
+
+JOBS_SUBMITTED = Counter(
+    "crawler_jobs_submitted_total",
+    "POST /jobs submissions by outcome",
+    ["result"],     # accepted | rejected (queue full or backend down)
+)
+
+RESPONSE_BYTES = Histogram(
+    "crawler_response_size_bytes",
+    "Size of crawl results returned to clients (per result line for streaming endpoints)",
+    ["endpoint"],
+    buckets=(512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072, 262144, 1048576),
+)
@@ -1,74 +1,121 @@
+import math
+import os
 import time
 import logging
-from collections import defaultdict
-from threading import Lock
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .cache import get_client
+from .ratelimit import RedisRateLimiter, TokenBucketLimiter
 
 logger = logging.getLogger(__name__)
 
-# simple in-process token bucket — good enough for a single instance
-# for multi-instance deployments this should move to Redis (see Part 2 design doc)
-RATE_LIMIT_REQUESTS = 30   # requests allowed per window
+# "local" is an in-process token bucket — correct for a single instance only.
+# "redis" shares limits across instances (Cloud Run scales out to N), falling back
+# to the local bucket whenever Redis is unreachable.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "local")
+RATE_LIMIT_REQUESTS = 30   # bucket capacity (burst size); refills fully over one window
 RATE_LIMIT_WINDOW = 60     # window in seconds
+RATE_LIMIT_MAX_KEYS = 100_000  # cap on tracked IPs — bounds memory under a many-IP flood
+
+# health checks and metric scrapes are never rate limited
+EXEMPT_PATHS = frozenset({"/health", "/metrics"})
 
+# Both middlewares are plain ASGI callables rather than BaseHTTPMiddleware subclasses:
+# BaseHTTPMiddleware runs every request through an extra task and memory stream,
+# which adds latency and interferes with streaming responses.
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, requests_per_window: int = RATE_LIMIT_REQUESTS, window_seconds: int = RATE_LIMIT_WINDOW):
-        super().__init__(app)
+
+class RateLimitMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_window: int = RATE_LIMIT_REQUESTS,
+        window_seconds: int = RATE_LIMIT_WINDOW,
+        backend: str = RATE_LIMIT_BACKEND,
+    ):
+        self.app = app
         self.requests_per_window = requests_per_window
         self.window_seconds = window_seconds
-        self._buckets: dict[str, list[float]] = defaultdict(list)
-        self._lock = Lock()
+        local = TokenBucketLimiter(
+            capacity=requests_per_window,
+            window_seconds=window_seconds,
+            max_keys=RATE_LIMIT_MAX_KEYS,
+        )
+        if backend == "redis":
+            self._limiter = RedisRateLimiter(
+                capacity=requests_per_window,
+                window_seconds=window_seconds,
+                get_client=get_client,
+                fallback=local,
+            )
+        else:
+            self._limiter = local
 
-    def _get_client_ip(self, request: Request) -> str:
+    async def _check(self, ip: str) -> float:
+        # the Redis check is a coroutine (it runs off the loop); the local bucket is a
+        # plain O(1) call and stays synchronous
+        if isinstance(self._limiter, RedisRateLimiter):
+            return await self._limiter.check(ip)
+        return self._limiter.check(ip)
+
+    def _get_client_ip(self, scope: Scope) -> str:
         # honour X-Forwarded-For if behind a proxy / load balancer
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return forwarded_for.split(",")[0].strip()
-        return request.client.host if request.client else "unknown"
-
-    async def dispatch(self, request: Request, call_next):
-        # skip rate limiting for health checks
-        if request.url.path == "/health":
-            return await call_next(request)
-
-        ip = self._get_client_ip(request)
-        now = time.time()
-
-        with self._lock:
-            # drop timestamps outside the current window
-            window_start = now - self.window_seconds
-            self._buckets[ip] = [t for t in self._buckets[ip] if t > window_start]
-
-            if len(self._buckets[ip]) >= self.requests_per_window:
-                oldest = self._buckets[ip][0]
-                retry_after = int(self.window_seconds - (now - oldest)) + 1
-                logger.warning("Rate limit hit for IP %s", ip)
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Too many requests. Please slow down.", "code": "rate_limit_exceeded"},
-                    headers={"Retry-After": str(retry_after)},
-                )
-
-            self._buckets[ip].append(now)
-
-        response = await call_next(request)
-        return response
-
-
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start = time.time()
-        response = await call_next(request)
-        duration_ms = int((time.time() - start) * 1000)
-        logger.info(
-            "%s %s -> %d (%dms)",
-            request.method,
-            request.url.path,
-            response.status_code,
-            duration_ms,
-        )
-        return response
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # skip rate limiting for exempt paths (and non-HTTP traffic like lifespan)
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        ip = self._get_client_ip(scope)
+        wait = await self._check(ip)
+        if wait:
+            logger.warning("Rate limit hit for IP %s", ip)
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests. Please slow down.", "code": "rate_limit_exceeded"},
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+class RequestLoggingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500   # reported if the app raises before sending a response
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # measured to the end of the response body, so streamed responses log their full duration
+            duration_ms = int((time.perf_counter() - start) * 1000)
+            logger.info(
+                "%s %s -> %d (%dms)",
+                scope["method"],
+                scope["path"],
+                status_code,
+                duration_ms,
+            )
@@ -0,0 +1,63 @@
+import json
+import os
+from typing import Optional
+
+from crawler.models import CrawlResult
+from .cache import CacheEntry, record_failure
+
+# Negative caching: failed and blocked crawls are cached briefly so repeated requests
+# for dead links don't redo the robots.txt fetch and the failing request every time.
+# TTLs are per failure family; 0 disables negative caching for that family.
+NEGATIVE_TTLS = {
+    "robots": int(os.getenv("NEGATIVE_TTL_ROBOTS_SECONDS", "600")),   # robots.txt disallow
+    "4xx": int(os.getenv("NEGATIVE_TTL_4XX_SECONDS", "300")),         # 404, 410, origin 403 ...
+    "5xx": int(os.getenv("NEGATIVE_TTL_5XX_SECONDS", "60")),          # origin errors, often transient
+}
+
+# network failures (DNS, refused, timeout) back off exponentially per URL:
+# base, 2x base, 4x base ... capped, so persistently dead hosts are retried rarely
+NEGATIVE_TTL_NETWORK_BASE = int(os.getenv("NEGATIVE_TTL_NETWORK_BASE_SECONDS", "30"))
+NEGATIVE_TTL_NETWORK_MAX = int(os.getenv("NEGATIVE_TTL_NETWORK_MAX_SECONDS", "1800"))
+
+# message prefix set by crawler.fetcher.fetch_page for robots.txt blocks
+_ROBOTS_ERROR_PREFIX = "robots.txt disallows"
+
+
+def failure_family(result: CrawlResult) -> Optional[str]:
+    """Classify a non-200 crawl result: robots | 4xx | 5xx | network, or None if not a failure."""
+    status = result.status_code
+    if status == 0:
+        return "network"
+    if status == 403 and (result.error or "").startswith(_ROBOTS_ERROR_PREFIX):
+        return "robots"
+    if 400 <= status < 500:
+        return "4xx"
+    if status >= 500:
+        return "5xx"
+    return None
+
+
+def serves_negative(entry: CacheEntry, respect_robots: bool) -> bool:
+    """
+    True if a fresh negative cache entry answers this request. A robots.txt block
+    says nothing to a `respect_robots: false` request, which must get a real crawl.
+    """
+    if entry.status_code == 200 or entry.is_stale:
+        return False
+    if not respect_robots and entry.status_code == 403:
+        return not json.loads(entry.body).get("error", "").startswith(_ROBOTS_ERROR_PREFIX)
+    return True
+
+
+def negative_ttl(url: str, result: CrawlResult) -> int:
+    """Seconds to cache this failed result for; 0 means don't cache it."""
+    family = failure_family(result)
+    if family is None:
+        return 0
+    if family == "network":
+        if NEGATIVE_TTL_NETWORK_BASE <= 0:
+            return 0
+        # streak outlives the longest backoff so the exponent keeps growing
+        streak = record_failure(url, window=NEGATIVE_TTL_NETWORK_MAX * 2)
+        return min(NEGATIVE_TTL_NETWORK_BASE * 2 ** (streak - 1), NEGATIVE_TTL_NETWORK_MAX)
+    return NEGATIVE_TTLS[family]
@@ -0,0 +1,108 @@
+import asyncio
+import cProfile
+import hashlib
+import logging
+import os
+import pstats
+import random
+import time
+from typing import Optional
+
+from fastapi import Request
+
+from crawler.core import crawl
+from crawler.models import CrawlResult
+
+logger = logging.getLogger(__name__)
+
+# Opt-in request profiling. Nothing here runs unless PROFILING_ENABLED is set:
+#   - a request with `X-Profile: 1` (or `?profile=1`) is crawled under cProfile,
+#     bypassing the cache, and gets its hottest functions back in the response
+#   - PROFILE_SAMPLE_RATE profiles that fraction of ordinary requests silently
+# Every profile is also dumped to PROFILE_DIR as a .prof file (open with snakeviz,
+# or `python -m pstats`).
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "25"))
+
+_TRUTHY = ("1", "true", "yes")
+
+# only one profiler can be attached to the interpreter at a time
+_profile_lock = asyncio.Lock()
+
+
+def profile_requested(request: Request) -> bool:
+    if not PROFILING_ENABLED:
+        return False
+    flag = request.headers.get("X-Profile") or request.query_params.get("profile") or ""
+    return flag.lower() in _TRUTHY
+
+
+def should_sample() -> bool:
+    """Roll for background sampling — skipped while another profile is running."""
+    return (
+        PROFILING_ENABLED
+        and PROFILE_SAMPLE_RATE > 0
+        and not _profile_lock.locked()
+        and random.random() < PROFILE_SAMPLE_RATE
+    )
+
+
+def _top_functions(stats: pstats.Stats, limit: int) -> list[dict]:
+    # stats.stats: {(file, line, func): (primitive_calls, total_calls, tottime, cumtime, callers)}
+    ranked = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+    return [
+        {
+            "function": f"{func} ({os.path.basename(filename)}:{line})",
+            "calls": total_calls,
+            "self_seconds": round(tottime, 6),
+            "cumulative_seconds": round(cumtime, 6),
+        }
+        for (filename, line, func), (_, total_calls, tottime, cumtime, _) in ranked[:limit]
+    ]
+
+
+def _dump(profiler: cProfile.Profile, url: str) -> Optional[str]:
+    """Write the profile to PROFILE_DIR; returns its id (the file name without .prof)."""
+    digest = hashlib.sha256(url.encode()).hexdigest()[:12]
+    profile_id = f"{int(time.time() * 1000)}-{digest}"
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(path)
+    except OSError as exc:
+        logger.warning("Could not write profile to %s: %s", path, exc)
+        return None
+    logger.info("Profile %s written to %s", profile_id, path)
+    return profile_id
+
+
+async def profile_crawl(url: str, respect_robots: bool = True) -> tuple[CrawlResult, dict]:
+    """
+    Run crawl() under cProfile and return (result, profile summary).
+
+    cProfile follows the event-loop thread, so parse / extract / classify show up
+    function by function; the fetch itself runs in the executor and appears as
+    time spent awaiting it. Work from other requests interleaved on the loop
+    during the crawl is included too — profile on a quiet instance for clean numbers.
+    """
+    async with _profile_lock:
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            result = await crawl(url, respect_robots=respect_robots)
+        finally:
+            profiler.disable()
+        elapsed = time.perf_counter() - start
+
+    profile_id = _dump(profiler, url)
+    logger.info("Profiled crawl of %s in %.3fs (profile %s)", url, elapsed, profile_id)
+    # only the id goes back to the client — server paths stay in the log
+    summary = {
+        "wall_seconds": round(elapsed, 6),
+        "id": profile_id,
+        "top_functions": _top_functions(pstats.Stats(profiler), PROFILE_TOP_N),
+    }
+    return result, summary
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucketLimiter:
+    """
+    In-process token bucket keyed by client (usually IP).
+
+    Each key holds constant-size state — (tokens, last_seen) — and is refilled lazily
+    on access at `capacity / window_seconds` tokens per second, so a check is O(1)
+    regardless of the request rate.
+
+    Buckets are kept in least-recently-seen order (an OrderedDict, moved to the end
+    on every touch), which makes eviction O(1) per key:
+      - keys idle long enough to have refilled completely are indistinguishable from
+        new keys, so they are swept from the front of the dict every `sweep_interval`
+      - if a flood of distinct IPs still pushes the table past `max_keys`, the
+        least-recently-seen key is dropped
+
+    Not thread-safe by design: it is only called from the event loop and a check
+    never awaits, so each call is atomic without a lock.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        window_seconds: float,
+        max_keys: int = 100_000,
+        sweep_interval: float = 60.0,
+    ):
+        self.capacity = capacity
+        self.refill_rate = capacity / window_seconds   # tokens per second
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        # seconds for an empty bucket to become full again — beyond this a key is idle
+        self._idle_after = window_seconds
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def check(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Take one token for `key`. Returns 0.0 if the request is allowed, otherwise
+        the number of seconds until a token becomes available.
+        """
+        if now is None:
+            now = time.monotonic()
+        if now >= self._next_sweep:
+            self._sweep(now)
+
+        buckets = self._buckets
+        state = buckets.get(key)
+        if state is None:
+            tokens = float(self.capacity)
+            if len(buckets) >= self.max_keys:
+                # flood of new keys — drop the least recently seen one
+                buckets.popitem(last=False)
+        else:
+            tokens, last = state
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_rate)
+            buckets.move_to_end(key)
+
+        if tokens >= 1:
+            buckets[key] = (tokens - 1, now)
+            return 0.0
+
+        buckets[key] = (tokens, now)
+        return (1 - tokens) / self.refill_rate
+
+    def _sweep(self, now: float) -> None:
+        # least-recently-seen first, so stop at the first active key
+        cutoff = now - self._idle_after
+        buckets = self._buckets
+        while buckets:
+            key = next(iter(buckets))
+            if buckets[key][1] > cutoff:
+                break
+            buckets.popitem(last=False)
+        self._next_sweep = now + self.sweep_interval
+
+
+# GCRA (generic cell rate algorithm) — equivalent to the token bucket above, but the
+# whole per-key state is a single timestamp (the "theoretical arrival time"), so the
+# check fits in one atomic script and costs exactly one round trip. Redis TIME is used
+# as the clock so every instance agrees on "now".
+#   KEYS[1] = bucket key, ARGV[1] = ms per token, ARGV[2] = burst capacity
+#   returns 0 if allowed, otherwise ms until the next token
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call("TIME")
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local tat = tonumber(redis.call("GET", KEYS[1])) or now
+if tat < now then
+  tat = now
+end
+local new_tat = tat + interval
+local allow_at = new_tat - burst * interval
+if allow_at > now then
+  return math.ceil(allow_at - now)
+end
+redis.call("SET", KEYS[1], string.format("%.3f", new_tat), "PX", math.ceil(new_tat - now))
+return 0
+"""
+
+
+class RedisRateLimiter:
+    """
+    Rate limiter shared across instances through Redis, with the same burst/refill
+    semantics as TokenBucketLimiter.
+
+    Reuses the cache's Redis connection (`get_client`). Whenever Redis is
+    unavailable or a call fails, the check falls back to the in-process `fallback`
+    limiter — limits become per-instance again rather than failing open or closed.
+
+    The client is synchronous, so `check` is a coroutine that runs the script on a
+    small dedicated thread pool — the round trip never blocks the event loop, and
+    it doesn't queue behind crawl fetches in the default executor.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        window_seconds: float,
+        get_client: Callable[[], Optional[redis.Redis]],
+        fallback: TokenBucketLimiter,
+        key_prefix: str = "ratelimit:",
+        max_threads: int = 8,
+    ):
+        self.capacity = capacity
+        self.interval_ms = window_seconds * 1000 / capacity
+        self.fallback = fallback
+        self.key_prefix = key_prefix
+        self._get_client = get_client
+        self._script = None
+        self._pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="ratelimit")
+
+    async def check(self, key: str) -> float:
+        """Same contract as TokenBucketLimiter.check: 0.0 if allowed, else seconds to wait."""
+        client = self._get_client()
+        if client is None:
+            return self.fallback.check(key)
+        try:
+            wait_ms = await asyncio.get_running_loop().run_in_executor(self._pool, self._eval, client, key)
+        except Exception as exc:
+            logger.warning("Redis rate limit check failed, using local limiter: %s", exc)
+            # the fallback is only ever touched on the loop — it isn't thread-safe
+            return self.fallback.check(key)
+        return int(wait_ms) / 1000
+
+    def _eval(self, client: redis.Redis, key: str):
+        if self._script is None:
+            self._script = client.register_script(_GCRA_SCRIPT)
+        # EVALSHA — one round trip (the script is only re-sent if Redis lost it)
+        return self._script(
+            keys=[self.key_prefix + key],
+            args=[self.interval_ms, self.capacity],
+            client=client,
+        )
@@ -0,0 +1,41 @@
+import asyncio
+import logging
+import os
+
+from crawler.recrawl import RECRAWL_STATE_PATH, RecrawlScheduler, write_checkpoint
+from .refresh import schedule_refresh
+
+logger = logging.getLogger(__name__)
+
+RECRAWL_POLL_SECONDS = float(os.getenv("RECRAWL_POLL_SECONDS", "10"))
+RECRAWL_BATCH_SIZE = int(os.getenv("RECRAWL_BATCH_SIZE", "50"))     # refreshes started per poll, at most
+RECRAWL_CHECKPOINT_SECONDS = float(os.getenv("RECRAWL_CHECKPOINT_SECONDS", "300"))
+
+
+async def _checkpoint(scheduler: RecrawlScheduler) -> None:
+    if RECRAWL_STATE_PATH:
+        # snapshot on the loop (the state must not change mid-copy), pickle and write off it
+        state = scheduler.snapshot()
+        await asyncio.get_running_loop().run_in_executor(None, write_checkpoint, state, RECRAWL_STATE_PATH)
+
+
+async def run_recrawl_loop(scheduler: RecrawlScheduler) -> None:
+    """
+    Background task: every RECRAWL_POLL_SECONDS, re-crawl the URLs that are due via
+    the stale-refresh path (deduplicated, result cached), and checkpoint the
+    scheduler now and then. Runs until cancelled; checkpoints on the way out.
+    """
+    loop = asyncio.get_running_loop()
+    last_checkpoint = loop.time()
+    try:
+        while True:
+            await asyncio.sleep(RECRAWL_POLL_SECONDS)
+            due = scheduler.pop_due(limit=RECRAWL_BATCH_SIZE)
+            started = sum(schedule_refresh(url) for url in due)
+            if due:
+                logger.info("Recrawl: %d URLs due, %d refreshes started", len(due), started)
+            if loop.time() - last_checkpoint >= RECRAWL_CHECKPOINT_SECONDS:
+                await _checkpoint(scheduler)
+                last_checkpoint = loop.time()
+    finally:
+        await _checkpoint(scheduler)
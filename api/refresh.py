@@ -0,0 +1,52 @@
+import asyncio
+import logging
+
+from crawler.core import crawl
+from crawler.urlnorm import normalize_url
+from .admission import Overloaded, admission
+from .cache import acquire_refresh_lock, aliases_of, cache_ttl, set_cached
+from .metrics import CACHE_REFRESHES
+
+logger = logging.getLogger(__name__)
+
+# normalized url -> running refresh; holds a reference so the task isn't garbage collected
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def schedule_refresh(url: str, respect_robots: bool = True) -> bool:
+    """
+    Start a background re-crawl of a stale cache entry, at most one per URL.
+    Deduplicated in-process by `_inflight` and across instances by a short Redis lock.
+    Returns True if a refresh was started.
+    """
+    key = normalize_url(url)
+    if key in _inflight or not acquire_refresh_lock(url):
+        CACHE_REFRESHES.labels(result="deduplicated").inc()
+        return False
+
+    task = asyncio.get_running_loop().create_task(_refresh(url, respect_robots))
+    _inflight[key] = task
+    task.add_done_callback(lambda _: _inflight.pop(key, None))
+    CACHE_REFRESHES.labels(result="started").inc()
+    return True
+
+
+async def _refresh(url: str, respect_robots: bool) -> None:
+    try:
+        await admission.acquire()
+    except Overloaded:
+        # the stale copy keeps being served; the next hit after the lock expires retries
+        logger.info("Background refresh shed for %s", url)
+        CACHE_REFRESHES.labels(result="shed").inc()
+        return
+    try:
+        result = await crawl(url, respect_robots=respect_robots)
+    finally:
+        admission.release()
+    # keep serving the stale copy rather than replacing it with a failure
+    if result.status_code != 200:
+        logger.warning("Background refresh failed for %s: %s", url, result.error or result.status_code)
+        CACHE_REFRESHES.labels(result="failed").inc()
+        return
+    set_cached(url, result.to_json(), ttl=cache_ttl(url), aliases=aliases_of(result))
+    CACHE_REFRESHES.labels(result="succeeded").inc()
@@ -1,49 +1,411 @@
+import asyncio
+import dataclasses
+import json
 import logging
+import os
+import tempfile
+import time
+from typing import IO, AsyncIterator, Iterable, Optional, Union
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from crawler.core import crawl
-from .cache import get_cached, set_cached, is_cache_healthy
-from .schemas import CrawlRequest, CrawlResponse, HealthResponse
+from crawler.core import crawl, crawl_many
+from crawler.models import CrawlResult
+from crawler.results import default_sink
+from crawler.search import default_index
+from crawler.site import crawl_site
+from crawler.sitemap import crawl_sitemaps
+from crawler.urlnorm import normalize_url
+from .admission import ADMISSION_RETRY_AFTER, Overloaded, admission
+from .cache import aliases_of, breaker, cache_ttl, get_cached_entry, set_cached, is_cache_healthy
+from .jobs import JOB_MAX_URLS, QueueFull, QueueUnavailable, get_job, submit_job
+from .metrics import CRAWLS_COALESCED, RESPONSE_BYTES
+from .negative import negative_ttl, serves_negative
+from .profiling import profile_crawl, profile_requested, should_sample
+from .refresh import schedule_refresh
+from .schemas import (
+    CrawlBatchRequest,
+    CrawlRequest,
+    CrawlResponse,
+    HealthResponse,
+    JobAccepted,
+    JobRequest,
+    JobStatus,
+    SearchResponse,
+    SiteCrawlRequest,
+    SitemapCrawlRequest,
+)
 
 logger = logging.getLogger(__name__)
 
+# max crawls in flight per streaming batch request
+STREAM_CONCURRENCY = int(os.getenv("STREAM_CONCURRENCY", "8"))
+# limits on a /crawl/stream/upload body
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_URLS = int(os.getenv("UPLOAD_MAX_URLS", "10000"))
+_UPLOAD_MAX_LINE = 8192    # bytes — far beyond any real URL
+
 router = APIRouter()
 
+# (normalized url, respect_robots) -> crawl in flight, so concurrent misses for the
+# same page share one fetch instead of stampeding the origin
+_inflight_crawls: dict[tuple[str, bool], asyncio.Task] = {}
+
+
+def _json_response(
+    body: Union[bytes, str],
+    cached: bool,
+    stale: bool = False,
+    profile: Optional[dict] = None,
+) -> Response:
+    """
+    Build the /crawl response directly from an encoded CrawlResult.
+    The `cached`/`stale` flags (and a profile summary, if any) are spliced into the
+    encoded object instead of decoding the body and re-validating it through
+    CrawlResponse — the schema stays on the route for OpenAPI docs only.
+    """
+    if isinstance(body, str):
+        body = body.encode()
+    prefix = b'{"cached":%s,"stale":%s,' % (b"true" if cached else b"false", b"true" if stale else b"false")
+    if profile is None:
+        content = prefix + body[1:]
+    else:
+        content = prefix + body[1:-1] + b',"profile":' + json.dumps(profile).encode() + b"}"
+    RESPONSE_BYTES.labels(endpoint="/crawl").observe(len(content))
+    return Response(content=content, media_type="application/json")
+
+
+def _failure_response(body: bytes, status_code: int) -> Response:
+    """Replay a negatively cached result exactly as a fresh crawl would have returned it."""
+    if status_code == 0:
+        error = json.loads(body).get("error")
+        raise HTTPException(status_code=502, detail=f"Failed to reach URL: {error}")
+    return _json_response(body, cached=True)
+
+
+def _release(key: tuple[str, bool]) -> None:
+    _inflight_crawls.pop(key, None)
+    admission.release()
+
+
+async def _crawl_admitted(url: str, respect_robots: bool = True) -> CrawlResult:
+    """crawl() under an admission slot, for streaming crawls — a shed page is reported inline as a 503."""
+    try:
+        await admission.acquire()
+    except Overloaded:
+        return CrawlResult(url=url, final_url=url, status_code=503, error="overloaded: no crawl slot available")
+    try:
+        return await crawl(url, respect_robots=respect_robots)
+    finally:
+        admission.release()
+
+
+async def _profile_admitted(url: str, respect_robots: bool) -> tuple[CrawlResult, dict]:
+    await admission.acquire()
+    try:
+        return await profile_crawl(url, respect_robots=respect_robots)
+    finally:
+        admission.release()
+
+
+async def _crawl_once(url: str, respect_robots: bool) -> CrawlResult:
+    """crawl(), single-flighted per normalized URL within this process."""
+    key = (normalize_url(url), respect_robots)
+    task = _inflight_crawls.get(key)
+    if task is None:
+        # only a request that starts a crawl needs a slot — joiners add no work
+        await admission.acquire()
+        task = _inflight_crawls.get(key)    # someone may have started it while we waited
+        if task is None:
+            task = asyncio.get_running_loop().create_task(crawl(url, respect_robots=respect_robots))
+            _inflight_crawls[key] = task
+            task.add_done_callback(lambda _: _release(key))
+        else:
+            admission.release()
+            CRAWLS_COALESCED.inc()
+    else:
+        CRAWLS_COALESCED.inc()
+    # shield: one caller disconnecting must not cancel the crawl the others are waiting on
+    result = await asyncio.shield(task)
+    if result.url != url:
+        # joined a crawl started for another spelling of the URL — report ours
+        result = dataclasses.replace(result, url=url)
+    return result
+
 
 @router.post("/crawl", response_model=CrawlResponse, summary="Crawl a URL and extract metadata")
-async def crawl_url(request: CrawlRequest) -> CrawlResponse:
+async def crawl_url(request: CrawlRequest, http_request: Request) -> Response:
     """
     Accepts a URL and returns all extractable metadata plus a ranked list of topics.
 
-    - Checks Redis cache first; returns cached result if available.
+    - Checks the cache first; returns cached result if available. URLs are
+      normalized for the lookup, so tracking params, fragments, default ports and
+      other cosmetic differences still hit, as do redirect targets and canonical
+      URLs of pages crawled before.
+    - Past its soft expiry a cached result is still returned immediately, with
+      `stale: true`, while one background re-crawl refreshes it.
     - Respects robots.txt by default (`respect_robots: true`).
     - Set `respect_robots: false` to bypass the robots.txt check (useful for testing).
+    - Under overload, cache misses that can't get a crawl slot within a short wait
+      get 503 with `Retry-After`; cache hits are always served.
+    - With `PROFILING_ENABLED`, send `X-Profile: 1` to skip the cache, crawl under
+      cProfile and get the hottest functions back under `profile`.
     """
     url = request.url
+    profile = profile_requested(http_request)
 
     # cache-aside: serve from Redis if we've crawled this URL recently
-    cached = get_cached(url)
-    if cached:
-        logger.info("Cache hit for %s", url)
-        return CrawlResponse(**cached, cached=True)
+    # (a profiling request always crawls — profiling a cache hit tells us nothing)
+    if not profile:
+        cached = get_cached_entry(url)
+        if cached and cached.status_code != 200:
+            # negative entries are never served stale — once expired, crawl again
+            if serves_negative(cached, request.respect_robots):
+                logger.info("Negative cache hit for %s (%d)", url, cached.status_code)
+                return _failure_response(cached.body, cached.status_code)
+        elif cached:
+            if cached.is_stale:
+                logger.info("Stale cache hit for %s, refreshing in background", url)
+                schedule_refresh(url, respect_robots=request.respect_robots)
+                return _json_response(cached.body, cached=True, stale=True)
+            logger.info("Cache hit for %s", url)
+            return _json_response(cached.body, cached=True)
+
+    profile_summary = None
+    try:
+        if profile or should_sample():
+            result, summary = await _profile_admitted(url, request.respect_robots)
+            if profile:
+                profile_summary = summary
+        else:
+            result = await _crawl_once(url, request.respect_robots)
+    except Overloaded:
+        logger.warning("Shedding crawl of %s: at capacity", url)
+        raise HTTPException(
+            status_code=503,
+            detail="Server is at crawl capacity, retry shortly",
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+        )
 
-    result = await crawl(url, respect_robots=request.respect_robots)
+    # encode once — the same bytes go to Redis and to the client
+    body = result.to_json()
+
+    if result.status_code == 200:
+        set_cached(url, body, ttl=cache_ttl(url), aliases=aliases_of(result))
+    else:
+        # negative cache: short TTL per failure family, so dead links aren't recrawled per request
+        ttl = negative_ttl(url, result)
+        if ttl:
+            set_cached(url, body, ttl=ttl, stale_ttl=0, status_code=result.status_code)
 
     if result.error and result.status_code == 0:
-        # complete network failure — don't cache, surface as HTTP 502
+        # complete network failure — surface as HTTP 502
         raise HTTPException(status_code=502, detail=f"Failed to reach URL: {result.error}")
 
-    response_data = result.to_dict()
+    return _json_response(body, cached=False, profile=profile_summary)
 
-    # only cache successful fetches — don't cache network errors or robots blocks
-    if result.status_code == 200:
-        set_cached(url, response_data)
 
-    return CrawlResponse(**response_data, cached=False)
+async def _ndjson_lines(
+    results: AsyncIterator[CrawlResult],
+    endpoint: str = "/crawl/stream",
+) -> AsyncIterator[bytes]:
+    line_bytes = RESPONSE_BYTES.labels(endpoint=endpoint)
+    async for result in results:
+        line = result.to_json() + b"\n"
+        line_bytes.observe(len(line))
+        yield line
+
+
+def _upload_line(raw: bytes) -> Optional[str]:
+    line = raw.decode("utf-8", errors="replace").strip()
+    if line and not line.startswith("#"):
+        return line
+    return None
+
+
+def _check_upload_lines(lines: list[bytes]) -> int:
+    """Validate complete lines of an upload the way CrawlBatchRequest does; returns the URL count."""
+    count = 0
+    for raw in lines:
+        url = _upload_line(raw)
+        if url is None:
+            continue
+        if not url.startswith(("http://", "https://")):
+            raise HTTPException(status_code=422, detail=f"URL must start with http:// or https://: {url[:200]}")
+        count += 1
+    return count
+
+
+async def _spool_upload(request: Request) -> IO[bytes]:
+    """
+    Spool a URL-list body, checking it as it arrives: at most UPLOAD_MAX_BYTES and
+    UPLOAD_MAX_URLS (413 past either), and every URL must be http(s) (422).
+    """
+    # StreamingResponse listens on receive() for disconnects, so the body can't be
+    # read once streaming starts — spool it first (to disk past 1 MB) instead of memory
+    if int(request.headers.get("content-length") or 0) > UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload larger than {UPLOAD_MAX_BYTES} bytes")
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    size = count = 0
+    pending = b""
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > UPLOAD_MAX_BYTES:
+                raise HTTPException(status_code=413, detail=f"Upload larger than {UPLOAD_MAX_BYTES} bytes")
+            spool.write(chunk)
+            *lines, pending = (pending + chunk).split(b"\n")
+            if len(pending) > _UPLOAD_MAX_LINE:
+                raise HTTPException(status_code=422, detail=f"Line longer than {_UPLOAD_MAX_LINE} bytes")
+            count += _check_upload_lines(lines)
+            if count > UPLOAD_MAX_URLS:
+                raise HTTPException(status_code=413, detail=f"At most {UPLOAD_MAX_URLS} URLs per upload")
+        if count + _check_upload_lines([pending]) > UPLOAD_MAX_URLS:
+            raise HTTPException(status_code=413, detail=f"At most {UPLOAD_MAX_URLS} URLs per upload")
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def _iter_spooled_urls(spool: IO[bytes]) -> Iterable[str]:
+    with spool:
+        for raw in spool:
+            url = _upload_line(raw)
+            if url is not None:
+                yield url
+
+
+@router.post("/crawl/stream", summary="Crawl a list of URLs, streaming NDJSON results")
+async def crawl_stream(request: CrawlBatchRequest) -> StreamingResponse:
+    """
+    Crawls every URL in the request with bounded concurrency and streams one JSON
+    object per line as each crawl completes — results arrive in completion order,
+    not input order. Failures are reported inline through `error` and `status_code`.
+    """
+    results = crawl_many(
+        request.urls, concurrency=STREAM_CONCURRENCY, respect_robots=request.respect_robots, crawl_fn=_crawl_admitted,
+    )
+    return StreamingResponse(_ndjson_lines(results), media_type="application/x-ndjson")
+
+
+@router.post("/crawl/stream/upload", summary="Crawl URLs from an uploaded file, streaming NDJSON results")
+async def crawl_stream_upload(request: Request, respect_robots: bool = True) -> StreamingResponse:
+    """
+    Same as `/crawl/stream`, but URLs come from a plain-text request body, one per
+    line (e.g. `curl --data-binary @urls.txt`). Blank lines and `#` comments are
+    skipped. The body is spooled to a temp file and read line by line as crawl
+    slots free up, so file size does not affect server memory.
+
+    Bodies over `UPLOAD_MAX_BYTES` or with more than `UPLOAD_MAX_URLS` URLs get 413;
+    a line that isn't an http(s) URL gets 422, before any crawl starts.
+    """
+    spool = await _spool_upload(request)
+    results = crawl_many(
+        _iter_spooled_urls(spool), concurrency=STREAM_CONCURRENCY, respect_robots=respect_robots, crawl_fn=_crawl_admitted,
+    )
+    return StreamingResponse(_ndjson_lines(results), media_type="application/x-ndjson")
+
+
+@router.post("/crawl/site", summary="Crawl a site breadth-first from a seed URL, streaming NDJSON results")
+async def crawl_site_stream(request: SiteCrawlRequest) -> StreamingResponse:
+    """
+    Crawls the seed, then follows its outlinks breadth-first up to `max_depth` hops
+    and `max_pages` pages, onto at most `max_hosts` hosts. URLs are deduplicated,
+    each host is fetched politely (one request at a time, spaced out), and robots.txt
+    is honored per page. Results stream one JSON object per line as pages complete.
+    """
+    results = crawl_site(
+        request.url,
+        max_depth=request.max_depth,
+        max_pages=request.max_pages,
+        max_hosts=request.max_hosts,
+        concurrency=STREAM_CONCURRENCY,
+        respect_robots=request.respect_robots,
+        crawl_fn=_crawl_admitted,
+    )
+    return StreamingResponse(_ndjson_lines(results, endpoint="/crawl/site"), media_type="application/x-ndjson")
+
+
+@router.post("/crawl/sitemap", summary="Crawl the URLs listed in a site's sitemaps, streaming NDJSON results")
+async def crawl_sitemap_stream(request: SitemapCrawlRequest) -> StreamingResponse:
+    """
+    Reads the sitemaps declared in the site's robots.txt (or /sitemap.xml), following
+    sitemap indexes and gzipped files, and crawls up to `max_pages` of their URLs,
+    highest <priority> first. With the result store on, URLs whose <lastmod> is no
+    newer than their last successful crawl are skipped.
+    """
+    sink = default_sink()
+    results = crawl_sitemaps(
+        request.url,
+        max_pages=request.max_pages,
+        concurrency=STREAM_CONCURRENCY,
+        respect_robots=request.respect_robots,
+        last_crawled=sink.store.succeeded_at if sink is not None else None,
+        crawl_fn=_crawl_admitted,
+    )
+    return StreamingResponse(_ndjson_lines(results, endpoint="/crawl/sitemap"), media_type="application/x-ndjson")
+
+
+@router.post("/jobs", response_model=JobAccepted, status_code=202, summary="Queue URLs for asynchronous crawling")
+async def create_job(request: JobRequest) -> JobAccepted:
+    """
+    Queues every URL for crawling by the background worker pool and returns a job id
+    straight away — poll `GET /jobs/{job_id}`, or pass `webhook_url` to have the
+    finished job POSTed to you. Responds 503 with `Retry-After` when the queue has
+    no room for the whole batch; nothing is queued in that case.
+    """
+    if len(request.urls) > JOB_MAX_URLS:
+        raise HTTPException(status_code=413, detail=f"At most {JOB_MAX_URLS} URLs per job")
+    try:
+        job_id = submit_job(request.urls, request.respect_robots, request.webhook_url)
+    except QueueFull:
+        raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "5"})
+    except QueueUnavailable as exc:
+        logger.warning("Job backend unavailable: %s", exc)
+        raise HTTPException(status_code=503, detail="Job queue unavailable", headers={"Retry-After": "5"})
+    return JobAccepted(job_id=job_id, status="queued", total=len(request.urls))
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus, summary="Poll an asynchronous crawl job")
+async def read_job(job_id: str) -> JobStatus:
+    try:
+        job = get_job(job_id)
+    except QueueUnavailable:
+        raise HTTPException(status_code=503, detail="Job queue unavailable", headers={"Retry-After": "5"})
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return JobStatus(**job)
+
+
+@router.get("/search", response_model=SearchResponse, summary="Find crawled pages by topic and page type")
+async def search(
+    topic: list[str] = Query(..., description="repeat for pages tagged with every topic"),
+    page_type: list[str] = Query([], description="repeat to match any of several types"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10_000),
+) -> SearchResponse:
+    """Pages crawled by this instance whose extracted topics include every `topic`."""
+    index = default_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Search index is disabled")
+    start = time.perf_counter()
+    # in-memory array ops — milliseconds even over millions of docs, so no executor hop
+    hits = index.search(topic, page_type, limit=limit, offset=offset)
+    return SearchResponse(total=hits.total, took_ms=(time.perf_counter() - start) * 1000, urls=hits.urls)
 
 
 @router.get("/health", response_model=HealthResponse, summary="Service health check")
 async def health_check() -> HealthResponse:
+    """Reports the cache from the circuit breaker's state — never blocks on Redis."""
     cache_status = "connected" if is_cache_healthy() else "unavailable"
-    return HealthResponse(status="ok", cache=cache_status)
+    return HealthResponse(status="ok", cache=cache_status, cache_circuit=breaker.state)
+
+
+@router.get("/metrics", summary="Prometheus metrics")
+async def metrics() -> Response:
+    """Per-stage latency histograms, cache hit/miss counters, in-flight crawls and response sizes."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -1,5 +1,5 @@
 from typing import Optional
-from pydantic import BaseModel, HttpUrl, field_validator
+from pydantic import BaseModel, Field, HttpUrl, field_validator
 
 
 class CrawlRequest(BaseModel):
@@ -14,11 +14,91 @@ class CrawlRequest(BaseModel):
         return v
 
 
+class CrawlBatchRequest(BaseModel):
+    urls: list[str] = Field(min_length=1)
+    respect_robots: bool = True
+
+    @field_validator("urls")
+    @classmethod
+    def urls_must_be_http(cls, v: list[str]) -> list[str]:
+        for url in v:
+            if not url.startswith(("http://", "https://")):
+                raise ValueError(f"URL must start with http:// or https://: {url}")
+        return v
+
+
+class SiteCrawlRequest(BaseModel):
+    url: str
+    max_depth: int = Field(2, ge=0, le=5)       # link hops from the seed
+    max_pages: int = Field(50, ge=1, le=500)
+    max_hosts: int = Field(1, ge=1, le=50)      # 1 = stay on the seed's host
+    respect_robots: bool = True
+
+    @field_validator("url")
+    @classmethod
+    def url_must_be_http(cls, v: str) -> str:
+        if not v.startswith(("http://", "https://")):
+            raise ValueError("URL must start with http:// or https://")
+        return v
+
+
+class SitemapCrawlRequest(BaseModel):
+    url: str                    # any URL on the site; sitemaps come from its robots.txt
+    max_pages: int = Field(50, ge=1, le=500)
+    respect_robots: bool = True
+
+    @field_validator("url")
+    @classmethod
+    def url_must_be_http(cls, v: str) -> str:
+        if not v.startswith(("http://", "https://")):
+            raise ValueError("URL must start with http:// or https://")
+        return v
+
+
+class JobRequest(BaseModel):
+    urls: list[str] = Field(min_length=1)
+    respect_robots: bool = True
+    webhook_url: Optional[str] = None   # POSTed the finished job once every URL is done
+
+    @field_validator("urls")
+    @classmethod
+    def urls_must_be_http(cls, v: list[str]) -> list[str]:
+        for url in v:
+            if not url.startswith(("http://", "https://")):
+                raise ValueError(f"URL must start with http:// or https://: {url}")
+        return v
+
+    @field_validator("webhook_url")
+    @classmethod
+    def webhook_must_be_http(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and not v.startswith(("http://", "https://")):
+            raise ValueError("webhook_url must start with http:// or https://")
+        return v
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str     # always "queued" on submission
+    total: int
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str     # queued | running | done
+    total: int
+    completed: int
+    created_at: float
+    finished_at: Optional[float] = None
+    webhook_url: Optional[str] = None
+    results: list[Optional[dict]]   # CrawlResult per submitted URL, in order; null until crawled
+
+
 class CrawlResponse(BaseModel):
     url: str
     final_url: str
     status_code: int
     cached: bool = False
+    stale: bool = False         # served past soft expiry while a background refresh runs
 
     # standard meta
     title: Optional[str] = None
@@ -44,6 +124,7 @@ class CrawlResponse(BaseModel):
     h1_tags: list[str] = []
     h2_tags: list[str] = []
     body_text: Optional[str] = None
+    links: list[str] = []       # absolute outlinks, rel="nofollow" excluded
     word_count: int = 0
 
     # derived
@@ -54,9 +135,16 @@ class CrawlResponse(BaseModel):
     error: Optional[str] = None
 
 
+class SearchResponse(BaseModel):
+    total: int              # matching pages, before limit / offset
+    took_ms: float
+    urls: list[str]         # most recently crawled first
+
+
 class HealthResponse(BaseModel):
     status: str
     cache: str  # "connected" or "unavailable"
+    cache_circuit: str = "closed"   # Redis circuit breaker: "closed" or "open"
 
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1,220 @@
+"""
+End-to-end load test: concurrent POST /crawl requests against the API while it
+crawls a local mock origin (benchmarks/mock_origin.py), so the whole path
+(middleware, cache, admission control, robots.txt, fetch, parse, extract) is
+loaded without touching real sites.
+
+The app runs either in-process (driven over httpx's ASGI transport, in a fresh
+child process per scenario so module state doesn't leak between runs) or as a
+real uvicorn server. Each scenario runs without Redis (an unreachable
+REDIS_URL, so the breaker opens and only the in-process L1 cache is left) and/or
+against a local fakeredis TCP server standing in for Redis.
+
+Reports throughput, latency percentiles, responses by status (or client error),
+and what the origin saw: requests by kind and peak concurrency. With the
+default thread pool, peak origin concurrency stays pinned near the executor
+size however high --concurrency goes, and every crawl fetches robots.txt again;
+slow-drip origins (--slow-rate) hold those threads for minutes.
+
+Run with: python -m benchmarks.bench_load --requests 300 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from .bench_pipeline import FIXTURES
+from .mock_origin import MockOrigin, add_origin_arguments, origin_config
+
+REDIS_MODES = ("none", "fake")
+# nothing listens on port 1 — connections are refused at once, like a Redis outage
+UNREACHABLE_REDIS_URL = "redis://127.0.0.1:1"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_fake_redis():
+    from fakeredis import TcpFakeServer     # test-only dependency, needed for --redis fake only
+
+    server = TcpFakeServer(("127.0.0.1", _free_port()), server_type="redis")
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-redis", daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"redis://{host}:{port}"
+
+
+async def drive(client: httpx.AsyncClient, urls: list[str], n_requests: int, concurrency: int, respect_robots: bool) -> dict:
+    """Send `n_requests` POST /crawl requests, `concurrency` at a time, cycling through `urls`."""
+    latencies: list[float] = []
+    outcomes: Counter = Counter()
+    counter = itertools.count()
+
+    async def worker() -> None:
+        while (i := next(counter)) < n_requests:
+            # a distinct client address per request, so the per-IP rate limit stays out of the way
+            headers = {"X-Forwarded-For": f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"}
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/crawl", json={"url": urls[i % len(urls)], "respect_robots": respect_robots}, headers=headers,
+                )
+                outcome = str(response.status_code)
+            except httpx.HTTPError as exc:
+                outcome = type(exc).__name__
+            latencies.append(time.perf_counter() - start)
+            outcomes[outcome] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"elapsed": time.perf_counter() - start, "latencies": latencies, "outcomes": dict(outcomes)}
+
+
+def _inprocess_scenario(params: dict) -> dict:
+    """Runs in a fresh child process: the api modules read REDIS_URL at import time."""
+    os.environ["REDIS_URL"] = params["redis_url"]
+    import logging
+
+    from api.main import app
+    logging.getLogger().setLevel(logging.WARNING)      # one INFO line per request would dominate
+
+    async def run() -> dict:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=params["timeout"]) as client:
+                return await drive(client, params["urls"], params["requests"], params["concurrency"], params["respect_robots"])
+
+    return asyncio.run(run())
+
+
+def _uvicorn_scenario(params: dict) -> dict:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, "REDIS_URL": params["redis_url"]},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1).status_code < 500:
+                    break
+            except httpx.HTTPError:
+                pass
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not come up")
+            time.sleep(0.2)
+
+        async def run() -> dict:
+            limits = httpx.Limits(max_connections=params["concurrency"], max_keepalive_connections=params["concurrency"])
+            async with httpx.AsyncClient(base_url=base_url, timeout=params["timeout"], limits=limits) as client:
+                return await drive(client, params["urls"], params["requests"], params["concurrency"], params["respect_robots"])
+
+        return asyncio.run(run())
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def summarize(run: dict, origin_stats: Counter) -> dict:
+    ordered = sorted(run["latencies"])
+    return {
+        "requests": len(ordered),
+        "elapsed_s": round(run["elapsed"], 3),
+        "throughput_rps": round(len(ordered) / run["elapsed"], 2) if run["elapsed"] else 0.0,
+        "latency_ms": {
+            name: round(_percentile(ordered, pct) * 1000, 1)
+            for name, pct in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))
+        },
+        "responses": dict(sorted(run["outcomes"].items())),
+        "origin": dict(sorted(origin_stats.items())),
+    }
+
+
+def _print_report(scenario: dict, report: dict) -> None:
+    latency = report["latency_ms"]
+    origin = report["origin"]
+    print(f"\nmode={scenario['mode']} redis={scenario['redis']} concurrency={scenario['concurrency']}")
+    print(f"  throughput  {report['throughput_rps']:.1f} req/s ({report['requests']} requests in {report['elapsed_s']:.1f} s)")
+    print("  latency ms  " + "  ".join(f"{name} {value:.0f}" for name, value in latency.items()))
+    print("  responses   " + "  ".join(f"{status}: {n}" for status, n in report["responses"].items()))
+    print("  origin      " + "  ".join(f"{kind}: {n}" for kind, n in origin.items() if kind != "bytes"))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test POST /crawl against a local mock origin.")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--redis", choices=(*REDIS_MODES, "both"), default="both")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=0, help="distinct URLs to cycle through (default: one per request, all cache misses)")
+    parser.add_argument("--fixtures", default="small,typical", help=f"comma-separated pages to serve, of {', '.join(FIXTURES)}")
+    parser.add_argument("--no-robots", dest="respect_robots", action="store_false", help="skip robots.txt checks")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client-side request timeout, seconds")
+    parser.add_argument("--out", help="also write the reports as JSON here")
+    add_origin_arguments(parser)
+    args = parser.parse_args(argv)
+
+    fixtures = [name.strip() for name in args.fixtures.split(",") if name.strip()]
+    unknown = set(fixtures) - set(FIXTURES)
+    if unknown:
+        parser.error(f"unknown fixtures: {', '.join(sorted(unknown))}")
+
+    reports = []
+    with MockOrigin(origin_config(args)) as origin:
+        n_pages = args.pages or args.requests
+        urls = [origin.page_url(fixtures[n % len(fixtures)], n) for n in range(n_pages)]
+        for redis_mode in REDIS_MODES if args.redis == "both" else (args.redis,):
+            fake_redis = _start_fake_redis() if redis_mode == "fake" else None
+            params = {
+                "urls": urls, "requests": args.requests, "concurrency": args.concurrency,
+                "respect_robots": args.respect_robots, "timeout": args.timeout,
+                "redis_url": fake_redis[1] if fake_redis else UNREACHABLE_REDIS_URL,
+            }
+            origin.stats.clear()
+            try:
+                if args.mode == "inprocess":
+                    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                        run = pool.submit(_inprocess_scenario, params).result()
+                else:
+                    run = _uvicorn_scenario(params)
+            finally:
+                if fake_redis is not None:
+                    fake_redis[0].shutdown()
+            scenario = {"mode": args.mode, "redis": redis_mode, "concurrency": args.concurrency, "pages": n_pages}
+            report = summarize(run, origin.stats)
+            _print_report(scenario, report)
+            reports.append({"scenario": scenario, "origin_config": vars(origin.config), **report})
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(reports, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Request throughput through the middleware stack: pure ASGI (current) vs the
+equivalent BaseHTTPMiddleware implementations it replaced.
+
+Drives the app in-process over httpx's ASGI transport, so the numbers isolate
+framework + middleware overhead from network I/O. Redis is not needed — cache
+hits are served from a patched get_cached_entry.
+
+Run with: python -m benchmarks.bench_middleware
+"""
+
+import asyncio
+import math
+import time
+from unittest.mock import patch
+
+import httpx
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+
+from api.cache import CacheEntry
+from api.middleware import RateLimitMiddleware, RequestLoggingMiddleware, logger
+from api.ratelimit import TokenBucketLimiter
+from api.routes import router
+from crawler.models import CrawlResult
+
+N_REQUESTS = 5_000
+CONCURRENCY = 50
+
+CACHED_ENTRY = CacheEntry(CrawlResult(
+    url="https://example.com/article",
+    final_url="https://example.com/article",
+    status_code=200,
+    title="Example Article Title",
+    topics=["crawling", "web", "article"],
+    body_text="word " * 300,
+).to_json(), fresh_until=float("inf"))
+
+
+# --- BaseHTTPMiddleware equivalents (the pre-ASGI implementation) ---
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app, requests_per_window: int, window_seconds: int):
+        super().__init__(app)
+        self._limiter = TokenBucketLimiter(requests_per_window, window_seconds)
+
+    async def dispatch(self, request, call_next):
+        if request.url.path == "/health":
+            return await call_next(request)
+        ip = request.client.host if request.client else "unknown"
+        wait = self._limiter.check(ip)
+        if wait:
+            return JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests. Please slow down.", "code": "rate_limit_exceeded"},
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+        return await call_next(request)
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start = time.time()
+        response = await call_next(request)
+        duration_ms = int((time.time() - start) * 1000)
+        logger.info("%s %s -> %d (%dms)", request.method, request.url.path, response.status_code, duration_ms)
+        return response
+
+
+def _build_app(legacy: bool) -> FastAPI:
+    app = FastAPI()
+    # effectively unlimited so the benchmark measures overhead, not 429s
+    limit = dict(requests_per_window=10**9, window_seconds=60)
+    if legacy:
+        app.add_middleware(LegacyRateLimitMiddleware, **limit)
+        app.add_middleware(LegacyRequestLoggingMiddleware)
+    else:
+        app.add_middleware(RateLimitMiddleware, **limit)
+        app.add_middleware(RequestLoggingMiddleware)
+    app.include_router(router)
+    return app
+
+
+async def _run(app: FastAPI, method: str, path: str, **kwargs) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = N_REQUESTS
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                response = await client.request(method, path, **kwargs)
+                assert response.status_code == 200, response.status_code
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return N_REQUESTS / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    cases = [
+        ("GET /health", "GET", "/health", {}),
+        ("POST /crawl (cache hit)", "POST", "/crawl", {"json": {"url": "https://example.com/article"}}),
+    ]
+    print(f"{N_REQUESTS} requests, concurrency {CONCURRENCY}\n")
+    print(f"{'case':<28}{'BaseHTTPMiddleware':>22}{'pure ASGI':>14}{'speedup':>10}")
+    with patch("api.routes.get_cached_entry", return_value=CACHED_ENTRY), \
+         patch("api.routes.is_cache_healthy", return_value=True), \
+         patch.object(logger, "info"):
+        for label, method, path, kwargs in cases:
+            before = await _run(_build_app(legacy=True), method, path, **kwargs)
+            after = await _run(_build_app(legacy=False), method, path, **kwargs)
+            print(f"{label:<28}{before:>17.0f} rps{after:>10.0f} rps{after / before:>9.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,185 @@
+"""
+Microbenchmarks for the CPU-bound crawl pipeline: parse_html, _build_corpus,
+_extract_topics, classify_page, and parse + extract end to end, over the
+checked-in fixture corpus in benchmarks/fixtures/ (small, typical, and a 5 MB
+pathological page). Fully offline.
+
+Each case reports median / min wall time and the peak Python heap (tracemalloc)
+of one call. Results are written as JSON and compared against a stored baseline;
+the exit status is 1 if any case regressed past the threshold.
+
+Run with: python -m benchmarks.bench_pipeline [--out results.json]
+Refresh the baseline (on the machine you compare on) with --update-baseline.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable
+
+from crawler.classifier import classify_page
+from crawler.extractor import _build_corpus, _extract_topics, extract_metadata
+from crawler.parser import parse_html
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURES = {
+    "small": ("small.html", "https://shop.example.com/p/compact-2-slice-toaster"),
+    "typical": ("typical.html", "https://news.example.com/2024/05/14/city/transit-expansion-approved"),
+    "pathological": ("pathological.html.gz", "https://farm.example.com/sale"),
+}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+MIN_RUNS = 3
+MAX_RUNS = 50
+MIN_TIME = 1.0          # seconds of timed runs per case, at least MIN_RUNS
+MIN_SAMPLE = 0.005      # seconds per sample; fast functions are looped to fill it
+# absolute slack, so scheduler noise on sub-millisecond cases isn't a regression
+NOISE_FLOOR_S = 0.0005
+NOISE_FLOOR_BYTES = 64 * 1024
+
+
+def load_fixture(name: str) -> str:
+    filename, _ = FIXTURES[name]
+    path = os.path.join(FIXTURE_DIR, filename)
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def _cases(name: str) -> dict[str, Callable[[], object]]:
+    html = load_fixture(name)
+    _, url = FIXTURES[name]
+    parsed = parse_html(html, url=url)
+    corpus = _build_corpus(parsed)
+    return {
+        f"parse_html[{name}]": lambda: parse_html(html, url=url),
+        f"build_corpus[{name}]": lambda: _build_corpus(parsed),
+        f"extract_topics[{name}]": lambda: _extract_topics(corpus),
+        f"classify_page[{name}]": lambda: classify_page(parsed, url),
+        f"end_to_end[{name}]": lambda: extract_metadata(parse_html(html, url=url), url, url, 200),
+    }
+
+
+def _sample(fn: Callable[[], object], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number
+
+
+def _time(fn: Callable[[], object]) -> dict:
+    fn()        # warm-up: imports, regex compilation, vectorizer caches
+    # calls per sample: enough that each sample spans MIN_SAMPLE, like timeit.autorange
+    number, first = 1, _sample(fn, 1)
+    while first * number < MIN_SAMPLE:
+        number *= 10
+        first = _sample(fn, number)
+    runs = min(MAX_RUNS, max(MIN_RUNS, int(MIN_TIME / (first * number))))
+    samples = [first] + [_sample(fn, number) for _ in range(runs - 1)]
+    return {"median_s": statistics.median(samples), "min_s": min(samples), "calls": len(samples) * number}
+
+
+def _peak_memory(fn: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(fixtures: list[str]) -> dict:
+    results = {}
+    for name in fixtures:
+        for case, fn in _cases(name).items():
+            results[case] = {**_time(fn), "peak_bytes": _peak_memory(fn)}
+            r = results[case]
+            print(
+                f"{case:<34} {r['median_s'] * 1000:10.3f} ms median  {r['min_s'] * 1000:10.3f} ms min  "
+                f"{r['peak_bytes'] / 1e6:8.2f} MB peak  ({r['calls']} calls)",
+                file=sys.stderr,
+            )
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float, memory_threshold: float) -> list[str]:
+    """Regressions of `current` against `baseline`, as readable lines (empty if none)."""
+    regressions = []
+    for case, now in current["results"].items():
+        before = baseline.get("results", {}).get(case)
+        if before is None:
+            continue
+        limit = before["median_s"] * (1 + threshold) + NOISE_FLOOR_S
+        if now["median_s"] > limit:
+            regressions.append(
+                f"{case}: median {now['median_s'] * 1000:.2f} ms vs baseline {before['median_s'] * 1000:.2f} ms "
+                f"(+{(now['median_s'] / before['median_s'] - 1) * 100:.0f}%)"
+            )
+        limit = before["peak_bytes"] * (1 + memory_threshold) + NOISE_FLOOR_BYTES
+        if now["peak_bytes"] > limit:
+            regressions.append(
+                f"{case}: peak {now['peak_bytes'] / 1e6:.2f} MB vs baseline {before['peak_bytes'] / 1e6:.2f} MB "
+                f"(+{(now['peak_bytes'] / before['peak_bytes'] - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median time increase (0.25 = +25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.10, help="allowed peak memory increase")
+    parser.add_argument("--fixtures", default=",".join(FIXTURES), help="comma-separated subset of fixtures")
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    fixtures = [name.strip() for name in args.fixtures.split(",") if name.strip()]
+    unknown = set(fixtures) - set(FIXTURES)
+    if unknown:
+        parser.error(f"unknown fixtures: {', '.join(sorted(unknown))}")
+
+    current = run(fixtures)
+    encoded = json.dumps(current, indent=2) + "\n"
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(encoded)
+    else:
+        sys.stdout.write(encoded)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(encoded)
+        print(f"baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline} — run with --update-baseline to create one", file=sys.stderr)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold, args.memory_threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    if not regressions:
+        print(f"no regressions against {args.baseline} (baseline from {baseline['meta']['created']})", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+"""
+Per-request overhead of the in-process rate limiter.
+
+Run with: python -m benchmarks.bench_ratelimit
+"""
+
+import time
+
+from api.ratelimit import TokenBucketLimiter
+
+N = 200_000
+
+
+def _bench(label: str, limiter: TokenBucketLimiter, keys: list[str]) -> None:
+    check = limiter.check
+    n_keys = len(keys)
+    start = time.perf_counter()
+    for i in range(N):
+        check(keys[i % n_keys])
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed / N * 1e9:8.0f} ns/check   tracked keys: {len(limiter)}")
+
+
+def main() -> None:
+    # one hot client, mostly rejected once the bucket drains
+    _bench("single hot key", TokenBucketLimiter(30, 60), ["10.0.0.1"])
+
+    # steady traffic from a realistic pool of clients
+    pool = [f"10.0.{i // 256}.{i % 256}" for i in range(1_000)]
+    _bench("1k rotating keys", TokenBucketLimiter(30, 60), pool)
+
+    # flood of never-repeating IPs against the key cap
+    flood = [f"spoofed-{i}" for i in range(N)]
+    _bench("200k distinct keys (max_keys=10k)", TokenBucketLimiter(30, 60, max_keys=10_000), flood)
+
+
+if __name__ == "__main__":
+    main()
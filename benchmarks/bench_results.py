@@ -0,0 +1,77 @@
+"""
+Sustained insert throughput of the persistent result store (target: 10k results/s).
+
+Run with: python -m benchmarks.bench_results
+"""
+
+import os
+import tempfile
+import time
+
+from crawler.models import CrawlResult
+from crawler.results import RESULT_BATCH_SIZE, ResultSink, ResultStore
+
+N = 100_000
+TARGET = 10_000     # results/s
+
+BODY = "Typical article body text with a few hundred words of content. " * 40
+
+
+def _results(n: int, offset: int = 0) -> list[CrawlResult]:
+    return [
+        CrawlResult(
+            url=f"https://host{i % 500}.example.com/page/{i}",
+            final_url=f"https://host{i % 500}.example.com/page/{i}",
+            status_code=200,
+            title=f"Page {i}",
+            description="A synthetic page used to benchmark result writes.",
+            h1_tags=[f"Heading {i}"],
+            body_text=f"{BODY} {i}",
+            links=[f"https://host{i % 500}.example.com/page/{i + k}" for k in range(20)],
+            topics=["benchmark", "crawler", "sqlite", "throughput", "results"],
+            page_type=("blog_post", "news_article", "product", "other")[i % 4],
+            word_count=400,
+        )
+        for i in range(offset, offset + n)
+    ]
+
+
+def _report(label: str, n: int, elapsed: float) -> None:
+    rate = n / elapsed
+    verdict = "ok" if rate >= TARGET else "BELOW TARGET"
+    print(f"{label:<40} {rate:10,.0f} results/s   ({elapsed:.2f}s for {n:,})   {verdict}")
+
+
+def main() -> None:
+    results = _results(N)
+    with tempfile.TemporaryDirectory() as tmp:
+        # direct batched upserts of fresh rows
+        store = ResultStore(os.path.join(tmp, "direct.db"))
+        start = time.perf_counter()
+        for i in range(0, N, RESULT_BATCH_SIZE):
+            store.upsert_many(results[i : i + RESULT_BATCH_SIZE])
+        _report(f"upsert_many, batches of {RESULT_BATCH_SIZE} (insert)", N, time.perf_counter() - start)
+
+        # the same URLs again — every row takes the ON CONFLICT update path
+        start = time.perf_counter()
+        for i in range(0, N, RESULT_BATCH_SIZE):
+            store.upsert_many(results[i : i + RESULT_BATCH_SIZE])
+        _report(f"upsert_many, batches of {RESULT_BATCH_SIZE} (update)", N, time.perf_counter() - start)
+        store.close()
+
+        # end to end through the background sink, as crawl() feeds it
+        store = ResultStore(os.path.join(tmp, "sink.db"))
+        sink = ResultSink(store, max_queue=N + 1)
+        start = time.perf_counter()
+        for result in results:
+            sink.submit(result)
+        submitted = time.perf_counter() - start
+        sink.close(timeout=120)
+        elapsed = time.perf_counter() - start
+        print(f"{'ResultSink.submit (caller side)':<40} {submitted / N * 1e6:10.2f} µs/result")
+        _report("ResultSink end to end", len(store), elapsed)
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Topic index build, query and persistence cost over a synthetic corpus of 1M pages.
+
+Run with: python -m benchmarks.bench_search
+"""
+
+import itertools
+import os
+import random
+import tempfile
+import time
+
+from crawler.models import CrawlResult
+from crawler.search import TopicIndex
+
+N_DOCS = 1_000_000
+VOCABULARY = 50_000
+TOPICS_PER_DOC = 12
+PAGE_TYPES = ("blog_post", "news_article", "product", "homepage", "other")
+QUERIES = 50
+
+
+def _corpus(rng: random.Random):
+    # Zipf-ish topic frequencies: a few very common terms, a long tail
+    terms = [f"topic{i}" for i in range(VOCABULARY)]
+    cumulative = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+    for i in range(N_DOCS):
+        yield CrawlResult(
+            url=f"https://host{i % 5000}.example.com/page/{i}",
+            final_url="",
+            status_code=200,
+            topics=rng.choices(terms, cum_weights=cumulative, k=TOPICS_PER_DOC),
+            page_type=rng.choice(PAGE_TYPES),
+        )
+
+
+def _bench_query(label: str, index: TopicIndex, topics: list[str], page_types: list[str]) -> None:
+    start = time.perf_counter()
+    for _ in range(QUERIES):
+        hits = index.search(topics, page_types)
+    elapsed = (time.perf_counter() - start) / QUERIES
+    print(f"{label:<48} {elapsed * 1000:8.2f} ms   {hits.total:>9,} matches")
+
+
+def main() -> None:
+    rng = random.Random(0)
+    index = TopicIndex()
+    start = time.perf_counter()
+    for result in _corpus(rng):
+        index.add(result)
+    elapsed = time.perf_counter() - start
+    print(f"{'build (incremental add)':<48} {elapsed / N_DOCS * 1e6:8.2f} µs/doc ({N_DOCS:,} docs)")
+
+    _bench_query("1 common topic", index, ["topic0"], [])
+    _bench_query("2 common topics", index, ["topic0", "topic1"], [])
+    _bench_query("2 common topics, 1 page_type", index, ["topic0", "topic1"], ["news_article"])
+    _bench_query("3 topics, 2 page_types", index, ["topic0", "topic3", "topic10"], ["blog_post", "product"])
+    _bench_query("rare + common topic", index, ["topic20000", "topic0"], [])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "topics.idx")
+        start = time.perf_counter()
+        index.save(path)
+        print(f"{'save (compacting)':<48} {(time.perf_counter() - start) * 1000:8.0f} ms   "
+              f"{os.path.getsize(path) / 1e6:.1f} MB")
+        start = time.perf_counter()
+        loaded = TopicIndex.load(path)
+        print(f"{'load (mmap)':<48} {(time.perf_counter() - start) * 1000:8.0f} ms")
+        _bench_query("2 common topics, 1 page_type (mapped)", loaded, ["topic0", "topic1"], ["news_article"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Local mock origin for load tests: serves the benchmark fixture pages and a
+robots.txt with configurable latency, bandwidth, error and redirect rates, and
+slow-drip bodies, so the fetcher and the API can be loaded without touching
+real sites.
+
+Pages live at /<fixture>/<n> (e.g. /typical/42) for any n; /robots.txt
+disallows /private/. Each request's fate is drawn independently:
+
+- error_rate:    answered 503 after the latency
+- redirect_rate: answered 301 to the same page (which then doesn't redirect)
+- slow_rate:     body dripped at slow_bytes_per_second — by default slow
+                 enough to pin a fetch thread for minutes without tripping the
+                 fetcher's per-read timeout, like a misbehaving origin does
+
+Threaded (one thread per connection), like most origins the crawler meets.
+Used by bench_load; can also run standalone for manual testing.
+
+Run with: python -m benchmarks.mock_origin --port 8081 --latency 0.2
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from .bench_pipeline import FIXTURES, load_fixture
+
+ROBOTS_TXT = b"User-agent: *\nDisallow: /private/\n"
+CHUNK_BYTES = 4096
+
+
+@dataclass
+class OriginConfig:
+    latency: float = 0.1                # seconds before the first byte of every response
+    jitter: float = 0.5                 # latency varies uniformly by +/- this fraction
+    bytes_per_second: float = 0.0       # bandwidth per response; 0 = unlimited
+    error_rate: float = 0.0
+    redirect_rate: float = 0.0
+    slow_rate: float = 0.0
+    slow_bytes_per_second: float = 1024.0
+    robots_latency: Optional[float] = None  # None = same as latency
+    seed: Optional[int] = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format, *args):     # noqa: A002 — silence per-request logging
+        pass
+
+    def do_GET(self):
+        origin = self.server.origin
+        origin._begin()
+        try:
+            self._handle(origin)
+        finally:
+            origin._end()
+
+    def _handle(self, origin: "MockOrigin") -> None:
+        config = origin.config
+        path, _, query = self.path.partition("?")
+
+        if path == "/robots.txt":
+            origin._count("robots")
+            self._sleep(config.latency if config.robots_latency is None else config.robots_latency)
+            return self._send(200, ROBOTS_TXT, "text/plain")
+
+        fixture = path.strip("/").split("/")[0]
+        if fixture not in origin.pages and fixture != "private":
+            origin._count("not_found")
+            return self._send(404, b"not found", "text/plain")
+
+        roll = origin._random()
+        self._sleep(config.latency)
+        if roll < config.error_rate:
+            origin._count("error")
+            return self._send(503, b"service unavailable", "text/plain")
+        roll -= config.error_rate
+        if roll < config.redirect_rate and "redirected=1" not in query:
+            origin._count("redirect")
+            self.send_response(301)
+            self.send_header("Location", f"{path}?redirected=1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        roll -= config.redirect_rate
+
+        body = origin.pages.get(fixture, b"<html><body>private</body></html>")
+        if roll < config.slow_rate:
+            origin._count("slow")
+            return self._send(200, body, "text/html; charset=utf-8", config.slow_bytes_per_second)
+        origin._count("page")
+        self._send(200, body, "text/html; charset=utf-8", config.bytes_per_second)
+
+    def _sleep(self, latency: float) -> None:
+        jitter = self.server.origin.config.jitter
+        if latency > 0:
+            time.sleep(latency * (1 + jitter * (2 * self.server.origin._random() - 1)))
+
+    def _send(self, status: int, body: bytes, content_type: str, bytes_per_second: float = 0.0) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            if bytes_per_second <= 0:
+                self.wfile.write(body)
+            else:
+                for start in range(0, len(body), CHUNK_BYTES):
+                    chunk = body[start:start + CHUNK_BYTES]
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+                    time.sleep(len(chunk) / bytes_per_second)
+        except (BrokenPipeError, ConnectionResetError):
+            return      # the client gave up (timeout) — nothing to finish
+        self.server.origin._count("bytes", len(body))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+    origin: "MockOrigin"
+
+
+class MockOrigin:
+    """
+    The mock origin on a background thread. Use as a context manager, or call
+    start()/stop(). `url` is its base URL; `stats` counts responses by kind
+    (robots, page, slow, redirect, error, not_found), body bytes sent, and the
+    most requests it was ever serving at once (peak_in_flight).
+    """
+
+    def __init__(self, config: Optional[OriginConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or OriginConfig()
+        self.pages = {name: load_fixture(name).encode("utf-8") for name in FIXTURES}
+        self.stats: Counter = Counter()
+        self.in_flight = 0
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _Handler)
+        self._server.origin = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def page_url(self, fixture: str, n: int) -> str:
+        return f"{self.url}/{fixture}/{n}"
+
+    def _random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def _begin(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+
+    def _end(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def _count(self, kind: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[kind] += n
+
+    def start(self) -> "MockOrigin":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-origin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockOrigin":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def add_origin_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = OriginConfig()
+    group = parser.add_argument_group("mock origin")
+    group.add_argument("--latency", type=float, default=defaults.latency, help="seconds to first byte")
+    group.add_argument("--jitter", type=float, default=defaults.jitter, help="+/- fraction of latency")
+    group.add_argument("--bytes-per-second", type=float, default=defaults.bytes_per_second, help="per-response bandwidth, 0 = unlimited")
+    group.add_argument("--error-rate", type=float, default=defaults.error_rate, help="fraction answered 503")
+    group.add_argument("--redirect-rate", type=float, default=defaults.redirect_rate, help="fraction answered 301")
+    group.add_argument("--slow-rate", type=float, default=defaults.slow_rate, help="fraction with slow-drip bodies")
+    group.add_argument("--slow-bytes-per-second", type=float, default=defaults.slow_bytes_per_second)
+    group.add_argument("--robots-latency", type=float, default=None, help="default: same as --latency")
+    group.add_argument("--seed", type=int, default=None)
+
+
+def origin_config(args: argparse.Namespace) -> OriginConfig:
+    return OriginConfig(**{name: getattr(args, name) for name in asdict(OriginConfig())})
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the benchmark fixtures as a mock origin.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_origin_arguments(parser)
+    args = parser.parse_args(argv)
+
+    origin = MockOrigin(origin_config(args), host=args.host, port=args.port)
+    print(f"Serving {', '.join(f'{origin.url}/{name}/<n>' for name in FIXTURES)} — Ctrl-C to stop")
+    try:
+        origin._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        origin._server.server_close()
+        print(dict(origin.stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
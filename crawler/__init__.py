@@ -1,8 +1,13 @@
-from .core import crawl
+from .core import crawl, crawl_many
 from .fetcher import fetch_page
 from .parser import parse_html
 from .extractor import extract_metadata
 from .classifier import classify_page
 from .models import CrawlResult
+from .frontier import Frontier, crawl_frontier
+from .site import crawl_site
 
-__all__ = ["crawl", "fetch_page", "parse_html", "extract_metadata", "classify_page", "CrawlResult"]
+__all__ = [
+    "crawl", "crawl_many", "fetch_page", "parse_html", "extract_metadata", "classify_page", "CrawlResult",
+    "Frontier", "crawl_frontier", "crawl_site",
+]
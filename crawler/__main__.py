@@ -0,0 +1,7 @@
+"""python -m crawler — bulk crawl a file of URLs to JSONL; see crawler.bulk."""
+import sys
+
+from .bulk import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+Bulk crawl: URLs from a file or stdin in, one JSON result per line out.
+
+    python -m crawler urls.txt --concurrency 64 --per-host 2 --out results.jsonl --checkpoint urls.ckpt
+
+Input is read lazily and at most `window` lines past the oldest unfinished one
+are held at a time, so memory stays flat however long the input is. main() turns
+off the per-URL in-memory state crawl() can keep for the API (the topic index and
+the recrawl scheduler), which would otherwise grow with every URL. URLs whose
+host is already at its per-host limit wait in a per-host backlog (inside the
+window) instead of taking a global slot. Results are written as they complete,
+not in input order.
+
+With --checkpoint, completed input lines are recorded every few seconds and on
+exit; rerunning the same command skips them and appends to --out. A crash
+between writing a result and the next checkpoint re-crawls that URL on resume
+(at-least-once).
+"""
+import argparse
+import asyncio
+import logging
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Iterable, Iterator, Optional
+from urllib.parse import urlsplit
+
+from . import recrawl, search
+from .core import crawl
+from .models import CrawlResult
+
+logger = logging.getLogger(__name__)
+
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "32"))
+BULK_PER_HOST_CONCURRENCY = int(os.getenv("BULK_PER_HOST_CONCURRENCY", "2"))
+# lines read ahead of the oldest unfinished one — bounds memory and the checkpoint
+BULK_WINDOW = int(os.getenv("BULK_WINDOW", "10000"))
+BULK_CHECKPOINT_SECONDS = float(os.getenv("BULK_CHECKPOINT_SECONDS", "5"))
+BULK_PROGRESS_SECONDS = float(os.getenv("BULK_PROGRESS_SECONDS", "5"))
+
+_CHECKPOINT_VERSION = 1
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+class Progress:
+    """
+    Which input lines are finished: every line below `next_line`, plus the
+    out-of-order completions in `done` (all >= next_line, so never more than
+    the read-ahead window).
+    """
+
+    def __init__(self, next_line: int = 0, done: Iterable[int] = ()):
+        self.next_line = next_line
+        self.done = set(done)
+
+    def complete(self, line_no: int) -> None:
+        self.done.add(line_no)
+        while self.next_line in self.done:
+            self.done.remove(self.next_line)
+            self.next_line += 1
+
+    def is_done(self, line_no: int) -> bool:
+        return line_no < self.next_line or line_no in self.done
+
+    def checkpoint(self, path: str) -> None:
+        """Write the completed lines to `path`, atomically."""
+        state = {"version": _CHECKPOINT_VERSION, "next_line": self.next_line, "done": self.done}
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    @classmethod
+    def restore(cls, path: str) -> "Progress":
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != _CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported bulk checkpoint version: {state.get('version')}")
+        return cls(state["next_line"], state["done"])
+
+
+class BulkCrawler:
+    """
+    Crawls an iterable of input lines with at most `concurrency` crawls in flight
+    overall and `per_host` per host, writing each result to `out` as a JSON line.
+    Blank lines and lines starting with # are skipped.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = BULK_CONCURRENCY,
+        per_host: int = BULK_PER_HOST_CONCURRENCY,
+        window: int = BULK_WINDOW,
+        respect_robots: bool = True,
+        progress: Optional[Progress] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: float = BULK_CHECKPOINT_SECONDS,
+        report_interval: float = BULK_PROGRESS_SECONDS,
+        report: Optional[IO[str]] = None,
+    ):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.window = max(window, concurrency)
+        self.respect_robots = respect_robots
+        self.progress = progress or Progress()
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.report_interval = report_interval
+        self.report = report
+        self.counts = {"ok": 0, "failed": 0, "resumed": 0}
+
+        self._tasks: dict[asyncio.Task, tuple[int, str]] = {}       # task -> (line_no, host)
+        self._host_active: dict[str, int] = {}
+        self._backlog: dict[str, deque[tuple[int, str]]] = {}       # host -> [(line_no, url)] waiting
+        self._read = 0              # input lines consumed so far
+
+    def _start(self, line_no: int, url: str, host: str) -> None:
+        self._host_active[host] = self._host_active.get(host, 0) + 1
+        task = asyncio.ensure_future(crawl(url, respect_robots=self.respect_robots))
+        self._tasks[task] = (line_no, host)
+
+    def _fill(self, lines: Iterator[tuple[int, str]]) -> None:
+        # stop reading when every global slot is busy or the window is full
+        while len(self._tasks) < self.concurrency and self._read - self.progress.next_line < self.window:
+            try:
+                line_no, line = next(lines)
+            except StopIteration:
+                return
+            self._read = line_no + 1
+            url = line.strip()
+            if self.progress.is_done(line_no):
+                if url and not url.startswith("#"):
+                    self.counts["resumed"] += 1
+                continue
+            if not url or url.startswith("#"):
+                self.progress.complete(line_no)
+                continue
+            host = _host(url)
+            if self._host_active.get(host, 0) < self.per_host:
+                self._start(line_no, url, host)
+            else:
+                self._backlog.setdefault(host, deque()).append((line_no, url))
+
+    def _finish(self, task: asyncio.Task) -> CrawlResult:
+        line_no, host = self._tasks.pop(task)
+        backlog = self._backlog.get(host)
+        if backlog:
+            # the host's slot passes straight to its next waiting URL
+            self._host_active[host] -= 1
+            self._start(*backlog.popleft(), host)
+            if not backlog:
+                del self._backlog[host]
+        elif self._host_active[host] == 1:
+            del self._host_active[host]
+        else:
+            self._host_active[host] -= 1
+        self.progress.complete(line_no)
+        result = task.result()
+        self.counts["ok" if result.status_code == 200 and not result.error else "failed"] += 1
+        return result
+
+    def _save(self, out: IO[bytes]) -> None:
+        # results first, so the checkpoint never claims a line that isn't in the output
+        out.flush()
+        if self.checkpoint_path:
+            self.progress.checkpoint(self.checkpoint_path)
+
+    def _report(self, started: float, last: tuple[float, int], final: bool = False) -> tuple[float, int]:
+        now = time.monotonic()
+        finished = self.counts["ok"] + self.counts["failed"]
+        if self.report is not None:
+            recent = (finished - last[1]) / max(now - last[0], 1e-9)
+            overall = finished / max(now - started, 1e-9)
+            label = "done" if final else f"{recent:.1f}/s now,"
+            print(
+                f"[bulk] {finished} crawled ({self.counts['ok']} ok, {self.counts['failed']} failed, "
+                f"{self.counts['resumed']} resumed) — {label} {overall:.1f}/s overall, "
+                f"{len(self._tasks)} in flight, {sum(map(len, self._backlog.values()))} waiting on hosts",
+                file=self.report, flush=True,
+            )
+        return now, finished
+
+    async def run(self, lines: Iterable[str], out: IO[bytes]) -> dict[str, int]:
+        numbered = enumerate(lines)
+        started = time.monotonic()
+        last_report, last_save = (started, 0), started
+        self._fill(numbered)
+        try:
+            while self._tasks:
+                timeout = max(0.0, min(last_report[0] + self.report_interval, last_save + self.checkpoint_interval) - time.monotonic())
+                done, _ = await asyncio.wait(self._tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    out.write(self._finish(task).to_json() + b"\n")
+                self._fill(numbered)
+
+                now = time.monotonic()
+                if now - last_report[0] >= self.report_interval:
+                    last_report = self._report(started, last_report)
+                if now - last_save >= self.checkpoint_interval:
+                    self._save(out)
+                    last_save = now
+        finally:
+            # interrupted (Ctrl-C) or done: unfinished lines stay unrecorded and are crawled on resume
+            for task in self._tasks:
+                task.cancel()
+            self._save(out)
+            self._report(started, last_report, final=True)
+        return self.counts
+
+
+def _read_lines(path: str) -> Iterator[str]:
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with source:
+        yield from source
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m crawler", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="file of URLs, one per line (- for stdin)")
+    parser.add_argument("--out", default="-", help="output JSONL path, - for stdout")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY, help="crawls in flight overall")
+    parser.add_argument("--per-host", type=int, default=BULK_PER_HOST_CONCURRENCY, help="crawls in flight per host")
+    parser.add_argument("--window", type=int, default=BULK_WINDOW, help="max input lines read ahead of the oldest unfinished one")
+    parser.add_argument("--checkpoint", help="record completed lines here; rerun with the same path to resume")
+    parser.add_argument("--no-robots", action="store_true", help="skip robots.txt checks")
+    parser.add_argument("--quiet", action="store_true", help="no throughput summary on stderr")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    # nothing here serves /search or runs recrawls — don't hold a per-URL entry for them
+    search.SEARCH_INDEX_ENABLED = False
+    recrawl.RECRAWL_ENABLED = False
+
+    progress = None
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        progress = Progress.restore(args.checkpoint)
+        print(f"[bulk] resuming from line {progress.next_line} of {args.input}", file=sys.stderr)
+
+    crawler = BulkCrawler(
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        window=args.window,
+        respect_robots=not args.no_robots,
+        progress=progress,
+        checkpoint_path=args.checkpoint,
+        report=None if args.quiet else sys.stderr,
+    )
+
+    async def run(out: IO[bytes]) -> dict[str, int]:
+        # fetches run in the default executor — size it to the crawl concurrency
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="fetch")
+        )
+        return await crawler.run(_read_lines(args.input), out)
+
+    # append on resume, so earlier results are kept
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "ab" if progress else "wb")
+    try:
+        asyncio.run(run(out))
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
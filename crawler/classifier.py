@@ -1,6 +1,8 @@
 import re
 from urllib.parse import urlparse
 
+from .metrics import stage_timer
+
 
 # Page type labels used throughout the system
 PAGE_TYPES = ("product", "news_article", "blog_post", "homepage", "other")
@@ -63,6 +65,7 @@ _BLOG_CONTENT = [
 ]
 
 
+@stage_timer("classify")
 def classify_page(parsed: dict, url: str) -> str:
     """
     Classify a crawled page into one of five types:
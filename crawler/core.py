@@ -1,9 +1,18 @@
+import asyncio
 import logging
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional
 
-from .fetcher import fetch_page
+import requests
+
+from .fetcher import fetch_page, fetch_response
 from .parser import parse_html
 from .extractor import extract_metadata
+from .metrics import CRAWL_SECONDS, CRAWLS_IN_FLIGHT, URLS_PROCESSED
 from .models import CrawlResult
+from .recrawl import default_scheduler
+from .results import default_sink
+from .search import default_index
+from .store import default_store
 
 logger = logging.getLogger(__name__)
 
@@ -13,20 +22,111 @@ async def crawl(url: str, respect_robots: bool = True) -> CrawlResult:
     Top-level entry point. Fetches, parses, and extracts metadata from any URL.
     Returns a CrawlResult — never raises; errors are captured in result.error.
     """
+    with CRAWLS_IN_FLIGHT.track_inprogress(), CRAWL_SECONDS.time():
+        result = await _crawl(url, respect_robots)
+    sink = default_sink()
+    if sink is not None:
+        sink.submit(result)         # non-blocking — written by the sink's own thread
+    index = default_index()
+    if index is not None:
+        index.add(result)
+    scheduler = default_scheduler()
+    if scheduler is not None:
+        scheduler.observe(result)
+    return result
+
+
+async def _fetch(url: str, respect_robots: bool) -> tuple[str, int, str]:
+    store = default_store()
+    if store is None:
+        return await fetch_page(url, respect_robots=respect_robots)
+    # archiving on: keep the raw page (with headers) so it can be reprocessed offline
+    page = await fetch_response(url, respect_robots=respect_robots)
     try:
-        html, status_code, final_url = await fetch_page(url, respect_robots=respect_robots)
-    except PermissionError as exc:
+        await asyncio.get_running_loop().run_in_executor(None, store.put, url, page)
+    except Exception as exc:
+        logger.warning("Could not archive %s: %s", url, exc)
+    return page.html, page.status_code, page.final_url
+
+
+def fetch_failure_result(url: str, exc: Exception) -> CrawlResult:
+    """The CrawlResult for a fetch that raised — robots block, HTTP error or network failure."""
+    if isinstance(exc, PermissionError):
         logger.warning("Robots disallow: %s", url)
+        URLS_PROCESSED.labels(status="robots_blocked").inc()
         return CrawlResult(url=url, final_url=url, status_code=403, error=str(exc))
-    except Exception as exc:
-        logger.error("Fetch failed for %s: %s", url, exc)
-        return CrawlResult(url=url, final_url=url, status_code=0, error=str(exc))
+    if isinstance(exc, requests.HTTPError):
+        # the origin answered, just not with a page — keep its status code
+        response = exc.response
+        logger.warning("HTTP error for %s: %s", url, exc)
+        URLS_PROCESSED.labels(status="http_error").inc()
+        return CrawlResult(
+            url=url,
+            final_url=response.url if response is not None else url,
+            status_code=response.status_code if response is not None else 0,
+            error=str(exc),
+        )
+    logger.error("Fetch failed for %s: %s", url, exc)
+    URLS_PROCESSED.labels(status="fetch_failed").inc()
+    return CrawlResult(url=url, final_url=url, status_code=0, error=str(exc))
+
 
+def process_html(url: str, html: str, status_code: int, final_url: str) -> CrawlResult:
+    """Parse + extract + classify a fetched page. CPU-bound; never raises."""
     try:
         parsed = parse_html(html, url=final_url)
         result = extract_metadata(parsed, url=url, final_url=final_url, status_code=status_code)
     except Exception as exc:
         logger.error("Parse/extract failed for %s: %s", url, exc)
+        URLS_PROCESSED.labels(status="parse_failed").inc()
         return CrawlResult(url=url, final_url=final_url, status_code=status_code, error=str(exc))
 
+    URLS_PROCESSED.labels(status="success").inc()
     return result
+
+
+async def _crawl(url: str, respect_robots: bool) -> CrawlResult:
+    try:
+        html, status_code, final_url = await _fetch(url, respect_robots=respect_robots)
+    except Exception as exc:
+        return fetch_failure_result(url, exc)
+    return process_html(url, html, status_code, final_url)
+
+
+async def crawl_many(
+    urls: Iterable[str],
+    concurrency: int = 8,
+    respect_robots: bool = True,
+    crawl_fn: Optional[Callable[..., Awaitable[CrawlResult]]] = None,
+) -> AsyncIterator[CrawlResult]:
+    """
+    Crawl many URLs with at most `concurrency` in flight, yielding each result as
+    soon as it completes (completion order, not input order). `crawl_fn` replaces
+    crawl() per URL (e.g. to take an admission slot first).
+
+    URLs are pulled from the iterable lazily, so memory is bounded by the
+    concurrency limit rather than the batch size.
+    """
+    url_iter = iter(urls)
+    pending: set[asyncio.Task] = set()
+    crawl_fn = crawl_fn or crawl
+
+    def _fill() -> None:
+        for url in url_iter:
+            pending.add(asyncio.ensure_future(crawl_fn(url, respect_robots=respect_robots)))
+            if len(pending) >= concurrency:
+                return
+
+    _fill()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.difference_update(done)
+            # refill before yielding so freed slots start fetching while the caller consumes
+            _fill()
+            for task in done:
+                yield task.result()
+    finally:
+        # consumer went away (e.g. client disconnected) — don't leave crawls running
+        for task in pending:
+            task.cancel()
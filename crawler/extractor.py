@@ -7,6 +7,7 @@ from nltk.corpus import stopwords
 from sklearn.feature_extraction.text import TfidfVectorizer
 
 from .classifier import classify_page
+from .metrics import stage_timer
 from .models import CrawlResult
 from .parser import parse_html
 
@@ -71,6 +72,7 @@ def _build_corpus(parsed: dict) -> str:
     return " ".join(parts)
 
 
+@stage_timer("extract_topics")
 def _extract_topics(corpus: str, top_n: int = 15) -> list[str]:
     """
     Run TF-IDF on the corpus and return the top_n scoring terms.
@@ -135,6 +137,7 @@ def extract_metadata(parsed: dict, url: str, final_url: str, status_code: int) -
         h1_tags=parsed.get("h1_tags", []),
         h2_tags=parsed.get("h2_tags", []),
         body_text=body_text[:2000] if body_text else None,  # truncate for storage
+        links=parsed.get("links", []),
         topics=topics,
         page_type=page_type,
         word_count=word_count,
@@ -1,10 +1,17 @@
 import asyncio
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
 from urllib.parse import urlparse
 from urllib.robotparser import RobotFileParser
 
 import requests
 
+from .metrics import stage_timer
+
 logger = logging.getLogger(__name__)
 
 # realistic browser UA — avoids most trivial bot blocks
@@ -17,26 +24,90 @@ USER_AGENT = (
 DEFAULT_TIMEOUT = 15  # seconds
 MAX_CONTENT_BYTES = 5 * 1024 * 1024  # 5 MB ceiling to avoid runaway pages
 
+# parsed robots.txt per scheme://host, so a host's robots.txt is fetched once per TTL, not per URL
+ROBOTS_CACHE_TTL = float(os.getenv("ROBOTS_CACHE_TTL_SECONDS", "3600"))
+ROBOTS_CACHE_MAX_HOSTS = int(os.getenv("ROBOTS_CACHE_MAX_HOSTS", "10000"))
+_ROBOTS_ERROR_TTL = 60      # unreachable robots.txt (treated as allow-all) is retried sooner
+
+
+class FetchedPage(NamedTuple):
+    html: str
+    status_code: int
+    final_url: str
+    headers: dict[str, str]     # response headers, as sent by the origin
+
 
 def _robots_url(url: str) -> str:
     parsed = urlparse(url)
     return f"{parsed.scheme}://{parsed.netloc}/robots.txt"
 
 
+# robots URL -> (parser, expires_at), oldest first
+_robots_cache: OrderedDict[str, tuple[RobotFileParser, float]] = OrderedDict()
+_robots_lock = threading.Lock()
+# striped per-host locks: concurrent misses for one host fetch its robots.txt once
+_robots_fetch_locks = [threading.Lock() for _ in range(64)]
+
+
+def _load_robots(robots_url: str) -> tuple[RobotFileParser, float]:
+    """Fetch and parse robots.txt with the same rules as RobotFileParser.read(), but with a timeout."""
+    rp = RobotFileParser(robots_url)
+    try:
+        response = requests.get(robots_url, headers={"User-Agent": USER_AGENT}, timeout=DEFAULT_TIMEOUT)
+    except requests.RequestException:
+        # if robots.txt is unreachable, assume allowed
+        rp.allow_all = True
+        return rp, _ROBOTS_ERROR_TTL
+    if response.status_code in (401, 403):
+        rp.disallow_all = True
+    elif 400 <= response.status_code < 500:
+        rp.allow_all = True
+    elif response.status_code >= 500:
+        rp.allow_all = True
+        return rp, _ROBOTS_ERROR_TTL
+    else:
+        rp.parse(response.text.splitlines())
+    return rp, ROBOTS_CACHE_TTL
+
+
+def _cached_robots(robots_url: str, now: float) -> Optional[RobotFileParser]:
+    with _robots_lock:
+        entry = _robots_cache.get(robots_url)
+        if entry is None or entry[1] <= now:
+            return None
+        _robots_cache.move_to_end(robots_url)
+        return entry[0]
+
+
+def _robots_for(robots_url: str) -> RobotFileParser:
+    parser = _cached_robots(robots_url, time.monotonic())
+    if parser is not None:
+        return parser
+    with _robots_fetch_locks[hash(robots_url) % len(_robots_fetch_locks)]:
+        parser = _cached_robots(robots_url, time.monotonic())     # fetched while we waited
+        if parser is not None:
+            return parser
+        parser, ttl = _load_robots(robots_url)
+        with _robots_lock:
+            _robots_cache[robots_url] = (parser, time.monotonic() + ttl)
+            _robots_cache.move_to_end(robots_url)
+            while len(_robots_cache) > ROBOTS_CACHE_MAX_HOSTS:
+                _robots_cache.popitem(last=False)
+    return parser
+
+
 def is_crawl_allowed(url: str, user_agent: str = "*") -> bool:
-    """Check robots.txt for the given URL. Returns True if crawling is allowed."""
-    robots_url = _robots_url(url)
-    rp = RobotFileParser()
-    rp.set_url(robots_url)
+    """
+    Check robots.txt for the given URL. Returns True if crawling is allowed.
+    Blocking (it may fetch robots.txt) — fetch_response runs it in the executor.
+    """
     try:
-        rp.read()
-        return rp.can_fetch(user_agent, url)
+        return _robots_for(_robots_url(url)).can_fetch(user_agent, url)
     except Exception:
-        # if robots.txt is unreachable, assume allowed
         return True
 
 
-def _sync_fetch(url: str) -> tuple[str, int, str]:
+def _sync_fetch(url: str) -> FetchedPage:
     """Synchronous fetch using requests — runs inside a thread executor."""
     headers = {
         "User-Agent": USER_AGENT,
@@ -47,19 +118,31 @@ def _sync_fetch(url: str) -> tuple[str, int, str]:
     response = requests.get(url, headers=headers, timeout=DEFAULT_TIMEOUT, allow_redirects=True)
     response.raise_for_status()
     content = response.text[:MAX_CONTENT_BYTES]
-    return content, response.status_code, response.url
+    return FetchedPage(content, response.status_code, response.url, dict(response.headers))
 
 
 async def fetch_page(url: str, respect_robots: bool = True) -> tuple[str, int, str]:
     """
     Fetch the HTML content of a URL asynchronously.
+    Returns (html_content, status_code, final_url) — see fetch_response for headers too.
+    """
+    page = await fetch_response(url, respect_robots=respect_robots)
+    return page.html, page.status_code, page.final_url
+
+
+async def fetch_response(url: str, respect_robots: bool = True) -> FetchedPage:
+    """
+    Fetch a URL asynchronously, returning body, status, final URL and headers.
 
     Uses requests in a thread executor to stay non-blocking inside the async
     event loop while relying on the standard synchronous DNS resolver.
-    Returns (html_content, status_code, final_url).
     """
-    if respect_robots and not is_crawl_allowed(url):
-        raise PermissionError(f"robots.txt disallows crawling {url}")
-
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, _sync_fetch, url)
+    if respect_robots:
+        with stage_timer("robots"):
+            allowed = await loop.run_in_executor(None, is_crawl_allowed, url)
+        if not allowed:
+            raise PermissionError(f"robots.txt disallows crawling {url}")
+
+    with stage_timer("fetch"):
+        return await loop.run_in_executor(None, _sync_fetch, url)
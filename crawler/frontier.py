@@ -0,0 +1,322 @@
+import asyncio
+import copy
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+import os
+import pickle
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import urlsplit
+
+from .core import crawl
+from .models import CrawlResult
+from .urlnorm import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# politeness: minimum seconds between two fetches from the same host
+FRONTIER_HOST_DELAY = float(os.getenv("FRONTIER_HOST_DELAY_SECONDS", "1.0"))
+FRONTIER_CONCURRENCY = int(os.getenv("FRONTIER_CONCURRENCY", "16"))
+
+_CHECKPOINT_VERSION = 1
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter on a bytearray, using double hashing over one blake2b digest."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, math.ceil(math.log2(1 / error_rate)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: bytes):
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def __contains__(self, item: bytes) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: bytes) -> bool:
+        """Add `item`; returns False if it was (probably) already present."""
+        bits = self._bits
+        new = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def copy(self) -> "BloomFilter":
+        clone = copy.copy(self)
+        clone._bits = bytearray(self._bits)     # one memcpy
+        return clone
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows instead of degrading: once a slice reaches capacity,
+    a new slice with `growth`x the capacity and a tighter error rate is added, so
+    the overall false-positive rate stays under `error_rate` however many items
+    arrive. The headroom and tighter slices cost about twice a single fixed-size
+    filter (~1.44 * log2(1/error_rate) bits per item, 180 MB for 100M URLs at 0.1%):
+    with the defaults, 100M URLs fill 7 slices and take about 367 MB — versus
+    several GB for a set of URL strings.
+
+    A false positive means a never-seen URL is treated as seen and skipped.
+    """
+
+    def __init__(self, initial_capacity: int = 1_000_000, error_rate: float = 0.001, growth: int = 2):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        # tightening ratio 0.5 — the per-slice error rates sum to at most error_rate
+        self._slices = [BloomFilter(initial_capacity, error_rate * 0.5)]
+
+    def __contains__(self, item: bytes) -> bool:
+        return any(item in bloom for bloom in self._slices)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self._slices)
+
+    def add(self, item: bytes) -> bool:
+        if item in self:
+            return False
+        current = self._slices[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * self.growth, current.error_rate * 0.5)
+            self._slices.append(current)
+        current.add(item)
+        return True
+
+    def copy(self) -> "ScalableBloomFilter":
+        """Independent copy — a memcpy per slice, cheap enough for the event loop."""
+        clone = copy.copy(self)
+        clone._slices = [bloom.copy() for bloom in self._slices]
+        return clone
+
+    @property
+    def nbytes(self) -> int:
+        return sum(bloom.nbytes for bloom in self._slices)
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+def write_checkpoint(state: dict, path: str) -> None:
+    """Pickle a `Frontier.snapshot()` to `path`, atomically. Blocking."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+class Frontier:
+    """
+    URL frontier: URLs are deduplicated against a Bloom filter (by normalized URL)
+    and queued per host — FIFO within a priority level, lower priority first.
+    Hosts are scheduled by the time they are next allowed a fetch: at most one
+    request in flight per host, and `host_delay` seconds between fetches.
+
+    Synchronous and event-loop only; `crawl_frontier` drives it with crawl().
+    """
+
+    def __init__(
+        self,
+        host_delay: float = FRONTIER_HOST_DELAY,
+        seen: Optional[ScalableBloomFilter] = None,
+        max_tracked_hosts: int = 100_000,
+    ):
+        self.host_delay = host_delay
+        self.seen = seen if seen is not None else ScalableBloomFilter()
+        self.max_tracked_hosts = max_tracked_hosts
+        self._seq = itertools.count()
+        # host -> heap of (priority, seq, url)
+        self._queues: dict[str, list[tuple[int, int, str]]] = {}
+        # (ready_at, seq, host) for hosts with queued URLs and nothing in flight
+        self._ready: list[tuple[float, int, str]] = []
+        # host -> (priority, url) currently being crawled
+        self._in_flight: dict[str, tuple[int, str]] = {}
+        # host -> earliest next fetch, kept after its queue drains so a host that
+        # gets new URLs right away is still delayed; oldest dropped past the cap
+        self._next_allowed: OrderedDict[str, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def add(self, url: str, priority: int = 0) -> bool:
+        """Queue `url` unless it was seen before. Returns True if it was queued."""
+        if not self.seen.add(normalize_url(url).encode()):
+            return False
+        self._push(url, priority)
+        return True
+
+    def _push(self, url: str, priority: int) -> None:
+        host = _host(url)
+        queue = self._queues.get(host)
+        if queue is None:
+            queue = self._queues[host] = []
+            if host not in self._in_flight:
+                self._schedule(host)
+        heapq.heappush(queue, (priority, next(self._seq), url))
+
+    def _schedule(self, host: str) -> None:
+        ready_at = self._next_allowed.get(host, 0.0)
+        heapq.heappush(self._ready, (ready_at, next(self._seq), host))
+
+    def pop(self, now: Optional[float] = None) -> Optional[str]:
+        """Next URL whose host may be fetched now, or None. Call `done(url)` when finished."""
+        now = time.monotonic() if now is None else now
+        if not self._ready or self._ready[0][0] > now:
+            return None
+        _, _, host = heapq.heappop(self._ready)
+        queue = self._queues[host]
+        priority, _, url = heapq.heappop(queue)
+        if not queue:
+            del self._queues[host]
+        self._in_flight[host] = (priority, url)
+        return url
+
+    def done(self, url: str, now: Optional[float] = None) -> None:
+        """Release the host of a popped URL; its next URL becomes ready after host_delay."""
+        now = time.monotonic() if now is None else now
+        host = _host(url)
+        self._in_flight.pop(host, None)
+        self._next_allowed[host] = now + self.host_delay
+        self._next_allowed.move_to_end(host)
+        if len(self._next_allowed) > self.max_tracked_hosts:
+            self._next_allowed.popitem(last=False)
+        if host in self._queues:
+            self._schedule(host)
+
+    def next_ready_in(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until some host is ready (0 if one is now), None if nothing is queued."""
+        if not self._ready:
+            return None
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._ready[0][0] - now)
+
+    def is_exhausted(self) -> bool:
+        return not self._queues and not self._in_flight
+
+    # --- checkpointing ---
+
+    def snapshot(self) -> dict:
+        """
+        Checkpoint state: queued and in-flight URLs plus a copy of the seen-filter.
+        In-flight URLs are saved as queued, so a resumed crawl fetches them again.
+        Shares nothing with the live frontier, so it can be written from another thread.
+        """
+        pending = [(priority, url) for queue in self._queues.values() for priority, _, url in queue]
+        pending.extend(self._in_flight.values())
+        return {
+            "version": _CHECKPOINT_VERSION,
+            "host_delay": self.host_delay,
+            "pending": pending,
+            "seen": self.seen.copy(),
+        }
+
+    def checkpoint(self, path: str) -> None:
+        """Write `snapshot()` to `path`, atomically."""
+        write_checkpoint(self.snapshot(), path)
+
+    @classmethod
+    def restore(cls, path: str, **kwargs) -> "Frontier":
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != _CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported frontier checkpoint version: {state.get('version')}")
+        kwargs.setdefault("host_delay", state["host_delay"])
+        frontier = cls(seen=state["seen"], **kwargs)
+        for priority, url in state["pending"]:
+            frontier._push(url, priority)       # already in the seen-filter
+        return frontier
+
+
+async def crawl_frontier(
+    frontier: Frontier,
+    concurrency: int = FRONTIER_CONCURRENCY,
+    respect_robots: bool = True,
+    on_result: Optional[Callable[[CrawlResult], None]] = None,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_interval: float = 60.0,
+    crawl_fn: Optional[Callable[..., Awaitable[CrawlResult]]] = None,
+) -> AsyncIterator[CrawlResult]:
+    """
+    Crawl everything in `frontier` with at most `concurrency` crawls in flight,
+    yielding results as they complete. `on_result` runs before a URL's host is
+    released and may add new URLs (e.g. outlinks) to the frontier. With
+    `checkpoint_path`, the frontier is checkpointed every `checkpoint_interval` seconds
+    (snapshotted on the loop, pickled and written in the default executor).
+    `crawl_fn` replaces crawl() per URL.
+    """
+    pending: dict[asyncio.Task, str] = {}
+    last_checkpoint = time.monotonic()
+    writing: Optional[asyncio.Future] = None
+    crawl_fn = crawl_fn or crawl
+
+    def _fill() -> None:
+        while len(pending) < concurrency:
+            url = frontier.pop()
+            if url is None:
+                return
+            pending[asyncio.ensure_future(crawl_fn(url, respect_robots=respect_robots))] = url
+
+    try:
+        _fill()
+        while pending or not frontier.is_exhausted():
+            if not pending:
+                # every queued host is waiting out its delay
+                await asyncio.sleep(frontier.next_ready_in())
+                _fill()
+                continue
+            done, _ = await asyncio.wait(
+                pending, timeout=frontier.next_ready_in(), return_when=asyncio.FIRST_COMPLETED,
+            )
+            results = []
+            for task in done:
+                url = pending.pop(task)
+                result = task.result()
+                if on_result is not None:
+                    on_result(result)
+                frontier.done(url)
+                results.append(result)
+            _fill()
+            for result in results:
+                yield result
+            if checkpoint_path and time.monotonic() - last_checkpoint >= checkpoint_interval:
+                # one write at a time — a slow disk stretches the interval instead of piling up
+                if writing is None or writing.done():
+                    if writing is not None:
+                        writing.result()
+                    writing = asyncio.get_running_loop().run_in_executor(
+                        None, write_checkpoint, frontier.snapshot(), checkpoint_path,
+                    )
+                    last_checkpoint = time.monotonic()
+        if writing is not None:
+            await writing
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,45 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Prometheus metrics for the crawl pipeline. Observing is a few lock-guarded adds per
+# stage — text rendering only happens when /metrics is scraped.
+
+# sub-millisecond (classify) through multi-second (fetch, capped by DEFAULT_TIMEOUT)
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0,
+)
+
+STAGE_SECONDS = Histogram(
+    "crawler_stage_duration_seconds",
+    "Latency of each crawl pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+CRAWL_SECONDS = Histogram(
+    "crawler_crawl_duration_seconds",
+    "End-to-end crawl() latency per URL",
+    buckets=LATENCY_BUCKETS,
+)
+
+CRAWLS_IN_FLIGHT = Gauge(
+    "crawler_crawls_in_flight",
+    "crawl() calls currently running in this process",
+)
+
+URLS_PROCESSED = Counter(
+    "crawler_urls_processed_total",
+    "crawl() outcomes",
+    ["status"],     # success | robots_blocked | http_error | fetch_failed | parse_failed
+)
+
+RESULTS_STORED = Counter(
+    "crawler_results_stored_total",
+    "crawl() results written to the persistent result store",
+    ["outcome"],    # stored | dropped | failed
+)
+
+
+def stage_timer(stage: str):
+    """Context manager / decorator that records into crawler_stage_duration_seconds{stage=...}."""
+    return STAGE_SECONDS.labels(stage=stage).time()
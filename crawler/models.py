@@ -1,8 +1,11 @@
+import json
 from dataclasses import dataclass, field
 from typing import Optional
 
 
-@dataclass
+# slots drop the per-instance __dict__ — results are held in memory while in flight,
+# cached, and streamed, so the smaller footprint adds up
+@dataclass(slots=True)
 class CrawlResult:
     url: str
     final_url: str                      # may differ from input after redirects
@@ -33,6 +36,7 @@ class CrawlResult:
     h1_tags: list[str] = field(default_factory=list)
     h2_tags: list[str] = field(default_factory=list)
     body_text: Optional[str] = None         # cleaned plaintext of the page body
+    links: list[str] = field(default_factory=list)      # absolute outlinks, nofollow excluded
 
     # derived
     topics: list[str] = field(default_factory=list)     # top keywords / topics ranked by TF-IDF
@@ -43,4 +47,8 @@ class CrawlResult:
     error: Optional[str] = None
 
     def to_dict(self) -> dict:
-        return {k: v for k, v in self.__dict__.items()}
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_json(self) -> bytes:
+        """Encode straight to compact JSON bytes — the form cached in Redis and sent over HTTP."""
+        return json.dumps(self.to_dict(), separators=(",", ":"), ensure_ascii=False).encode()
@@ -0,0 +1,220 @@
+import heapq
+import logging
+import math
+import os
+import pickle
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from .models import CrawlResult
+from .results import content_hash
+from .urlnorm import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Adaptive recrawl: each page's change rate is estimated from successive crawls and
+# its next visit is scheduled to when it has probably changed, within bounds.
+RECRAWL_ENABLED = os.getenv("RECRAWL_ENABLED", "false").lower() in ("1", "true", "yes")
+RECRAWL_MIN_INTERVAL = float(os.getenv("RECRAWL_MIN_INTERVAL_SECONDS", "300"))
+RECRAWL_MAX_INTERVAL = float(os.getenv("RECRAWL_MAX_INTERVAL_SECONDS", str(7 * 24 * 3600)))
+RECRAWL_INITIAL_INTERVAL = float(os.getenv("RECRAWL_INITIAL_INTERVAL_SECONDS", "3600"))
+# revisit once the page has changed with this probability since the last crawl
+RECRAWL_CHANGE_PROBABILITY = float(os.getenv("RECRAWL_CHANGE_PROBABILITY", "0.5"))
+RECRAWL_MAX_URLS = int(os.getenv("RECRAWL_MAX_URLS", "1000000"))
+RECRAWL_STATE_PATH = os.getenv("RECRAWL_STATE_PATH", "")
+
+# weight kept by older observations at each new one, so the estimate follows
+# pages whose behaviour changes (~10 visits of memory)
+_HISTORY_DECAY = 0.9
+_CHECKPOINT_VERSION = 2
+
+
+def write_checkpoint(state: dict, path: str) -> None:
+    """Pickle a `RecrawlScheduler.snapshot()` to `path`, atomically. Blocking."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+@dataclass(slots=True)
+class PageState:
+    url: str
+    content_hash: Optional[str]
+    last_crawled: float
+    interval: float             # current revisit interval, seconds
+    next_due: float
+    visits: float = 0.0         # decayed count of observed revisit intervals
+    changes: float = 0.0        # decayed count of those in which the content changed
+    elapsed: float = 0.0        # decayed total length of those intervals, seconds
+
+
+def estimate_change_rate(visits: float, changes: float, elapsed: float) -> float:
+    """
+    Changes per second of a page modelled as a Poisson process, from `visits`
+    revisits spanning `elapsed` seconds, `changes` of which found new content.
+
+    A revisit only tells whether *at least one* change happened, so changes/elapsed
+    undercounts busy pages. This is Cho & Garcia-Molina's bias-reduced estimator,
+    -ln((n - X + 0.5) / (n + 0.5)) / mean interval, which corrects for that.
+    """
+    if visits <= 0 or elapsed <= 0:
+        return 0.0
+    return -math.log((visits - changes + 0.5) / (visits + 0.5)) / (elapsed / visits)
+
+
+class RecrawlScheduler:
+    """
+    Tracks a content hash per URL and schedules each URL's next crawl.
+
+    With change rate λ, the content has changed by time t with probability
+    1 - e^(-λt); the next visit is the t where that reaches `change_probability`,
+    clamped to [min_interval, max_interval]. A page never seen to change backs off
+    by doubling its interval. Due URLs come out of a heap keyed by due time
+    (stale heap entries are skipped lazily).
+
+    Synchronous and event-loop only, like Frontier.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = RECRAWL_MIN_INTERVAL,
+        max_interval: float = RECRAWL_MAX_INTERVAL,
+        initial_interval: float = RECRAWL_INITIAL_INTERVAL,
+        change_probability: float = RECRAWL_CHANGE_PROBABILITY,
+        max_urls: int = RECRAWL_MAX_URLS,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        self.change_probability = change_probability
+        self.max_urls = max_urls
+        self._pages: dict[str, PageState] = {}              # normalized url -> state
+        self._due: list[tuple[float, str]] = []             # (next_due, normalized url)
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def next_interval(self, state: PageState) -> float:
+        rate = estimate_change_rate(state.visits, state.changes, state.elapsed)
+        if rate <= 0:
+            return self._clamp(state.interval * 2)
+        return self._clamp(-math.log(1.0 - self.change_probability) / rate)
+
+    def _schedule(self, key: str, state: PageState, due: float) -> None:
+        state.next_due = due
+        heapq.heappush(self._due, (due, key))
+        if len(self._due) > 2 * len(self._pages) + 1024:
+            # drop superseded entries before they pile up
+            self._due = [(s.next_due, k) for k, s in self._pages.items()]
+            heapq.heapify(self._due)
+
+    def observe(self, result: CrawlResult, now: Optional[float] = None) -> Optional[PageState]:
+        """Record a crawl of `result.url` and reschedule it. Failed crawls only reschedule known URLs."""
+        now = time.time() if now is None else now
+        key = normalize_url(result.url)
+        state = self._pages.get(key)
+
+        if result.status_code != 200 or result.error:
+            if state is not None:
+                self._schedule(key, state, now + state.interval)    # try again at the usual pace
+            return state
+
+        digest = content_hash(result)
+        if state is None:
+            if len(self._pages) >= self.max_urls:
+                return None
+            state = self._pages[key] = PageState(
+                url=result.url, content_hash=digest, last_crawled=now,
+                interval=self._clamp(self.initial_interval), next_due=now,
+            )
+            self._schedule(key, state, now + state.interval)
+            return state
+
+        elapsed = now - state.last_crawled
+        if elapsed > 0:
+            changed = digest != state.content_hash
+            state.visits = state.visits * _HISTORY_DECAY + 1
+            state.changes = state.changes * _HISTORY_DECAY + changed
+            state.elapsed = state.elapsed * _HISTORY_DECAY + elapsed
+            state.interval = self.next_interval(state)
+        state.content_hash = digest
+        state.last_crawled = now
+        self._schedule(key, state, now + state.interval)
+        return state
+
+    def pop_due(self, now: Optional[float] = None, limit: int = 100) -> list[str]:
+        """
+        Up to `limit` URLs due for a recrawl. Each is leased for min_interval: if its
+        crawl never reports back through observe(), it comes due again after that.
+        """
+        now = time.time() if now is None else now
+        urls = []
+        while self._due and self._due[0][0] <= now and len(urls) < limit:
+            due, key = heapq.heappop(self._due)
+            state = self._pages.get(key)
+            if state is None or state.next_due != due:
+                continue        # superseded by a later observe()
+            urls.append(state.url)
+            self._schedule(key, state, now + self.min_interval)
+        return urls
+
+    def interval(self, url: str) -> Optional[float]:
+        """Current revisit interval of `url` in seconds, or None if it isn't tracked."""
+        state = self._pages.get(normalize_url(url))
+        return state.interval if state is not None else None
+
+    def forget(self, url: str) -> None:
+        self._pages.pop(normalize_url(url), None)
+
+    # --- checkpointing ---
+
+    def snapshot(self) -> dict:
+        """
+        Checkpoint state: every URL's PageState, flattened to a tuple of its fields.
+        PageStates are updated in place, so they are copied — as plain tuples, which
+        is far cheaper than pickling them. Shares nothing with the live scheduler,
+        so it can be written from another thread.
+        """
+        pages = [
+            (key, s.url, s.content_hash, s.last_crawled, s.interval, s.next_due, s.visits, s.changes, s.elapsed)
+            for key, s in self._pages.items()
+        ]
+        return {"version": _CHECKPOINT_VERSION, "pages": pages}
+
+    def checkpoint(self, path: str) -> None:
+        """Write `snapshot()` to `path`, atomically."""
+        write_checkpoint(self.snapshot(), path)
+
+    @classmethod
+    def restore(cls, path: str, **kwargs) -> "RecrawlScheduler":
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.get("version") != _CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported recrawl checkpoint version: {state.get('version')}")
+        scheduler = cls(**kwargs)
+        scheduler._pages = {key: PageState(*fields) for key, *fields in state["pages"]}
+        scheduler._due = [(page.next_due, key) for key, page in scheduler._pages.items()]
+        heapq.heapify(scheduler._due)
+        return scheduler
+
+
+_default_scheduler: Optional[RecrawlScheduler] = None
+
+
+def default_scheduler() -> Optional[RecrawlScheduler]:
+    """The process-wide scheduler fed by crawl(), restored from RECRAWL_STATE_PATH if present; None if disabled."""
+    global _default_scheduler
+    if _default_scheduler is None and RECRAWL_ENABLED:
+        _default_scheduler = RecrawlScheduler()
+        if RECRAWL_STATE_PATH and os.path.exists(RECRAWL_STATE_PATH):
+            try:
+                _default_scheduler = RecrawlScheduler.restore(RECRAWL_STATE_PATH)
+                logger.info("Restored recrawl state: %d URLs", len(_default_scheduler))
+            except Exception as exc:
+                logger.error("Could not restore recrawl state from %s: %s", RECRAWL_STATE_PATH, exc)
+    return _default_scheduler
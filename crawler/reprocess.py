@@ -0,0 +1,79 @@
+"""
+Rerun parse -> extract -> classify over the raw HTML store, with no network I/O.
+
+    python -m crawler.reprocess --store data/raw --out results.jsonl --workers 8
+
+Pages are spread across worker processes, so parser / extractor / classifier
+changes can be applied to everything already fetched at CPU speed. Output is one
+CrawlResult JSON object per line, in completion order.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from multiprocessing import Pool
+from typing import Iterator
+
+from .core import process_html
+from .models import CrawlResult
+from .store import RAW_STORE_DIR, Location, RawStore, load_page
+
+logger = logging.getLogger(__name__)
+
+_Task = tuple[str, str, Location, Location, float]     # store root, url, record, payload record, fetch time
+
+
+def reprocess_record(task: _Task) -> bytes:
+    """Parse and extract one stored page; runs in a worker process."""
+    root, url, location, payload, fetched_at = task
+    try:
+        page = load_page(root, url, location, payload, fetched_at)
+    except Exception as exc:
+        return CrawlResult(url=url, final_url=url, status_code=0, error=f"unreadable record: {exc}").to_json()
+    return process_html(url, page.html, page.status_code, page.final_url).to_json()
+
+
+def _tasks(store: RawStore) -> Iterator[_Task]:
+    for entry in store.entries():
+        yield store.root, entry.url, entry.location, entry.payload, entry.fetched_at
+
+
+def reprocess(store: RawStore, out, workers: int, chunksize: int = 8) -> int:
+    """Write a fresh CrawlResult line to `out` for every stored URL. Returns the count."""
+    count = 0
+    with Pool(processes=workers) as pool:
+        for line in pool.imap_unordered(reprocess_record, _tasks(store), chunksize=chunksize):
+            out.write(line + b"\n")
+            count += 1
+    return count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--store", default=RAW_STORE_DIR, help="raw store directory (default: $RAW_STORE_DIR)")
+    parser.add_argument("--out", default="-", help="output JSONL path, - for stdout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunksize", type=int, default=8, help="pages handed to a worker at a time")
+    args = parser.parse_args(argv)
+    if not args.store:
+        parser.error("no store given — pass --store or set RAW_STORE_DIR")
+
+    store = RawStore(args.store)
+    start = time.perf_counter()
+    if args.out == "-":
+        count = reprocess(store, sys.stdout.buffer, args.workers, args.chunksize)
+    else:
+        with open(args.out, "wb") as out:
+            count = reprocess(store, out, args.workers, args.chunksize)
+    elapsed = time.perf_counter() - start
+    print(
+        f"reprocessed {count} pages in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.1f} pages/s, "
+        f"{args.workers} workers)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+from .metrics import RESULTS_STORED
+from .models import CrawlResult
+
+logger = logging.getLogger(__name__)
+
+# Persistent result store: every crawl() outcome is upserted into SQLite so results
+# can be queried after their cache entries expire. Unset RESULT_DB_PATH disables it.
+RESULT_DB_PATH = os.getenv("RESULT_DB_PATH", "")
+RESULT_BATCH_SIZE = int(os.getenv("RESULT_BATCH_SIZE", "2000"))
+RESULT_FLUSH_SECONDS = float(os.getenv("RESULT_FLUSH_SECONDS", "1.0"))
+RESULT_QUEUE_MAX = int(os.getenv("RESULT_QUEUE_MAX", "10000"))
+
+# SQLite (3.24+ for ON CONFLICT upserts). The DDL and upsert avoid SQLite-only
+# types, so they port to PostgreSQL with `result` as JSONB — but the statements
+# use sqlite3's `?` placeholders, and a Postgres driver (psycopg: `%s`) needs them
+# rewritten; the PRAGMAs and the ALTER TABLE migration below are SQLite-only too.
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS crawl_results (
+        url           TEXT PRIMARY KEY,
+        host          TEXT NOT NULL,
+        final_url     TEXT NOT NULL,
+        status_code   INTEGER NOT NULL,
+        page_type     TEXT NOT NULL,
+        title         TEXT,
+        content_hash  TEXT,
+        error         TEXT,
+        crawled_at    DOUBLE PRECISION NOT NULL,
+        result        TEXT NOT NULL,
+        succeeded_at  DOUBLE PRECISION
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_crawl_results_host ON crawl_results (host)",
+    "CREATE INDEX IF NOT EXISTS ix_crawl_results_page_type ON crawl_results (page_type)",
+    "CREATE INDEX IF NOT EXISTS ix_crawl_results_crawled_at ON crawl_results (crawled_at)",
+    "CREATE INDEX IF NOT EXISTS ix_crawl_results_content_hash ON crawl_results (content_hash)",
+)
+
+_COLUMNS = (
+    "url", "host", "final_url", "status_code", "page_type", "title", "content_hash", "error", "crawled_at", "result",
+    "succeeded_at",
+)
+
+# succeeded_at survives a failed recrawl — it is the last 200 with no error, not the last attempt
+_UPSERT = (
+    f"INSERT INTO crawl_results ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))}) "
+    "ON CONFLICT (url) DO UPDATE SET "
+    + ", ".join(f"{col} = excluded.{col}" for col in _COLUMNS[1:-1])
+    + ", succeeded_at = COALESCE(excluded.succeeded_at, crawl_results.succeeded_at)"
+)
+
+
+def content_hash(result: CrawlResult) -> Optional[str]:
+    """sha256 of the cleaned body text — equal hashes mean the page content didn't change."""
+    if result.body_text is None:
+        return None
+    return hashlib.sha256(result.body_text.encode("utf-8")).hexdigest()
+
+
+def _row(result: CrawlResult, crawled_at: float) -> tuple:
+    return (
+        result.url,
+        (urlsplit(result.url).hostname or "").lower(),
+        result.final_url,
+        result.status_code,
+        result.page_type,
+        result.title,
+        content_hash(result),
+        result.error,
+        crawled_at,
+        # same encoding as CrawlResult.to_json(), but straight to str for the TEXT column
+        json.dumps(result.to_dict(), separators=(",", ":"), ensure_ascii=False),
+        crawled_at if result.status_code == 200 and not result.error else None,
+    )
+
+
+class ResultStore:
+    """
+    SQLite table of the latest CrawlResult per URL, indexed for the usual queries
+    (by host, page type, crawl time, content hash). Writes are batched: one
+    transaction and one executemany per upsert_many() call.
+
+    Safe for threads within one process (calls are serialized).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            # WAL lets readers query while the sink writes; NORMAL syncs at checkpoints only
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+            # tables created before succeeded_at existed
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(crawl_results)")}
+            if "succeeded_at" not in columns:
+                self._conn.execute("ALTER TABLE crawl_results ADD COLUMN succeeded_at DOUBLE PRECISION")
+
+    def upsert_many(self, results: Iterable[CrawlResult], crawled_at: Optional[float] = None) -> int:
+        """Insert or replace (by URL) a batch of results in one transaction. Returns the row count."""
+        crawled_at = time.time() if crawled_at is None else crawled_at
+        rows = [_row(result, crawled_at) for result in results]
+        self._upsert_rows(rows)
+        return len(rows)
+
+    def _upsert_rows(self, rows: list[tuple]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT, rows)
+
+    def get(self, url: str) -> Optional[CrawlResult]:
+        with self._lock:
+            row = self._conn.execute("SELECT result FROM crawl_results WHERE url = ?", (url,)).fetchone()
+        return CrawlResult(**json.loads(row[0])) if row else None
+
+    def crawled_at(self, url: str) -> Optional[float]:
+        """When `url` was last crawled (epoch seconds), or None if never."""
+        with self._lock:
+            row = self._conn.execute("SELECT crawled_at FROM crawl_results WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def succeeded_at(self, url: str) -> Optional[float]:
+        """When `url` was last crawled with a 200 and no error (epoch seconds), or None if never."""
+        with self._lock:
+            row = self._conn.execute("SELECT succeeded_at FROM crawl_results WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def query(
+        self,
+        host: Optional[str] = None,
+        page_type: Optional[str] = None,
+        since: Optional[float] = None,
+        content_hash: Optional[str] = None,
+        limit: int = 100,
+    ) -> list[CrawlResult]:
+        """Latest results matching every given filter, most recently crawled first."""
+        clauses, params = [], []
+        for column, value in (("host", host), ("page_type", page_type), ("content_hash", content_hash)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("crawled_at >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        sql = f"SELECT result FROM crawl_results {where}ORDER BY crawled_at DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*params, limit)).fetchall()
+        return [CrawlResult(**json.loads(row[0])) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM crawl_results").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_STOP = object()
+
+
+class ResultSink:
+    """
+    Feeds a ResultStore from a background thread so the crawl path never waits on
+    disk. submit() is a non-blocking enqueue; the writer flushes every `batch_size`
+    results or `flush_interval` seconds, whichever comes first. If the writer falls
+    `max_queue` results behind, new results are dropped (and counted) rather than
+    buffered without bound.
+    """
+
+    def __init__(
+        self,
+        store: ResultStore,
+        batch_size: int = RESULT_BATCH_SIZE,
+        flush_interval: float = RESULT_FLUSH_SECONDS,
+        max_queue: int = RESULT_QUEUE_MAX,
+    ):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="result-sink", daemon=True)
+        self._thread.start()
+
+    def submit(self, result: CrawlResult) -> bool:
+        try:
+            # hashing and JSON encoding happen on the writer thread, off the event loop
+            self._queue.put_nowait((result, time.time()))
+        except queue.Full:
+            RESULTS_STORED.labels(outcome="dropped").inc()
+            return False
+        return True
+
+    def _run(self) -> None:
+        while True:
+            batch: list[tuple[CrawlResult, float]] = []
+            deadline = time.monotonic() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                self._write(batch)
+            if stopping:
+                return
+
+    def _write(self, batch: list[tuple[CrawlResult, float]]) -> None:
+        try:
+            self.store._upsert_rows([_row(result, crawled_at) for result, crawled_at in batch])
+        except Exception as exc:
+            logger.error("Could not store %d results: %s", len(batch), exc)
+            RESULTS_STORED.labels(outcome="failed").inc(len(batch))
+            return
+        RESULTS_STORED.labels(outcome="stored").inc(len(batch))
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush everything submitted so far and stop the writer."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+
+_default_sink: Optional[ResultSink] = None
+
+
+def default_sink() -> Optional[ResultSink]:
+    """The sink writing to RESULT_DB_PATH, or None if the result store is off."""
+    global _default_sink
+    if _default_sink is None and RESULT_DB_PATH:
+        _default_sink = ResultSink(ResultStore(RESULT_DB_PATH))
+        atexit.register(_default_sink.close)
+    return _default_sink
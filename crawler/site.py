@@ -0,0 +1,66 @@
+import os
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import urlsplit
+
+from .frontier import FRONTIER_HOST_DELAY, Frontier, crawl_frontier
+from .models import CrawlResult
+
+# hard ceilings for a single site crawl, whatever the caller asks for
+SITE_CRAWL_MAX_DEPTH = int(os.getenv("SITE_CRAWL_MAX_DEPTH", "5"))
+SITE_CRAWL_MAX_PAGES = int(os.getenv("SITE_CRAWL_MAX_PAGES", "500"))
+
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+
+async def crawl_site(
+    seed: str,
+    max_depth: int = 2,
+    max_pages: int = 50,
+    max_hosts: int = 1,
+    concurrency: int = 8,
+    respect_robots: bool = True,
+    host_delay: float = FRONTIER_HOST_DELAY,
+    crawl_fn: Optional[Callable[..., Awaitable[CrawlResult]]] = None,
+) -> AsyncIterator[CrawlResult]:
+    """
+    Breadth-first crawl from `seed`, following outlinks up to `max_depth` hops and
+    `max_pages` pages in total. Links are only followed onto the first `max_hosts`
+    hosts discovered (1: stay on the seed's host). Results stream as pages complete.
+
+    Dedup, per-host politeness and concurrency come from crawler.frontier; robots.txt
+    is checked by crawl() for every page.
+    """
+    max_depth = min(max_depth, SITE_CRAWL_MAX_DEPTH)
+    max_pages = min(max_pages, SITE_CRAWL_MAX_PAGES)
+
+    frontier = Frontier(host_delay=host_delay)
+    hosts = {_host(seed)}
+    # depth of every queued URL, by the exact string given to crawl() (== result.url);
+    # depth doubles as frontier priority, so each host's queue drains shallowest first
+    depths = {seed: 0}
+    frontier.add(seed, priority=0)
+    scheduled = 1
+
+    def on_result(result: CrawlResult) -> None:
+        nonlocal scheduled
+        depth = depths.pop(result.url, max_depth)
+        if depth >= max_depth:
+            return
+        for link in result.links:
+            if scheduled >= max_pages:
+                return
+            host = _host(link)
+            if host not in hosts and len(hosts) >= max_hosts:
+                continue
+            # a host only counts toward max_hosts once one of its links is actually queued
+            if link not in depths and frontier.add(link, priority=depth + 1):
+                hosts.add(host)
+                depths[link] = depth + 1
+                scheduled += 1
+
+    async for result in crawl_frontier(
+        frontier, concurrency=concurrency, respect_robots=respect_robots, on_result=on_result, crawl_fn=crawl_fn,
+    ):
+        yield result
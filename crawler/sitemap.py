@@ -0,0 +1,233 @@
+import asyncio
+import gzip
+import heapq
+import logging
+import os
+from datetime import datetime, timezone
+from typing import IO, AsyncIterator, Awaitable, Callable, Iterator, NamedTuple, Optional
+
+import requests
+from lxml import etree
+
+from .fetcher import DEFAULT_TIMEOUT, USER_AGENT, _robots_url
+from .frontier import FRONTIER_HOST_DELAY, Frontier, crawl_frontier
+from .models import CrawlResult
+
+logger = logging.getLogger(__name__)
+
+# the sitemap protocol caps a file at 50k URLs / 50 MB uncompressed; the byte cap
+# also bounds what a gzip bomb can make us inflate
+SITEMAP_MAX_BYTES = int(os.getenv("SITEMAP_MAX_BYTES", str(50 * 1024 * 1024)))
+SITEMAP_MAX_DEPTH = int(os.getenv("SITEMAP_MAX_DEPTH", "3"))        # index -> index -> sitemap
+SITEMAP_MAX_URLS = int(os.getenv("SITEMAP_MAX_URLS", "1000000"))
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class SitemapEntry(NamedTuple):
+    loc: str
+    lastmod: Optional[float]        # epoch seconds; None if absent or unparseable
+    priority: Optional[float]       # 0.0 - 1.0 as published; None if absent
+    is_sitemap: bool                # True for <sitemap> entries of a sitemap index
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """W3C datetime (`2024-05-01`, `2024-05-01T12:00:00Z`, ...) to epoch seconds, UTC if no zone."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _priority(value: Optional[str]) -> Optional[float]:
+    try:
+        return min(max(float(value), 0.0), 1.0) if value else None
+    except ValueError:
+        return None
+
+
+class _Prepend:
+    """Put already-sniffed bytes back in front of a stream."""
+
+    def __init__(self, head: bytes, raw: IO[bytes]):
+        self.head = head
+        self.raw = raw
+
+    def read(self, size: int = -1) -> bytes:
+        if not self.head:
+            return self.raw.read(size)
+        if size < 0:
+            data, self.head = self.head + self.raw.read(), b""
+            return data
+        data, self.head = self.head[:size], self.head[size:]
+        if len(data) < size:
+            data += self.raw.read(size - len(data))
+        return data
+
+
+class _LimitedReader:
+    """File-like wrapper that refuses to read past `limit` bytes."""
+
+    def __init__(self, raw: IO[bytes], limit: int):
+        self.raw = raw
+        self.remaining = limit
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining + 1
+        data = self.raw.read(size)
+        self.remaining -= len(data)
+        if self.remaining < 0:
+            raise ValueError("sitemap exceeds SITEMAP_MAX_BYTES")
+        return data
+
+
+def parse_sitemap(source: IO[bytes], max_bytes: int = SITEMAP_MAX_BYTES) -> Iterator[SitemapEntry]:
+    """
+    Stream entries out of a urlset or sitemapindex document, gzipped or not.
+
+    Elements are cleared as soon as they are read, so memory stays flat however
+    many URLs the file holds.
+    """
+    head = source.read(2)
+    if head == _GZIP_MAGIC:
+        source = gzip.GzipFile(fileobj=_Prepend(head, source))
+        head = b""
+    reader = _LimitedReader(_Prepend(head, source), max_bytes)
+    # no entity expansion, no DTD/network fetches — sitemaps are untrusted input
+    events = etree.iterparse(
+        reader, events=("end",), tag=("{*}url", "{*}sitemap"),
+        resolve_entities=False, no_network=True, load_dtd=False, huge_tree=False,
+    )
+    for _, element in events:
+        namespace = etree.QName(element).namespace
+        # own-namespace children only — image/video/news extensions have <loc>s of their own
+        fields = {
+            etree.QName(child).localname: (child.text or "").strip()
+            for child in element
+            if isinstance(child.tag, str) and etree.QName(child).namespace == namespace
+        }
+        loc = fields.get("loc")
+        if loc:
+            yield SitemapEntry(
+                loc=loc,
+                lastmod=parse_lastmod(fields.get("lastmod")),
+                priority=_priority(fields.get("priority")),
+                is_sitemap=etree.QName(element).localname == "sitemap",
+            )
+        # drop the element and every sibling already handled
+        element.clear(keep_tail=False)
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+
+def _get(url: str, stream: bool = False) -> requests.Response:
+    response = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=DEFAULT_TIMEOUT, stream=stream)
+    response.raise_for_status()
+    return response
+
+
+def discover_sitemaps(site_url: str) -> list[str]:
+    """Sitemaps declared by `Sitemap:` lines in the site's robots.txt, else the conventional /sitemap.xml."""
+    robots_url = _robots_url(site_url)
+    sitemaps = []
+    try:
+        for line in _get(robots_url).text.splitlines():
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "sitemap" and value.strip():
+                sitemaps.append(value.strip())
+    except requests.RequestException as exc:
+        logger.info("No robots.txt for %s: %s", site_url, exc)
+    return sitemaps or [robots_url[: -len("robots.txt")] + "sitemap.xml"]
+
+
+def iter_sitemap(url: str, depth: int = 0) -> Iterator[SitemapEntry]:
+    """Page entries of a sitemap, following sitemap indexes depth-first."""
+    try:
+        response = _get(url, stream=True)
+    except requests.RequestException as exc:
+        logger.warning("Could not fetch sitemap %s: %s", url, exc)
+        return
+    with response:
+        # undo transfer encoding (Content-Encoding: gzip) but leave .gz files for parse_sitemap
+        response.raw.decode_content = True
+        try:
+            for entry in parse_sitemap(response.raw):
+                if not entry.is_sitemap:
+                    yield entry
+                elif depth >= SITEMAP_MAX_DEPTH:
+                    logger.warning("Sitemap index nested too deep, skipping %s", entry.loc)
+                else:
+                    yield from iter_sitemap(entry.loc, depth + 1)
+        except (etree.XMLSyntaxError, OSError, ValueError) as exc:
+            logger.warning("Stopped reading sitemap %s: %s", url, exc)
+
+
+def _frontier_priority(priority: Optional[float]) -> int:
+    # frontier pops lower first; sitemap priority is 0-1, higher first, default 0.5
+    return round((1.0 - (0.5 if priority is None else priority)) * 10)
+
+
+def seed_frontier(
+    frontier: Frontier,
+    site_url: str,
+    last_crawled: Optional[Callable[[str], Optional[float]]] = None,
+    max_urls: int = SITEMAP_MAX_URLS,
+) -> tuple[int, int]:
+    """
+    Add the `max_urls` highest-priority URLs in the site's sitemaps to `frontier`
+    (document order among equals). URLs whose <lastmod> is not after
+    `last_crawled(url)` are skipped as unchanged. Blocking; returns (added, skipped).
+    """
+    # bounded min-heap of (priority, -seq, loc): its root is the entry to drop next
+    best: list[tuple[float, int, str]] = []
+    kept: set[str] = set()
+    skipped = 0
+    seq = 0
+    for sitemap_url in discover_sitemaps(site_url):
+        for entry in iter_sitemap(sitemap_url):
+            if entry.loc in kept:
+                continue
+            crawled_at = last_crawled(entry.loc) if last_crawled is not None else None
+            if crawled_at is not None and entry.lastmod is not None and entry.lastmod <= crawled_at:
+                skipped += 1
+                continue
+            seq += 1
+            item = (0.5 if entry.priority is None else entry.priority, -seq, entry.loc)
+            if len(best) < max_urls:
+                heapq.heappush(best, item)
+                kept.add(entry.loc)
+            elif max_urls > 0 and item > best[0]:
+                kept.discard(heapq.heapreplace(best, item)[2])
+                kept.add(entry.loc)
+
+    added = 0
+    for priority, _, loc in sorted(best, reverse=True):
+        if frontier.add(loc, priority=_frontier_priority(priority)):
+            added += 1
+    return added, skipped
+
+
+async def crawl_sitemaps(
+    site_url: str,
+    max_pages: int = 50,
+    concurrency: int = 8,
+    respect_robots: bool = True,
+    last_crawled: Optional[Callable[[str], Optional[float]]] = None,
+    host_delay: float = FRONTIER_HOST_DELAY,
+    crawl_fn: Optional[Callable[..., Awaitable[CrawlResult]]] = None,
+) -> AsyncIterator[CrawlResult]:
+    """Crawl up to `max_pages` URLs from the site's sitemaps, highest priority first."""
+    frontier = Frontier(host_delay=host_delay)
+    loop = asyncio.get_running_loop()
+    added, skipped = await loop.run_in_executor(None, seed_frontier, frontier, site_url, last_crawled, max_pages)
+    logger.info("Seeded %d URLs from sitemaps of %s (%d unchanged, skipped)", added, site_url, skipped)
+    async for result in crawl_frontier(frontier, concurrency=concurrency, respect_robots=respect_robots, crawl_fn=crawl_fn):
+        yield result
@@ -0,0 +1,259 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterator, NamedTuple, Optional
+
+from .fetcher import FetchedPage
+
+logger = logging.getLogger(__name__)
+
+# Raw HTML store: every fetched page is kept on local disk so parsing / topic
+# extraction / classification can be rerun without refetching (crawler.reprocess).
+# Unset RAW_STORE_DIR disables archiving.
+RAW_STORE_DIR = os.getenv("RAW_STORE_DIR", "")
+SEGMENT_MAX_BYTES = int(os.getenv("RAW_STORE_SEGMENT_MAX_BYTES", str(256 * 1024 * 1024)))
+# body digests remembered for deduplication (~400 bytes each); a body whose digest
+# has been forgotten is simply stored again as a full response record
+MAX_DEDUP_DIGESTS = int(os.getenv("RAW_STORE_MAX_DEDUP_DIGESTS", "250000"))
+
+_INDEX_FILE = "index.cdx"
+_SEGMENT_DIR = "segments"
+
+
+class Location(NamedTuple):
+    segment: str
+    offset: int
+    length: int
+
+
+class IndexEntry(NamedTuple):
+    url: str
+    digest: str
+    location: Location      # this capture's own record (response, or revisit for a known body)
+    payload: Location       # the response record holding the body
+    fetched_at: float
+
+
+class StoredPage(NamedTuple):
+    url: str                # URL as requested
+    final_url: str
+    status_code: int
+    headers: dict[str, str]
+    html: str
+    digest: str             # sha256 of the body — the content address
+    fetched_at: float
+
+
+_REVISIT_PROFILE = "http://netpreserve.org/warc/1.0/revisit/identical-payload-digest"
+
+# describe the body as the origin sent it, not the decoded text we store — kept
+# under an X-Original- prefix so WARC tools don't try to un-gzip / re-frame it
+_TRANSFER_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+def _http_headers(page: FetchedPage, body: bytes, revisit: bool) -> str:
+    lines = []
+    for name, value in page.headers.items():
+        if name.lower() in _TRANSFER_HEADERS:
+            name = f"X-Original-{name}"
+        lines.append(f"{name}: {value}\r\n")
+    if not revisit:
+        lines.append(f"Content-Length: {len(body)}\r\n")
+    return "".join(lines)
+
+
+def _warc_record(url: str, page: FetchedPage, body: bytes, digest: str, fetched_at: float, revisit: bool = False) -> bytes:
+    # WARC/1.0 "response" record wrapping an HTTP response block. Bodies are stored
+    # as the decoded text re-encoded to UTF-8 (requests decodes before we see it),
+    # so the original Content-Type charset is kept only for reference. A "revisit"
+    # record carries this capture's status and headers but no body — the body is
+    # the earlier response record with the same payload digest. Content-Encoding,
+    # Content-Length and Transfer-Encoding are rewritten to match the stored body.
+    http_block = (
+        f"HTTP/1.1 {page.status_code}\r\n".encode()
+        + _http_headers(page, body, revisit).encode("utf-8", "replace")
+        + b"\r\n"
+        + (b"" if revisit else body)
+    )
+    date = datetime.fromtimestamp(fetched_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    header = (
+        "WARC/1.0\r\n"
+        + ("WARC-Type: revisit\r\n" f"WARC-Profile: {_REVISIT_PROFILE}\r\n" if revisit else "WARC-Type: response\r\n")
+        + f"WARC-Target-URI: {url}\r\n"
+        f"X-Final-URI: {page.final_url}\r\n"
+        f"WARC-Date: {date}\r\n"
+        f"WARC-Payload-Digest: sha256:{digest}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(http_block)}\r\n"
+        "\r\n"
+    ).encode()
+    return header + http_block + b"\r\n\r\n"
+
+
+def _parse_headers(block: bytes) -> tuple[str, dict[str, str]]:
+    first, *lines = block.decode("utf-8", "replace").split("\r\n")
+    headers = {}
+    for line in lines:
+        name, _, value = line.partition(": ")
+        headers[name] = value
+    return first, headers
+
+
+def parse_record(data: bytes, fetched_at: float = 0.0) -> StoredPage:
+    """Decode one decompressed WARC record written by RawStore."""
+    warc_head, _, rest = data.partition(b"\r\n\r\n")
+    _, warc = _parse_headers(warc_head)
+    http_block = rest[: int(warc["Content-Length"])]
+    http_head, _, body = http_block.partition(b"\r\n\r\n")
+    status_line, headers = _parse_headers(http_head)
+    return StoredPage(
+        url=warc["WARC-Target-URI"],
+        final_url=warc["X-Final-URI"],
+        status_code=int(status_line.split()[1]),
+        headers=headers,
+        html=body.decode("utf-8"),
+        digest=warc["WARC-Payload-Digest"].partition(":")[2],
+        fetched_at=fetched_at,
+    )
+
+
+def read_record(root: str, location: Location) -> bytes:
+    with open(os.path.join(root, _SEGMENT_DIR, location.segment), "rb") as f:
+        f.seek(location.offset)
+        return gzip.decompress(f.read(location.length))
+
+
+def load_page(root: str, url: str, location: Location, payload: Location, fetched_at: float = 0.0) -> StoredPage:
+    """One capture of `url`: its own record's URL, status and headers, with the body from `payload`."""
+    page = parse_record(read_record(root, location), fetched_at)
+    if payload != location:
+        page = page._replace(html=parse_record(read_record(root, payload)).html)
+    # captures indexed before revisit records point straight at another URL's response
+    return page._replace(url=url) if page.url != url else page
+
+
+class RawStore:
+    """
+    Append-only, content-addressed store of fetched pages.
+
+    Each record is a WARC-style response (or revisit) record compressed as its own
+    gzip member, appended to a segment file under `segments/` (rolled at
+    SEGMENT_MAX_BYTES), so any record can be read from its (segment, offset, length) alone — and the
+    segments stay readable by standard WARC tools. `index.cdx` is an append-only
+    text index, one line per capture: url, body sha256, location, fetch time and
+    the location of the record holding the body.
+
+    Bodies are addressed by sha256: a page whose body was already stored (the same
+    page under another URL, or unchanged on recrawl) gets a small "revisit" record
+    with its own URL, final URL, status and headers, pointing at the existing
+    body by digest. Only the `max_digests` most recently stored bodies are kept in
+    memory for that; lookups by URL (`get`, `entries`) read index.cdx on demand, so
+    memory stays bounded however many pages are archived.
+
+    Safe for threads within one process; use one writing process per store.
+    """
+
+    def __init__(self, root: str, segment_max_bytes: int = SEGMENT_MAX_BYTES, max_digests: int = MAX_DEDUP_DIGESTS):
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self.max_digests = max_digests
+        os.makedirs(os.path.join(root, _SEGMENT_DIR), exist_ok=True)
+        self._lock = threading.Lock()
+        self._by_digest: OrderedDict[str, Location] = OrderedDict()     # LRU: digest -> response record
+        for entry in self._scan_index():
+            self._remember(entry.digest, entry.payload)
+        self._segment = self._last_segment()
+
+    def _scan_index(self) -> Iterator[IndexEntry]:
+        """Every capture in index.cdx, oldest first."""
+        path = os.path.join(self.root, _INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        legacy_payloads: dict[str, Location] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break       # a capture still being appended
+                url, digest, segment, offset, length, fetched_at, *payload = line.rstrip("\n").split("\t")
+                location = Location(segment, int(offset), int(length))
+                if payload:
+                    payload = Location(payload[0], int(payload[1]), int(payload[2]))
+                else:
+                    # lines written before the payload column: a digest's first capture is its response record
+                    payload = legacy_payloads.setdefault(digest, location)
+                yield IndexEntry(url, digest, location, payload, float(fetched_at))
+
+    def _remember(self, digest: str, payload: Location) -> None:
+        self._by_digest[digest] = payload
+        self._by_digest.move_to_end(digest)
+        if len(self._by_digest) > self.max_digests:
+            self._by_digest.popitem(last=False)
+
+    def _last_segment(self) -> str:
+        segments = sorted(os.listdir(os.path.join(self.root, _SEGMENT_DIR)))
+        return segments[-1] if segments else "00000.warc.gz"
+
+    def __len__(self) -> int:
+        """Number of stored URLs. Reads the whole index."""
+        return len({entry.url for entry in self._scan_index()})
+
+    def put(self, url: str, page: FetchedPage, fetched_at: Optional[float] = None) -> str:
+        """Archive a fetched page; returns its content digest."""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        body = page.html.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            payload = self._by_digest.get(digest)
+            revisit = payload is not None
+            location = self._append(gzip.compress(_warc_record(url, page, body, digest, fetched_at, revisit), 6))
+            if not revisit:
+                payload = location
+            self._remember(digest, payload)
+            # index after the record is on disk — a crash leaves unindexed bytes, never a dangling entry
+            with open(os.path.join(self.root, _INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write(
+                    f"{url}\t{digest}\t{location.segment}\t{location.offset}\t{location.length}\t{fetched_at:.3f}"
+                    f"\t{payload.segment}\t{payload.offset}\t{payload.length}\n"
+                )
+        return digest
+
+    def _append(self, record: bytes) -> Location:
+        path = os.path.join(self.root, _SEGMENT_DIR, self._segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_max_bytes:
+            self._segment = f"{int(self._segment.split('.')[0]) + 1:05d}.warc.gz"
+            path = os.path.join(self.root, _SEGMENT_DIR, self._segment)
+        with open(path, "ab") as f:
+            offset = f.tell()
+            f.write(record)
+        return Location(self._segment, offset, len(record))
+
+    def get(self, url: str) -> Optional[StoredPage]:
+        """Latest stored capture of `url`, or None. Scans the index — meant for offline use."""
+        entry = None
+        for candidate in self._scan_index():
+            if candidate.url == url:
+                entry = candidate
+        if entry is None:
+            return None
+        return load_page(self.root, url, entry.location, entry.payload, entry.fetched_at)
+
+    def entries(self) -> Iterator[IndexEntry]:
+        """Latest capture of every stored URL, rebuilt from the index."""
+        latest = {entry.url: entry for entry in self._scan_index()}
+        return iter(latest.values())
+
+
+_default_store: Optional[RawStore] = None
+
+
+def default_store() -> Optional[RawStore]:
+    """The store under RAW_STORE_DIR, or None if archiving is off."""
+    global _default_store
+    if _default_store is None and RAW_STORE_DIR:
+        _default_store = RawStore(RAW_STORE_DIR)
+    return _default_store
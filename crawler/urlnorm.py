@@ -0,0 +1,91 @@
+import os
+import re
+from dataclasses import dataclass, field
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# query params that never change page content — analytics / referral tracking
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "mc_cid", "mc_eid",
+    "ref", "ref_", "referrer",
+    "qid", "sr",            # Amazon search position / timestamp
+    "_ga", "_gl", "igshid",
+})
+TRACKING_PARAM_PREFIXES = ("utm_", "pd_rd_", "pf_rd_")
+
+# extra params to strip, comma separated (e.g. "sessionid,spm")
+_EXTRA_TRACKING_PARAMS = frozenset(
+    p.strip().lower() for p in os.getenv("URL_NORMALIZE_EXTRA_TRACKING_PARAMS", "").split(",") if p.strip()
+)
+
+# trailing path segments that are tracking, not content (Amazon's /dp/ID/ref=sr_1_1)
+_TRACKING_PATH_RE = re.compile(r"/ref=[^/]*$")
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+@dataclass(frozen=True)
+class NormalizeOptions:
+    unify_scheme: bool = True               # http and https map to the same key
+    strip_www: bool = False                 # www.example.com == example.com (off: not always true)
+    strip_trailing_slash: bool = True       # /path/ == /path (root "/" is kept)
+    sort_query: bool = True
+    strip_tracking: bool = True
+    extra_tracking_params: frozenset = field(default_factory=lambda: _EXTRA_TRACKING_PARAMS)
+
+
+DEFAULT_OPTIONS = NormalizeOptions()
+
+
+def _is_tracking(name: str, options: NormalizeOptions) -> bool:
+    name = name.lower()
+    return (
+        name in TRACKING_PARAMS
+        or name in options.extra_tracking_params
+        or name.startswith(TRACKING_PARAM_PREFIXES)
+    )
+
+
+def normalize_url(url: str, options: NormalizeOptions = DEFAULT_OPTIONS) -> str:
+    """
+    Canonical form of a URL for cache keys and dedup — not for fetching.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking params,
+    sorts the query and (by default) folds http/https and trailing slashes, so
+    trivially different spellings of the same page share one key.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if options.strip_www and host.startswith("www."):
+        host = host[4:]
+
+    try:
+        port = parts.port
+    except ValueError:      # non-numeric / out-of-range port — leave it out of the key
+        port = None
+
+    netloc = f"[{host}]" if ":" in host else host    # IPv6 literal
+    if port and port != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+
+    path = parts.path or "/"
+    if options.strip_tracking:
+        path = _TRACKING_PATH_RE.sub("", path) or "/"
+    if options.strip_trailing_slash and len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = parts.query
+    if query and (options.strip_tracking or options.sort_query):
+        params = parse_qsl(query, keep_blank_values=True)
+        if options.strip_tracking:
+            params = [(k, v) for k, v in params if not _is_tracking(k, options)]
+        if options.sort_query:
+            params.sort()
+        query = urlencode(params)
+
+    if options.unify_scheme and scheme in _DEFAULT_PORTS:
+        scheme = "https"
+    return urlunsplit((scheme, netloc, path, query, ""))
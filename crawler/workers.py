@@ -0,0 +1,350 @@
+"""
+Fetch/parse worker runtime: N async fetch workers and M CPU parse workers joined by queues.
+
+    python -m crawler.workers urls.txt --fetch-workers 32 --parse-workers 4 --backend multiprocessing
+
+Fetching is I/O-bound and parsing CPU-bound, so they scale separately: fetch
+workers are asyncio tasks in this process; parse workers are processes (threads
+with the in-process backend). URL -> fetch queue -> parse queue -> result queue.
+Every message is acked only after its output is queued, so a crash means
+redelivery, not loss (at-least-once). Results are deduplicated by message id
+before they are emitted.
+
+Message ids are prefixed with the submitting runtime's run id. With the redis
+backend the result queue is shared, so a run with an input file emits (and
+counts) only its own results and hands the rest back; a consumer (no input)
+emits anything except results of a run that is still waiting for them.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+from .core import fetch_failure_result, process_html
+from .fetcher import fetch_response
+from .queues import LocalQueue, MultiprocessingQueues, RedisQueue
+
+logger = logging.getLogger(__name__)
+
+WORKER_BACKEND = os.getenv("WORKER_BACKEND", "local")      # local | multiprocessing | redis
+WORKER_FETCH_CONCURRENCY = int(os.getenv("WORKER_FETCH_CONCURRENCY", "32"))
+WORKER_PARSE_PROCESSES = int(os.getenv("WORKER_PARSE_PROCESSES", str(os.cpu_count() or 1)))
+WORKER_VISIBILITY_TIMEOUT = float(os.getenv("WORKER_VISIBILITY_TIMEOUT_SECONDS", "300"))
+WORKER_REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+# result ids a consumer remembers for dedup — redeliveries arrive within minutes, not forever
+WORKER_DEDUP_WINDOW = int(os.getenv("WORKER_DEDUP_WINDOW", "100000"))
+
+_POLL = 0.2     # seconds a worker blocks on an empty queue before re-checking for shutdown
+
+STAGES = ("fetched", "fetch_failed", "parsed", "emitted", "duplicates", "redelivered", "handed_back")
+
+
+class StageCounters:
+    """Per-stage counters shared with parse worker processes (multiprocessing.Value)."""
+
+    def __init__(self):
+        self._values = {name: multiprocessing.Value("Q", 0) for name in STAGES}
+
+    def incr(self, name: str, n: int = 1) -> None:
+        value = self._values[name]
+        with value.get_lock():
+            value.value += n
+
+    def snapshot(self) -> dict[str, int]:
+        return {name: value.value for name, value in self._values.items()}
+
+
+def _parse_loop(parse_q, result_q, stop, counters: StageCounters) -> None:
+    """Parse worker body — runs in its own process (or thread for the local backend)."""
+    while True:
+        message = parse_q.get(_POLL)
+        if message is None:
+            if stop.is_set():
+                return
+            continue
+        item = json.loads(message.body)
+        result = process_html(item["url"], item["html"], item["status_code"], item["final_url"])
+        result_q.put(item["id"].encode() + b"\n" + result.to_json())
+        parse_q.ack(message)
+        counters.incr("parsed")
+
+
+class WorkerRuntime:
+    def __init__(
+        self,
+        backend: str = WORKER_BACKEND,
+        fetch_workers: int = WORKER_FETCH_CONCURRENCY,
+        parse_workers: int = WORKER_PARSE_PROCESSES,
+        respect_robots: bool = True,
+        visibility_timeout: float = WORKER_VISIBILITY_TIMEOUT,
+        redis_url: str = WORKER_REDIS_URL,
+        queue_prefix: str = "crawler:workers",
+        dedup_window: int = WORKER_DEDUP_WINDOW,
+    ):
+        self.backend = backend
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.respect_robots = respect_robots
+        self.visibility_timeout = visibility_timeout
+        self.dedup_window = dedup_window
+        self.run_id = uuid.uuid4().hex
+        self.counters = StageCounters()
+        self._draining = threading.Event()
+        self._manager = None
+
+        if backend == "local":
+            self.fetch_q, self.parse_q, self.result_q = LocalQueue(), LocalQueue(), LocalQueue()
+        elif backend == "multiprocessing":
+            self._manager = MultiprocessingQueues()
+            self.fetch_q, self.parse_q, self.result_q = (self._manager.queue(n) for n in ("fetch", "parse", "result"))
+        elif backend == "redis":
+            self.fetch_q, self.parse_q, self.result_q = (
+                RedisQueue(redis_url, f"{queue_prefix}:{n}") for n in ("fetch", "parse", "result")
+            )
+            # run id -> last heartbeat, for runs waiting on the shared result queue
+            self._runs_key = f"{queue_prefix}:runs"
+        else:
+            raise ValueError(f"Unknown worker backend: {backend}")
+
+    def drain(self) -> None:
+        """Stop taking new URLs; work already fetched is still parsed and emitted."""
+        if not self._draining.is_set():
+            logger.info("Draining: finishing in-flight work")
+            self._draining.set()
+
+    def submit(self, url: str) -> str:
+        message_id = f"{self.run_id}.{uuid.uuid4().hex}"
+        body = json.dumps({"id": message_id, "url": url, "respect_robots": self.respect_robots})
+        self.fetch_q.put(body.encode())
+        return message_id
+
+    async def _fetch_loop(self, pool: ThreadPoolExecutor) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._draining.is_set():
+            message = await loop.run_in_executor(pool, self.fetch_q.get, _POLL)
+            if message is None:
+                continue
+            item = json.loads(message.body)
+            try:
+                page = await fetch_response(item["url"], respect_robots=item["respect_robots"])
+            except Exception as exc:
+                # nothing to parse — the failure result goes straight out
+                result = fetch_failure_result(item["url"], exc)
+                await loop.run_in_executor(pool, self.result_q.put, item["id"].encode() + b"\n" + result.to_json())
+                self.counters.incr("fetch_failed")
+            else:
+                body = json.dumps({
+                    "id": item["id"], "url": item["url"], "html": page.html,
+                    "status_code": page.status_code, "final_url": page.final_url,
+                }).encode()
+                await loop.run_in_executor(pool, self.parse_q.put, body)
+                self.counters.incr("fetched")
+            await loop.run_in_executor(pool, self.fetch_q.ack, message)
+
+    def _start_parse_workers(self, stop) -> list:
+        args = (self.parse_q, self.result_q, stop, self.counters)
+        if self.backend == "local":
+            worker_class = threading.Thread
+        else:
+            worker_class = multiprocessing.Process
+        workers = [worker_class(target=_parse_loop, args=args, daemon=True) for _ in range(self.parse_workers)]
+        for worker in workers:
+            worker.start()
+        return workers
+
+    def _heartbeat(self, waiting: bool = True) -> None:
+        if self.backend != "redis":
+            return          # queues are private to this runtime — every result is ours
+        client = self.result_q.client
+        if waiting:
+            client.hset(self._runs_key, self.run_id, time.time())
+        else:
+            client.hdel(self._runs_key, self.run_id)
+
+    def _is_waiting_run(self, run_id: bytes) -> bool:
+        """True if `run_id` is another run, still alive, that counts on its results."""
+        if self.backend != "redis" or run_id == self.run_id.encode():
+            return False
+        client = self.result_q.client
+        beat = client.hget(self._runs_key, run_id)
+        if beat is None:
+            return False
+        if time.time() - float(beat) >= self.visibility_timeout:
+            client.hdel(self._runs_key, run_id)     # crashed without leaving — its results are fair game
+            return False
+        return True
+
+    def _requeue_expired(self) -> None:
+        requeued = sum(q.requeue_expired(self.visibility_timeout) for q in (self.fetch_q, self.parse_q, self.result_q))
+        if requeued:
+            logger.warning("Requeued %d messages past the visibility timeout", requeued)
+            self.counters.incr("redelivered", requeued)
+
+    async def run(
+        self,
+        urls: Optional[Iterable[str]],
+        on_result: Callable[[bytes], None],
+        report_interval: float = 10.0,
+    ) -> dict[str, int]:
+        """
+        Submit `urls` (if any) and run until every one has a result — or, with
+        urls=None, consume the shared queues until SIGINT/SIGTERM. Each CrawlResult
+        is passed to `on_result` as encoded JSON. Returns the final counters.
+        """
+        loop = asyncio.get_running_loop()
+        expected = None
+        if urls is not None:
+            self._heartbeat()
+            expected = sum(1 for url in urls if self.submit(url))
+
+        signals = []
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.drain)
+                signals.append(sig)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass        # not the main thread / not supported on this platform
+
+        stop_parse = threading.Event() if self.backend == "local" else multiprocessing.Event()
+        parse_workers = self._start_parse_workers(stop_parse)
+        # queue calls block — give them their own threads so they can't starve fetches
+        pool = ThreadPoolExecutor(max_workers=self.fetch_workers + 2, thread_name_prefix="queue")
+        fetchers = [loop.create_task(self._fetch_loop(pool)) for _ in range(self.fetch_workers)]
+
+        # a submitting run only keeps its own ids (at most `expected`); a consumer keeps a recent window
+        seen_ids: set[bytes] = set()
+        seen_order: deque[bytes] = deque()
+        window = None if expected is not None else self.dedup_window
+        handed_back: set[bytes] = set()     # others' results passed over since our last own one
+        own_prefix = f"{self.run_id}.".encode()
+        emitted = 0
+        last_report = last_requeue = time.monotonic()
+        last_counts = self.counters.snapshot()
+        try:
+            while True:
+                message = await loop.run_in_executor(pool, self.result_q.get, _POLL)
+                idle = message is None
+                if message is not None:
+                    message_id, _, result = message.body.partition(b"\n")
+                    if expected is not None:
+                        foreign = not message_id.startswith(own_prefix)
+                    else:
+                        foreign = self._is_waiting_run(message_id.partition(b".")[0])
+                    if foreign:
+                        # another run's result — back to the tail (put before ack, so never lost)
+                        await loop.run_in_executor(pool, self.result_q.put, message.body)
+                        self.result_q.ack(message)
+                        self.counters.incr("handed_back")
+                        idle = True
+                        if message_id in handed_back:
+                            # cycled through the queue without finding ours — let the owners catch up
+                            handed_back.clear()
+                            await asyncio.sleep(_POLL)
+                        handed_back.add(message_id)
+                    else:
+                        handed_back.clear()
+                        if message_id in seen_ids:
+                            self.counters.incr("duplicates")     # redelivered after a crash — already emitted
+                        else:
+                            seen_ids.add(message_id)
+                            if window is not None:
+                                seen_order.append(message_id)
+                                if len(seen_order) > window:
+                                    seen_ids.discard(seen_order.popleft())
+                            on_result(result)
+                            emitted += 1
+                            self.counters.incr("emitted")
+                        self.result_q.ack(message)
+                        if expected is not None and emitted >= expected:
+                            break
+
+                now = time.monotonic()
+                if now - last_requeue >= min(self.visibility_timeout, 5.0):
+                    self._requeue_expired()
+                    if expected is not None:
+                        self._heartbeat()
+                    last_requeue = now
+                if now - last_report >= report_interval:
+                    counts = self.counters.snapshot()
+                    rate = {name: (counts[name] - last_counts[name]) / (now - last_report) for name in STAGES}
+                    logger.info(
+                        "fetch %.1f/s, parse %.1f/s, emit %.1f/s — %s",
+                        rate["fetched"] + rate["fetch_failed"], rate["parsed"], rate["emitted"], counts,
+                    )
+                    last_report, last_counts = now, counts
+
+                if self._draining.is_set() and all(task.done() for task in fetchers):
+                    # fetchers have stopped; finish once everything they handed on is out
+                    if idle and self.parse_q.pending() == 0 and (message is not None or self.result_q.qsize() == 0):
+                        break
+        finally:
+            if expected is not None:
+                self._heartbeat(waiting=False)
+            self.drain()
+            await asyncio.gather(*fetchers, return_exceptions=True)
+            stop_parse.set()
+            for worker in parse_workers:
+                await loop.run_in_executor(None, worker.join)
+            pool.shutdown(wait=False)
+            if self._manager is not None:
+                self._manager.close()
+            for sig in signals:
+                loop.remove_signal_handler(sig)
+        return self.counters.snapshot()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", nargs="?", help="file of URLs, one per line (- for stdin); omit to consume the shared queue")
+    parser.add_argument("--out", default="-", help="output JSONL path, - for stdout")
+    parser.add_argument("--backend", default=WORKER_BACKEND, choices=("local", "multiprocessing", "redis"))
+    parser.add_argument("--fetch-workers", type=int, default=WORKER_FETCH_CONCURRENCY)
+    parser.add_argument("--parse-workers", type=int, default=WORKER_PARSE_PROCESSES)
+    parser.add_argument("--no-robots", action="store_true", help="skip robots.txt checks")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+
+    urls = None
+    if args.input:
+        source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        with source:
+            urls = [line.strip() for line in source if line.strip() and not line.startswith("#")]
+    elif args.backend != "redis":
+        parser.error("an input file is required unless --backend redis (queue consumer mode)")
+
+    runtime = WorkerRuntime(
+        backend=args.backend,
+        fetch_workers=args.fetch_workers,
+        parse_workers=args.parse_workers,
+        respect_robots=not args.no_robots,
+    )
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+
+    async def run() -> dict[str, int]:
+        # fetches (and robots checks) run in the default executor — size it to the fetch workers
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=args.fetch_workers, thread_name_prefix="fetch")
+        )
+        return await runtime.run(urls, lambda line: out.write(line + b"\n"))
+
+    try:
+        counts = asyncio.run(run())
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(json.dumps(counts), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
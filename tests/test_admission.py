@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from api.admission import AdmissionController, Overloaded
+
+
+async def test_admits_up_to_limit_without_waiting():
+    controller = AdmissionController(max_in_flight=2, queue_size=0, queue_timeout=1)
+    await controller.acquire()
+    await controller.acquire()
+    assert controller.in_flight == 2
+    with pytest.raises(Overloaded):
+        await controller.acquire()
+
+
+async def test_waiter_gets_released_slot_in_fifo_order():
+    controller = AdmissionController(max_in_flight=1, queue_size=2, queue_timeout=1)
+    await controller.acquire()
+    order = []
+
+    async def wait(name):
+        await controller.acquire()
+        order.append(name)
+
+    first = asyncio.create_task(wait("first"))
+    second = asyncio.create_task(wait("second"))
+    await asyncio.sleep(0)
+    assert controller.waiting == 2
+
+    controller.release()
+    await first
+    controller.release()
+    await second
+    assert order == ["first", "second"]
+    assert controller.in_flight == 1
+
+
+async def test_waiter_is_shed_after_timeout():
+    controller = AdmissionController(max_in_flight=1, queue_size=1, queue_timeout=0.01)
+    await controller.acquire()
+    with pytest.raises(Overloaded):
+        await controller.acquire()
+    assert controller.waiting == 0
+    controller.release()
+    assert controller.in_flight == 0
+
+
+async def test_zero_limit_disables_admission():
+    controller = AdmissionController(max_in_flight=0, queue_size=0, queue_timeout=0)
+    for _ in range(100):
+        await controller.acquire()
+    controller.release()
+    assert controller.in_flight == 0
+
+
+async def test_timed_out_waiter_popped_by_release_is_still_shed():
+    controller = AdmissionController(max_in_flight=1, queue_size=1, queue_timeout=0.01)
+    await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    future = controller._waiters[0]
+
+    # the timeout cancels the waiter's future, then the slot is released before
+    # acquire() gets to clean up — release() has already popped it
+    while not future.cancelled():
+        await asyncio.sleep(0)
+    controller.release()
+
+    with pytest.raises(Overloaded):
+        await waiter
+    assert controller.waiting == 0
+    assert controller.in_flight == 0
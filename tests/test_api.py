@@ -1,8 +1,13 @@
+import json
+import time
+
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 from fastapi.testclient import TestClient
 
+from api.cache import CacheEntry
 from api.main import app
+from api.negative import NEGATIVE_TTLS
 from crawler.models import CrawlResult
 
 client = TestClient(app)
@@ -45,7 +50,7 @@ def test_health_when_cache_down():
 # --- /crawl ---
 
 def test_crawl_success():
-    with patch("api.routes.get_cached", return_value=None), \
+    with patch("api.routes.get_cached_entry", return_value=None), \
          patch("api.routes.set_cached"), \
          patch("api.routes.crawl", new_callable=AsyncMock, return_value=MOCK_RESULT):
         response = client.post("/crawl", json={"url": "https://example.com/article"})
@@ -58,12 +63,42 @@ def test_crawl_success():
 
 
 def test_crawl_returns_cached_result():
-    cached_data = MOCK_RESULT.to_dict()
-    with patch("api.routes.get_cached", return_value=cached_data):
+    cached_entry = CacheEntry(MOCK_RESULT.to_json(), fresh_until=time.time() + 60)
+    with patch("api.routes.get_cached_entry", return_value=cached_entry), \
+         patch("api.routes.schedule_refresh") as mock_refresh:
         response = client.post("/crawl", json={"url": "https://example.com/article"})
 
     assert response.status_code == 200
-    assert response.json()["cached"] is True
+    data = response.json()
+    assert data["cached"] is True
+    assert data == {**MOCK_RESULT.to_dict(), "cached": True, "stale": False}
+    mock_refresh.assert_not_called()
+
+
+def test_stale_cache_hit_is_served_and_refreshed():
+    stale_entry = CacheEntry(MOCK_RESULT.to_json(), fresh_until=time.time() - 1)
+    with patch("api.routes.get_cached_entry", return_value=stale_entry), \
+         patch("api.routes.crawl", new_callable=AsyncMock) as mock_crawl, \
+         patch("api.routes.schedule_refresh") as mock_refresh:
+        response = client.post("/crawl", json={"url": "https://example.com/article"})
+
+    data = response.json()
+    assert data["cached"] is True
+    assert data["stale"] is True
+    # the request itself never waits on a crawl
+    mock_crawl.assert_not_called()
+    mock_refresh.assert_called_once_with("https://example.com/article", respect_robots=True)
+
+
+def test_fresh_crawl_caches_the_response_bytes():
+    with patch("api.routes.get_cached_entry", return_value=None), \
+         patch("api.routes.set_cached") as mock_set, \
+         patch("api.routes.crawl", new_callable=AsyncMock, return_value=MOCK_RESULT):
+        response = client.post("/crawl", json={"url": "https://example.com/article"})
+
+    # the cached payload and the response body come from the same encoding
+    cached_body = mock_set.call_args[0][1]
+    assert json.loads(cached_body) == {k: v for k, v in response.json().items() if k not in ("cached", "stale")}
 
 
 def test_crawl_invalid_url_rejected():
@@ -83,7 +118,7 @@ def test_crawl_network_failure_returns_502():
         status_code=0,
         error="Connection timeout",
     )
-    with patch("api.routes.get_cached", return_value=None), \
+    with patch("api.routes.get_cached_entry", return_value=None), \
          patch("api.routes.crawl", new_callable=AsyncMock, return_value=failed_result):
         response = client.post("/crawl", json={"url": "https://dead.example.com"})
 
@@ -99,7 +134,7 @@ def test_crawl_robots_block_returns_result_with_error():
         status_code=403,
         error="robots.txt disallows crawling https://blocked.example.com/page",
     )
-    with patch("api.routes.get_cached", return_value=None), \
+    with patch("api.routes.get_cached_entry", return_value=None), \
          patch("api.routes.set_cached"), \
          patch("api.routes.crawl", new_callable=AsyncMock, return_value=blocked_result):
         response = client.post("/crawl", json={"url": "https://blocked.example.com/page"})
@@ -111,7 +146,7 @@ def test_crawl_robots_block_returns_result_with_error():
 
 
 def test_crawl_respect_robots_false_passes_through():
-    with patch("api.routes.get_cached", return_value=None), \
+    with patch("api.routes.get_cached_entry", return_value=None), \
          patch("api.routes.set_cached"), \
          patch("api.routes.crawl", new_callable=AsyncMock, return_value=MOCK_RESULT) as mock_crawl:
         client.post("/crawl", json={"url": "https://example.com/article", "respect_robots": False})
@@ -120,7 +155,7 @@ def test_crawl_respect_robots_false_passes_through():
 
 
 def test_successful_crawl_is_cached():
-    with patch("api.routes.get_cached", return_value=None), \
+    with patch("api.routes.get_cached_entry", return_value=None), \
          patch("api.routes.set_cached") as mock_set, \
          patch("api.routes.crawl", new_callable=AsyncMock, return_value=MOCK_RESULT):
         client.post("/crawl", json={"url": "https://example.com/article"})
@@ -128,16 +163,212 @@ def test_successful_crawl_is_cached():
     mock_set.assert_called_once()
 
 
-def test_failed_crawl_is_not_cached():
+def test_failed_crawl_is_negatively_cached():
     failed_result = CrawlResult(
         url="https://example.com/bad",
         final_url="https://example.com/bad",
         status_code=500,
         error="Server error",
     )
-    with patch("api.routes.get_cached", return_value=None), \
+    with patch("api.routes.get_cached_entry", return_value=None), \
          patch("api.routes.set_cached") as mock_set, \
          patch("api.routes.crawl", new_callable=AsyncMock, return_value=failed_result):
         client.post("/crawl", json={"url": "https://example.com/bad"})
 
-    mock_set.assert_not_called()
+    # short TTL for the 5xx family, never served stale, tagged with the crawl status
+    mock_set.assert_called_once()
+    assert mock_set.call_args.kwargs["ttl"] == NEGATIVE_TTLS["5xx"]
+    assert mock_set.call_args.kwargs["stale_ttl"] == 0
+    assert mock_set.call_args.kwargs["status_code"] == 500
+
+
+def test_negative_cache_hit_replays_robots_block():
+    blocked = CrawlResult(
+        url="https://blocked.example.com/page",
+        final_url="https://blocked.example.com/page",
+        status_code=403,
+        error="robots.txt disallows crawling https://blocked.example.com/page",
+    )
+    entry = CacheEntry(blocked.to_json(), fresh_until=time.time() + 60, status_code=403)
+    with patch("api.routes.get_cached_entry", return_value=entry), \
+         patch("api.routes.crawl", new_callable=AsyncMock) as mock_crawl:
+        response = client.post("/crawl", json={"url": "https://blocked.example.com/page"})
+
+    mock_crawl.assert_not_called()
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status_code"] == 403
+    assert data["cached"] is True
+
+
+def test_robots_negative_is_not_served_to_bypass_requests():
+    blocked = CrawlResult(
+        url="https://blocked.example.com/page",
+        final_url="https://blocked.example.com/page",
+        status_code=403,
+        error="robots.txt disallows crawling https://blocked.example.com/page",
+    )
+    entry = CacheEntry(blocked.to_json(), time.time() + 600, status_code=403)
+    crawled = CrawlResult(url=blocked.url, final_url=blocked.url, status_code=200, title="Crawled anyway")
+    with patch("api.routes.get_cached_entry", return_value=entry), \
+         patch("api.routes.set_cached"), \
+         patch("api.routes.crawl", new_callable=AsyncMock, return_value=crawled) as mock_crawl:
+        response = client.post("/crawl", json={"url": blocked.url, "respect_robots": False})
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Crawled anyway"
+    mock_crawl.assert_called_once_with(blocked.url, respect_robots=False)
+
+
+def test_negative_cache_hit_replays_network_failure_as_502():
+    failed = CrawlResult(url="https://dead.example.com", final_url="https://dead.example.com", status_code=0, error="Connection timeout")
+    entry = CacheEntry(failed.to_json(), fresh_until=time.time() + 60, status_code=0)
+    with patch("api.routes.get_cached_entry", return_value=entry), \
+         patch("api.routes.crawl", new_callable=AsyncMock) as mock_crawl:
+        response = client.post("/crawl", json={"url": "https://dead.example.com"})
+
+    mock_crawl.assert_not_called()
+    assert response.status_code == 502
+    assert "Connection timeout" in response.json()["detail"]
+
+
+def test_expired_negative_entry_is_recrawled():
+    failed = CrawlResult(url="https://example.com/article", final_url="https://example.com/article", status_code=404, error="Not Found")
+    entry = CacheEntry(failed.to_json(), fresh_until=time.time() - 1, status_code=404)
+    with patch("api.routes.get_cached_entry", return_value=entry), \
+         patch("api.routes.set_cached"), \
+         patch("api.routes.schedule_refresh") as mock_refresh, \
+         patch("api.routes.crawl", new_callable=AsyncMock, return_value=MOCK_RESULT) as mock_crawl:
+        response = client.post("/crawl", json={"url": "https://example.com/article"})
+
+    mock_crawl.assert_called_once()
+    mock_refresh.assert_not_called()
+    assert response.json()["status_code"] == 200
+
+
+def test_concurrent_misses_share_one_crawl():
+    import asyncio
+    from api.routes import _crawl_once
+
+    async def slow_crawl(url, respect_robots=True):
+        await asyncio.sleep(0.01)
+        return CrawlResult(url=url, final_url=url, status_code=200)
+
+    async def run():
+        return await asyncio.gather(
+            _crawl_once("https://example.com/a?utm_source=x", True),
+            _crawl_once("https://example.com/a", True),
+        )
+
+    with patch("api.routes.crawl", side_effect=slow_crawl) as mock_crawl:
+        first, second = asyncio.run(run())
+
+    mock_crawl.assert_called_once()
+    # each caller still sees the URL it asked for
+    assert first.url == "https://example.com/a?utm_source=x"
+    assert second.url == "https://example.com/a"
+
+
+def test_overloaded_miss_is_shed_with_503():
+    from api.admission import Overloaded
+
+    with patch("api.routes.get_cached_entry", return_value=None), \
+         patch("api.routes.admission.acquire", new_callable=AsyncMock, side_effect=Overloaded), \
+         patch("api.routes.crawl", new_callable=AsyncMock) as mock_crawl:
+        response = client.post("/crawl", json={"url": "https://example.com/overload"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    mock_crawl.assert_not_called()
+
+
+def test_cache_hit_is_never_shed():
+    from api.admission import Overloaded
+
+    entry = CacheEntry(MOCK_RESULT.to_json(), time.time() + 60)
+    with patch("api.routes.get_cached_entry", return_value=entry), \
+         patch("api.routes.admission.acquire", new_callable=AsyncMock, side_effect=Overloaded):
+        response = client.post("/crawl", json={"url": "https://example.com/article"})
+
+    assert response.status_code == 200
+    assert response.json()["cached"] is True
+
+
+def test_stream_crawls_take_admission_slots():
+    import asyncio
+    from api.admission import AdmissionController
+
+    tracker = {"active": 0, "peak": 0}
+
+    async def slow_crawl(url, respect_robots=True):
+        tracker["active"] += 1
+        tracker["peak"] = max(tracker["peak"], tracker["active"])
+        await asyncio.sleep(0.01)
+        tracker["active"] -= 1
+        return CrawlResult(url=url, final_url=url, status_code=200)
+
+    urls = [f"https://example.com/{i}" for i in range(6)]
+    # two slots, room for two waiters: of the first six pages started, two are shed
+    with patch("api.routes.admission", AdmissionController(max_in_flight=2, queue_size=2, queue_timeout=5)), \
+         patch("api.routes.crawl", side_effect=slow_crawl):
+        response = client.post("/crawl/stream", json={"urls": urls}, headers={"X-Forwarded-For": "10.0.0.38"})
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["url"] for line in lines) == urls
+    assert tracker["peak"] == 2
+    shed = [line for line in lines if line["status_code"] == 503]
+    assert len(shed) == 2 and all("overloaded" in line["error"] for line in shed)
+
+
+def test_upload_is_validated_and_bounded_before_crawling():
+    upload_headers = {"X-Forwarded-For": "10.0.0.39", "Content-Type": "text/plain"}
+    body = b"# seeds\nhttps://example.com/a\n\nhttps://example.com/b\n"
+
+    async def fake_crawl(url, respect_robots=True):
+        return CrawlResult(url=url, final_url=url, status_code=200)
+
+    with patch("api.routes.crawl", side_effect=fake_crawl) as mock_crawl:
+        ok = client.post("/crawl/stream/upload", content=body, headers=upload_headers)
+        bad = client.post("/crawl/stream/upload", content=body + b"file:///etc/passwd\n", headers=upload_headers)
+        with patch("api.routes.UPLOAD_MAX_URLS", 1):
+            too_many = client.post("/crawl/stream/upload", content=body, headers=upload_headers)
+        with patch("api.routes.UPLOAD_MAX_BYTES", 16):
+            too_big = client.post("/crawl/stream/upload", content=body, headers=upload_headers)
+
+    assert ok.status_code == 200
+    assert sorted(json.loads(line)["url"] for line in ok.text.splitlines()) == ["https://example.com/a", "https://example.com/b"]
+    assert bad.status_code == 422
+    assert too_many.status_code == 413
+    assert too_big.status_code == 413
+    assert mock_crawl.call_count == 2     # only the valid upload crawled anything
+
+
+def test_health_reports_open_circuit_without_pinging():
+    from api import cache
+
+    with patch.object(cache.breaker, "state", "open"), \
+         patch("api.cache.get_client") as mock_client:
+        response = client.get("/health")
+
+    assert response.json()["cache"] == "unavailable"
+    assert response.json()["cache_circuit"] == "open"
+    mock_client.assert_not_called()
+
+
+def test_site_crawl_streams_ndjson():
+    async def fake_site(url, **kwargs):
+        yield CrawlResult(url=url, final_url=url, status_code=200, links=["https://example.com/a"])
+        yield CrawlResult(url="https://example.com/a", final_url="https://example.com/a", status_code=200)
+
+    with patch("api.routes.crawl_site", side_effect=fake_site) as mock_site:
+        response = client.post("/crawl/site", json={"url": "https://example.com/", "max_depth": 1})
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["url"] for line in lines] == ["https://example.com/", "https://example.com/a"]
+    assert mock_site.call_args.kwargs["max_depth"] == 1
+
+
+def test_site_crawl_rejects_excessive_depth():
+    assert client.post("/crawl/site", json={"url": "https://example.com/", "max_depth": 99}).status_code == 422
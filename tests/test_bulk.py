@@ -0,0 +1,139 @@
+import asyncio
+import io
+import json
+from unittest.mock import patch
+
+from crawler.bulk import BulkCrawler, Progress, main
+from crawler.models import CrawlResult
+
+
+def _fake_crawl(tracker=None, delay=0.001):
+    async def crawl(url, respect_robots=True):
+        host = url.split("/")[2]
+        if tracker is not None:
+            tracker["active"] += 1
+            tracker["hosts"][host] = tracker["hosts"].get(host, 0) + 1
+            tracker["peak"] = max(tracker["peak"], tracker["active"])
+            tracker["host_peak"] = max(tracker["host_peak"], tracker["hosts"][host])
+        await asyncio.sleep(delay)
+        if tracker is not None:
+            tracker["active"] -= 1
+            tracker["hosts"][host] -= 1
+        if "broken" in url:
+            return CrawlResult(url=url, final_url=url, status_code=0, error="connection refused")
+        return CrawlResult(url=url, final_url=url, status_code=200, title=url)
+    return crawl
+
+
+def _tracker():
+    return {"active": 0, "peak": 0, "hosts": {}, "host_peak": 0}
+
+
+async def test_bulk_crawl_respects_global_and_per_host_limits():
+    lines = [f"https://host{i % 3}.example.com/page/{i}\n" for i in range(60)]
+    lines[10] = "\n"
+    lines[11] = "# a comment\n"
+    tracker = _tracker()
+    out = io.BytesIO()
+    with patch("crawler.bulk.crawl", _fake_crawl(tracker)):
+        counts = await BulkCrawler(concurrency=5, per_host=2).run(lines, out)
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert counts["ok"] == len(results) == 58
+    assert {r["url"] for r in results} == {line.strip() for line in lines if line.strip().startswith("https")}
+    assert tracker["peak"] <= 5
+    assert tracker["host_peak"] <= 2
+
+
+async def test_bulk_crawl_host_backlog_does_not_block_other_hosts():
+    # one busy host first, then other hosts — they should still run at full concurrency
+    lines = [f"https://busy.example.com/{i}" for i in range(20)]
+    lines += [f"https://host{i}.example.com/" for i in range(20)]
+    tracker = _tracker()
+    with patch("crawler.bulk.crawl", _fake_crawl(tracker, delay=0.01)):
+        await BulkCrawler(concurrency=8, per_host=1).run(lines, io.BytesIO())
+    assert tracker["peak"] == 8
+    assert tracker["host_peak"] == 1
+
+
+async def test_bulk_crawl_reads_input_lazily_within_the_window():
+    crawler = BulkCrawler(concurrency=4, per_host=4, window=50)
+    read_ahead = []
+
+    def lines():
+        for i in range(20_000):
+            read_ahead.append(i - crawler.progress.next_line)
+            yield f"https://host{i % 7}.example.com/{i}"
+
+    out = io.BytesIO()
+    with patch("crawler.bulk.crawl", _fake_crawl(delay=0)):
+        counts = await crawler.run(lines(), out)
+    assert counts["ok"] == 20_000
+    assert max(read_ahead) < 50                     # never more than `window` lines held
+    assert len(crawler.progress.done) == 0
+
+
+def test_progress_tracks_out_of_order_completions(tmp_path):
+    progress = Progress()
+    for line_no in (2, 0, 3):
+        progress.complete(line_no)
+    assert progress.next_line == 1
+    assert progress.done == {2, 3}
+    progress.complete(1)
+    assert progress.next_line == 4 and progress.done == set()
+
+    progress.complete(6)
+    path = str(tmp_path / "bulk.ckpt")
+    progress.checkpoint(path)
+    restored = Progress.restore(path)
+    assert restored.next_line == 4
+    assert restored.is_done(6) and not restored.is_done(5)
+
+
+async def test_bulk_crawl_resumes_skipping_completed_lines():
+    lines = [f"https://example.com/{i}" for i in range(8)]
+    crawled = []
+
+    async def crawl(url, respect_robots=True):
+        crawled.append(url)
+        return CrawlResult(url=url, final_url=url, status_code=200)
+
+    with patch("crawler.bulk.crawl", crawl):
+        counts = await BulkCrawler(progress=Progress(3, {5})).run(lines, io.BytesIO())
+    assert sorted(crawled) == [lines[3], lines[4], lines[6], lines[7]]
+    assert counts["resumed"] == 4
+
+
+def test_cli_writes_jsonl_and_resumes_from_checkpoint(tmp_path, capsys):
+    urls = tmp_path / "urls.txt"
+    urls.write_text("https://a.example.com/1\nhttps://b.example.com/broken\nhttps://a.example.com/2\n")
+    out = tmp_path / "results.jsonl"
+    checkpoint = tmp_path / "urls.ckpt"
+    argv = [str(urls), "--out", str(out), "--checkpoint", str(checkpoint), "--no-robots"]
+
+    with patch("crawler.bulk.crawl", _fake_crawl()):
+        assert main(argv) == 0
+        first = out.read_text().splitlines()
+        assert len(first) == 3
+        assert "1 failed" in capsys.readouterr().err
+
+        # everything is recorded as done — a rerun crawls nothing and keeps the output
+        assert main(argv) == 0
+    assert out.read_text().splitlines() == first
+    assert "3 resumed" in capsys.readouterr().err
+
+
+def test_cli_keeps_no_per_url_state_in_memory(tmp_path, monkeypatch):
+    from crawler import recrawl, search
+
+    monkeypatch.setattr(search, "SEARCH_INDEX_ENABLED", True)
+    monkeypatch.setattr(recrawl, "RECRAWL_ENABLED", True)
+    monkeypatch.setattr(search, "_default_index", None)
+    monkeypatch.setattr(recrawl, "_default_scheduler", None)
+    urls = tmp_path / "urls.txt"
+    urls.write_text("https://a.example.com/1\n")
+
+    with patch("crawler.bulk.crawl", _fake_crawl()):
+        assert main([str(urls), "--out", str(tmp_path / "out.jsonl"), "--quiet"]) == 0
+    assert search.default_index() is None
+    assert recrawl.default_scheduler() is None
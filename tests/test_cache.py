@@ -0,0 +1,268 @@
+import asyncio
+import json
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from api import cache, refresh
+from api.breaker import CircuitBreaker
+from api.lru import LRUCache
+from crawler.models import CrawlResult
+
+
+@pytest.fixture(autouse=True)
+def empty_l1():
+    cache._l1.clear()
+    yield
+    cache._l1.clear()
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch("api.cache.get_client", return_value=client):
+        yield client
+
+
+# --- LRUCache ---
+
+def test_lru_returns_stored_value():
+    lru = LRUCache(max_bytes=1024, default_ttl=60)
+    lru.set("a", b"payload", now=0)
+    assert lru.get("a", now=1) == b"payload"
+
+
+def test_lru_expires_entries():
+    lru = LRUCache(max_bytes=1024, default_ttl=60)
+    lru.set("a", b"payload", now=0)
+    assert lru.get("a", now=61) is None
+    assert lru.nbytes == 0
+
+
+def test_lru_ttl_capped_by_default():
+    lru = LRUCache(max_bytes=1024, default_ttl=10)
+    lru.set("a", b"payload", ttl=3600, now=0)
+    assert lru.get("a", now=11) is None
+
+
+def test_lru_evicts_least_recently_used_by_size():
+    lru = LRUCache(max_bytes=30, default_ttl=60)
+    lru.set("a", b"x" * 10, now=0)
+    lru.set("b", b"x" * 10, now=0)
+    lru.get("a", now=0)                  # "b" is now least recently used
+    lru.set("c", b"x" * 15, now=0)
+
+    assert lru.get("b", now=0) is None
+    assert lru.get("a", now=0) is not None
+    assert lru.nbytes <= 30
+
+
+def test_lru_skips_values_larger_than_budget():
+    lru = LRUCache(max_bytes=10, default_ttl=60)
+    lru.set("a", b"x" * 11)
+    assert len(lru) == 0
+
+
+# --- two-tier get/set ---
+
+BODY = b'{"url":"https://example.com/"}'
+
+
+def test_set_writes_through_both_tiers(fake_redis):
+    cache.set_cached("https://example.com/", BODY, ttl=100)
+
+    key = cache._cache_key("https://example.com/")
+    assert cache._l1.get(key).body == BODY
+    assert fake_redis.hget(key, "body") == BODY.decode()
+
+
+def test_redis_hit_is_promoted_to_l1_with_remaining_ttl(fake_redis):
+    key = cache._cache_key("https://example.com/")
+    fake_redis.hset(key, mapping={"body": BODY.decode(), "fresh_until": time.time() + 5})
+    fake_redis.expire(key, 5)
+
+    assert cache.get_cached_entry("https://example.com/").body == BODY
+    # L1 copy expires no later than the Redis key does
+    assert cache._l1._entries[key][1] <= time.monotonic() + 5
+
+
+def test_l1_hit_skips_redis(fake_redis):
+    cache.set_cached("https://example.com/", BODY)
+    fake_redis.flushall()
+
+    assert cache.get_cached_entry("https://example.com/").body == BODY
+
+
+def test_l1_serves_when_redis_unavailable():
+    with patch("api.cache.get_client", return_value=None):
+        cache.set_cached("https://example.com/", {"url": "https://example.com/"})
+        assert cache.get_cached("https://example.com/") == {"url": "https://example.com/"}
+
+
+# --- stale-while-revalidate ---
+
+def test_entry_is_fresh_until_soft_expiry(fake_redis):
+    cache.set_cached("https://example.com/", BODY, ttl=100)
+    entry = cache.get_cached_entry("https://example.com/")
+    assert not entry.is_stale
+
+
+def test_entry_is_served_stale_until_hard_expiry(fake_redis):
+    cache.set_cached("https://example.com/", BODY, ttl=100)
+    key = cache._cache_key("https://example.com/")
+    # soft expiry passed, hard TTL (ttl + CACHE_STALE_TTL) has not
+    assert fake_redis.ttl(key) > 100
+    with patch("api.cache.time.time", return_value=time.time() + 101):
+        entry = cache.get_cached_entry("https://example.com/")
+        assert entry.body == BODY
+        assert entry.is_stale
+
+
+def test_stale_l1_entry_picks_up_refresh_from_redis(fake_redis):
+    key = cache._cache_key("https://example.com/")
+    cache._l1.set(key, cache.CacheEntry(b'{"old":true}', fresh_until=time.time() - 1), size=12)
+    fake_redis.hset(key, mapping={"body": BODY.decode(), "fresh_until": time.time() + 100})
+
+    entry = cache.get_cached_entry("https://example.com/")
+    assert entry.body == BODY
+    assert not entry.is_stale
+
+
+def test_refresh_lock_is_exclusive(fake_redis):
+    assert cache.acquire_refresh_lock("https://example.com/") is True
+    assert cache.acquire_refresh_lock("https://example.com/") is False
+    assert cache.acquire_refresh_lock("https://example.com/other") is True
+
+
+@pytest.mark.asyncio
+async def test_schedule_refresh_runs_once_per_url(fake_redis):
+    calls = []
+
+    async def slow_crawl(url, respect_robots=True):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return CrawlResult(url=url, final_url=url, status_code=200, title="refreshed")
+
+    with patch("api.refresh.crawl", side_effect=slow_crawl):
+        assert refresh.schedule_refresh("https://example.com/") is True
+        assert refresh.schedule_refresh("https://example.com/") is False
+        await asyncio.gather(*refresh._inflight.values())
+
+    assert calls == ["https://example.com/"]
+    assert json.loads(cache.get_cached_entry("https://example.com/").body)["title"] == "refreshed"
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_stale_entry(fake_redis):
+    cache.set_cached("https://example.com/", BODY, ttl=100)
+    failed = CrawlResult(url="https://example.com/", final_url="https://example.com/", status_code=0, error="timeout")
+
+    with patch("api.refresh.crawl", new_callable=AsyncMock, return_value=failed):
+        refresh.schedule_refresh("https://example.com/")
+        await asyncio.gather(*refresh._inflight.values())
+
+    assert cache.get_cached_entry("https://example.com/").body == BODY
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_shed_when_admission_is_full(fake_redis):
+    from api.admission import Overloaded
+
+    cache.set_cached("https://example.com/", BODY, ttl=100)
+    with patch("api.refresh.admission.acquire", new_callable=AsyncMock, side_effect=Overloaded), \
+         patch("api.refresh.crawl", new_callable=AsyncMock) as mock_crawl:
+        assert refresh.schedule_refresh("https://example.com/") is True
+        await asyncio.gather(*refresh._inflight.values())
+
+    mock_crawl.assert_not_called()
+    assert cache.get_cached_entry("https://example.com/").body == BODY
+
+
+# --- URL normalization / aliases ---
+
+def test_equivalent_urls_share_an_entry(fake_redis):
+    cache.set_cached("https://example.com/page?utm_source=news", {"title": "A"})
+    cache._l1.clear()
+    assert cache.get_cached("http://EXAMPLE.com/page/#top") == {"title": "A"}
+
+
+def test_redirect_and_canonical_aliases_resolve_to_entry(fake_redis):
+    result = CrawlResult(
+        url="https://example.com/old",
+        final_url="https://example.com/new",
+        status_code=200,
+        canonical_url="/canonical",
+    )
+    assert cache.aliases_of(result) == ["https://example.com/new", "https://example.com/canonical"]
+
+    cache.set_cached(result.url, result.to_json(), aliases=cache.aliases_of(result))
+    cache._l1.clear()
+    assert cache.get_cached("https://example.com/new")["url"] == "https://example.com/old"
+    assert cache.get_cached("https://example.com/canonical")["url"] == "https://example.com/old"
+    assert cache.get_cached("https://example.com/other") is None
+
+
+def test_cross_host_canonical_is_not_aliased(fake_redis):
+    result = CrawlResult(
+        url="https://evil.example/page",
+        final_url="https://evil.example/page",
+        status_code=200,
+        canonical_url="https://bank.example/",
+    )
+    assert cache.aliases_of(result) == []
+
+    cache.set_cached(result.url, result.to_json(), aliases=cache.aliases_of(result))
+    cache._l1.clear()
+    assert cache.get_cached("https://bank.example/") is None
+
+
+# --- circuit breaker ---
+
+@pytest.fixture
+def fresh_breaker(monkeypatch):
+    breaker = CircuitBreaker("redis", failure_threshold=2)
+    monkeypatch.setattr(cache, "breaker", breaker)
+    monkeypatch.setattr(cache, "_probe_task", None)
+    return breaker
+
+
+def test_breaker_opens_after_threshold_and_closes_on_success():
+    breaker = CircuitBreaker("test", failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    breaker.record_success()
+    assert not breaker.is_open and breaker.failures == 0
+
+
+def test_connection_errors_open_breaker_and_skip_redis(fresh_breaker, monkeypatch):
+    # nothing listens on port 1 — connects are refused immediately
+    dead = cache._BreakerRedis.from_url("redis://127.0.0.1:1", socket_connect_timeout=0.2)
+    monkeypatch.setattr(cache, "_client", dead)
+    monkeypatch.setattr(cache, "_last_inline_probe", time.monotonic())
+
+    assert cache.get_cached_entry("https://example.com/a") is None
+    cache.set_cached("https://example.com/b", {"title": "B"})
+    assert fresh_breaker.is_open
+
+    assert cache.get_client() is None
+    assert cache.is_cache_healthy() is False
+    # L1 still works while Redis is skipped
+    assert cache.get_cached("https://example.com/b") == {"title": "B"}
+
+
+async def test_background_probe_closes_breaker(fresh_breaker, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(cache, "_client", fakeredis.FakeRedis(decode_responses=True))
+    monkeypatch.setattr(cache, "REDIS_PROBE_INTERVAL", 0.01)
+    fresh_breaker.record_failure()
+    fresh_breaker.record_failure()
+
+    assert cache.get_client() is None       # open: returns at once, starts the probe
+    await asyncio.wait_for(cache._probe_task, 1)
+    assert not fresh_breaker.is_open
+    assert cache.get_client() is not None
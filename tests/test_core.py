@@ -1,7 +1,12 @@
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, patch
-from crawler.core import crawl
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import requests
+
+from crawler.core import crawl, crawl_many
+from crawler.models import CrawlResult
 
 
 MOCK_HTML = """
@@ -62,3 +67,69 @@ async def test_crawl_captures_final_url_after_redirect():
 
     assert result.final_url == "https://cnn.com/story"
     assert result.url == "http://cnn.com/story"
+
+
+def test_crawl_result_is_slotted():
+    result = CrawlResult(url="http://a.com", final_url="http://a.com", status_code=200)
+    assert not hasattr(result, "__dict__")
+
+
+def test_crawl_result_to_json_round_trips():
+    result = CrawlResult(
+        url="http://a.com", final_url="https://a.com/", status_code=200,
+        title="Café", topics=["coffee"], h1_tags=["Menu"],
+    )
+    assert json.loads(result.to_json()) == result.to_dict()
+
+
+@pytest.mark.asyncio
+async def test_crawl_many_yields_every_url_with_bounded_concurrency():
+    in_flight = 0
+    peak = 0
+
+    async def fake_crawl(url, respect_robots=True):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return CrawlResult(url=url, final_url=url, status_code=200)
+
+    urls = [f"http://example.com/{i}" for i in range(20)]
+    with patch("crawler.core.crawl", side_effect=fake_crawl):
+        results = [r async for r in crawl_many(urls, concurrency=3)]
+
+    assert sorted(r.url for r in results) == sorted(urls)
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_crawl_many_pulls_urls_lazily():
+    consumed = []
+
+    def url_source():
+        for i in range(100):
+            consumed.append(i)
+            yield f"http://example.com/{i}"
+
+    async def fake_crawl(url, respect_robots=True):
+        return CrawlResult(url=url, final_url=url, status_code=200)
+
+    with patch("crawler.core.crawl", side_effect=fake_crawl):
+        stream = crawl_many(url_source(), concurrency=4)
+        await anext(stream)
+        await stream.aclose()
+
+    # only enough URLs to fill the slots were read, not the whole source
+    assert len(consumed) <= 8
+
+
+@pytest.mark.asyncio
+async def test_crawl_keeps_origin_http_status():
+    response = MagicMock(status_code=404, url="https://example.com/missing")
+    error = requests.HTTPError("404 Client Error: Not Found", response=response)
+    with patch("crawler.core.fetch_page", new_callable=AsyncMock, side_effect=error):
+        result = await crawl("https://example.com/missing")
+
+    assert result.status_code == 404
+    assert "404" in result.error
@@ -0,0 +1,60 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from crawler import fetcher
+
+
+@pytest.fixture(autouse=True)
+def empty_robots_cache():
+    fetcher._robots_cache.clear()
+    yield
+    fetcher._robots_cache.clear()
+
+
+def _robots_response(status_code=200, text=""):
+    return MagicMock(status_code=status_code, text=text)
+
+
+def test_robots_txt_is_fetched_once_per_host():
+    robots = _robots_response(text="User-agent: *\nDisallow: /private\n")
+    with patch("crawler.fetcher.requests.get", return_value=robots) as mock_get:
+        assert fetcher.is_crawl_allowed("https://example.com/a")
+        assert not fetcher.is_crawl_allowed("https://example.com/private/b")
+        assert fetcher.is_crawl_allowed("https://other.com/a")
+
+    assert [c.args[0] for c in mock_get.call_args_list] == [
+        "https://example.com/robots.txt", "https://other.com/robots.txt",
+    ]
+    assert mock_get.call_args.kwargs["timeout"] == fetcher.DEFAULT_TIMEOUT
+
+
+def test_robots_status_and_network_failures():
+    with patch("crawler.fetcher.requests.get", return_value=_robots_response(403)):
+        assert not fetcher.is_crawl_allowed("https://forbidden.example.com/")
+    with patch("crawler.fetcher.requests.get", return_value=_robots_response(404)):
+        assert fetcher.is_crawl_allowed("https://missing.example.com/")
+    with patch("crawler.fetcher.requests.get", side_effect=fetcher.requests.ConnectionError("refused")):
+        assert fetcher.is_crawl_allowed("https://down.example.com/")
+
+
+def test_expired_robots_entry_is_refetched():
+    with patch("crawler.fetcher.requests.get", return_value=_robots_response()) as mock_get, \
+         patch.object(fetcher, "ROBOTS_CACHE_TTL", 0):
+        fetcher.is_crawl_allowed("https://example.com/a")
+        fetcher.is_crawl_allowed("https://example.com/b")
+    assert mock_get.call_count == 2
+
+
+async def test_robots_check_runs_off_the_event_loop():
+    checked_on = []
+
+    def allowed(url, user_agent="*"):
+        checked_on.append(threading.current_thread())
+        return False
+
+    with patch("crawler.fetcher.is_crawl_allowed", side_effect=allowed):
+        with pytest.raises(PermissionError):
+            await fetcher.fetch_response("https://example.com/")
+    assert checked_on and checked_on[0] is not threading.main_thread()
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch
+
+from crawler.frontier import BloomFilter, Frontier, ScalableBloomFilter, crawl_frontier, write_checkpoint
+from crawler.models import CrawlResult
+
+
+# --- Bloom filters ---
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"https://example.com/{i}".encode() for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+
+
+def test_scalable_bloom_grows_and_keeps_error_rate():
+    bloom = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+    for i in range(10_000):
+        bloom.add(f"https://example.com/{i}".encode())
+    assert len(bloom._slices) > 1
+    false_positives = sum(f"https://other.com/{i}".encode() in bloom for i in range(10_000))
+    assert false_positives / 10_000 < 0.01
+
+
+# --- Frontier ---
+
+def test_add_dedupes_by_normalized_url():
+    frontier = Frontier(host_delay=0)
+    assert frontier.add("https://example.com/a")
+    assert not frontier.add("http://EXAMPLE.com/a?utm_source=x#top")
+    assert len(frontier) == 1
+
+
+def test_one_fetch_per_host_with_delay():
+    frontier = Frontier(host_delay=5)
+    frontier.add("https://a.com/1")
+    frontier.add("https://a.com/2")
+    frontier.add("https://b.com/1")
+
+    first = frontier.pop(now=0)
+    second = frontier.pop(now=0)
+    assert {first, second} == {"https://a.com/1", "https://b.com/1"}
+    assert frontier.pop(now=0) is None          # a.com busy
+
+    frontier.done("https://a.com/1", now=1)
+    assert frontier.pop(now=3) is None          # a.com waiting out its delay
+    assert frontier.next_ready_in(now=3) == 3
+    assert frontier.pop(now=6) == "https://a.com/2"
+
+
+def test_priority_then_fifo_within_host():
+    frontier = Frontier(host_delay=0)
+    frontier.add("https://a.com/low", priority=5)
+    frontier.add("https://a.com/first")
+    frontier.add("https://a.com/second")
+    order = []
+    while (url := frontier.pop()) is not None:
+        order.append(url)
+        frontier.done(url)
+    assert order == ["https://a.com/first", "https://a.com/second", "https://a.com/low"]
+
+
+def test_checkpoint_round_trip_requeues_in_flight(tmp_path):
+    frontier = Frontier(host_delay=0)
+    frontier.add("https://a.com/1")
+    frontier.add("https://a.com/2")
+    frontier.pop()                              # a.com/1 in flight at checkpoint time
+    path = str(tmp_path / "frontier.ckpt")
+    frontier.checkpoint(path)
+
+    restored = Frontier.restore(path)
+    assert len(restored) == 2
+    assert not restored.add("https://a.com/1")  # seen-filter survives
+
+
+def test_snapshot_seen_filter_is_independent():
+    frontier = Frontier(host_delay=0, seen=ScalableBloomFilter(initial_capacity=2))
+    for i in range(5):                          # enough to grow a second slice
+        frontier.add(f"https://a.com/{i}")
+    seen = frontier.snapshot()["seen"]
+    frontier.add("https://a.com/later")
+
+    assert len(seen) == 5
+    assert b"https://a.com/later" not in seen
+    assert all(a._bits is not b._bits for a, b in zip(seen._slices, frontier.seen._slices))
+
+
+async def test_crawl_frontier_writes_checkpoints_off_the_loop(tmp_path):
+    frontier = Frontier(host_delay=0)
+    for i in range(5):
+        frontier.add(f"https://a.com/{i}")
+    path = str(tmp_path / "frontier.ckpt")
+    writers = []
+
+    def record_writer(state, path):
+        writers.append(threading.current_thread())
+        write_checkpoint(state, path)
+
+    async def fake_crawl(url, respect_robots=True):
+        return CrawlResult(url=url, final_url=url, status_code=200)
+
+    with patch("crawler.frontier.crawl", new_callable=AsyncMock, side_effect=fake_crawl), \
+         patch("crawler.frontier.write_checkpoint", side_effect=record_writer):
+        async for _ in crawl_frontier(frontier, checkpoint_path=path, checkpoint_interval=0):
+            await asyncio.sleep(0.01)
+
+    assert writers and threading.main_thread() not in writers
+    assert not Frontier.restore(path).add("https://a.com/0")
+
+
+def test_snapshot_is_independent_of_the_live_frontier(tmp_path):
+    frontier = Frontier(host_delay=0)
+    frontier.add("https://a.com/1")
+    state = frontier.snapshot()
+    frontier.add("https://a.com/2")
+    path = str(tmp_path / "frontier.ckpt")
+    write_checkpoint(state, path)
+
+    restored = Frontier.restore(path)
+    assert len(restored) == 1
+    assert restored.add("https://a.com/2")
+
+
+async def test_crawl_frontier_drains_and_follows_added_urls():
+    frontier = Frontier(host_delay=0)
+    frontier.add("https://a.com/")
+
+    def on_result(result):
+        if result.url == "https://a.com/":
+            frontier.add("https://a.com/child")
+            frontier.add("https://b.com/")
+
+    async def fake_crawl(url, respect_robots=True):
+        return CrawlResult(url=url, final_url=url, status_code=200)
+
+    with patch("crawler.frontier.crawl", new_callable=AsyncMock, side_effect=fake_crawl):
+        results = [r.url async for r in crawl_frontier(frontier, concurrency=4, on_result=on_result)]
+
+    assert sorted(results) == ["https://a.com/", "https://a.com/child", "https://b.com/"]
+    assert frontier.is_exhausted()
@@ -0,0 +1,180 @@
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+
+from api import jobs
+from api.main import app
+from crawler.models import CrawlResult
+
+# own rate-limit bucket, so these don't eat into the shared test client's quota
+HEADERS = {"X-Forwarded-For": "10.0.0.37"}
+
+
+@pytest.fixture(autouse=True)
+def fresh_backend():
+    jobs._queue = jobs._store = None
+    yield
+    jobs._queue = jobs._store = None
+
+
+@pytest.fixture
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def _result(url, respect_robots=True):
+    return CrawlResult(url=url, final_url=url, status_code=200, title=url)
+
+
+def _wait_for(client, job_id, status="done", timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}", headers=HEADERS).json()
+        if job["status"] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} never reached {status}: {job}")
+
+
+def test_job_is_accepted_and_completed_by_workers():
+    with patch("api.jobs.get_cached_entry", return_value=None), \
+         patch("api.jobs.set_cached"), \
+         patch("api.jobs.crawl", new_callable=AsyncMock, side_effect=_result), \
+         TestClient(app) as client:
+        response = client.post(
+            "/jobs", json={"urls": ["https://example.com/a", "https://example.com/b"]}, headers=HEADERS,
+        )
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+        job = _wait_for(client, response.json()["job_id"])
+
+    assert job["completed"] == 2
+    # results keep submission order regardless of completion order
+    assert [r["title"] for r in job["results"]] == ["https://example.com/a", "https://example.com/b"]
+
+
+async def test_job_item_bypassing_robots_ignores_a_cached_robots_block():
+    from api.cache import CacheEntry
+
+    url = "https://blocked.example.com/page"
+    blocked = CrawlResult(url=url, final_url=url, status_code=403, error=f"robots.txt disallows crawling {url}")
+    entry = CacheEntry(blocked.to_json(), time.time() + 600, status_code=403)
+    with patch("api.jobs.get_cached_entry", return_value=entry), \
+         patch("api.jobs.set_cached"), \
+         patch("api.jobs.crawl", new_callable=AsyncMock, side_effect=_result) as mock_crawl:
+        assert await jobs._crawl_item(url, respect_robots=True) == entry.body
+        mock_crawl.assert_not_called()
+        body = await jobs._crawl_item(url, respect_robots=False)
+
+    assert b'"status_code":200' in body
+    mock_crawl.assert_called_once_with(url, respect_robots=False)
+
+
+def test_full_queue_returns_503_and_enqueues_nothing():
+    with patch("api.routes.submit_job", side_effect=jobs.QueueFull), TestClient(app) as client:
+        response = client.post("/jobs", json={"urls": ["https://example.com/a"]}, headers=HEADERS)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+
+
+def test_unknown_job_is_404():
+    with TestClient(app) as client:
+        assert client.get("/jobs/nope", headers=HEADERS).status_code == 404
+
+
+async def test_memory_queue_is_all_or_nothing():
+    queue = jobs.MemoryJobQueue(maxsize=3)
+    queue.put_many(["a", "b"])
+    with pytest.raises(jobs.QueueFull):
+        queue.put_many(["c", "d"])
+    assert queue.qsize() == 2
+
+
+def test_webhook_receives_finished_job():
+    store = jobs.MemoryJobStore()
+    store.create("j1", 1, "https://hooks.example.com/done")
+    job = store.record_result("j1", 0, _result("https://example.com/a").to_json())
+    assert job["status"] == "done"
+
+    with patch("api.jobs.requests.post") as mock_post:
+        jobs._post_webhook(job)
+    mock_post.assert_called_once_with("https://hooks.example.com/done", json=job, timeout=jobs.WEBHOOK_TIMEOUT)
+
+
+def test_memory_store_is_bounded_by_result_bytes():
+    body = _result("https://example.com/a").to_json()
+    store = jobs.MemoryJobStore(max_bytes=3 * (jobs._JOB_OVERHEAD + len(body)) + len(body))
+    for job_id in ("j1", "j2", "j3"):
+        store.create(job_id, 2, None)
+        store.record_result(job_id, 0, body)
+    assert all(store.get(job_id) is not None for job_id in ("j1", "j2", "j3"))
+
+    # results fill the store — the least recently touched job goes first
+    store.record_result("j2", 1, body)
+    store.record_result("j3", 1, body)
+    assert store.get("j1") is None
+    assert store.get("j2")["status"] == "done" and store.get("j3")["status"] == "done"
+
+
+async def test_job_crawl_waits_for_an_admission_slot():
+    from api.admission import Overloaded
+
+    url = "https://example.com/a"
+    with patch("api.jobs.get_cached_entry", return_value=None), \
+         patch("api.jobs.set_cached"), \
+         patch("api.jobs.ADMISSION_RETRY_AFTER", 0), \
+         patch("api.jobs.admission.acquire", new_callable=AsyncMock, side_effect=[Overloaded, Overloaded, None]) as acquire, \
+         patch("api.jobs.admission.release") as release, \
+         patch("api.jobs.crawl", new_callable=AsyncMock, side_effect=_result) as mock_crawl:
+        await jobs._crawl_item(url, respect_robots=True)
+
+    assert acquire.await_count == 3
+    mock_crawl.assert_awaited_once()
+    release.assert_called_once()
+
+
+# --- Redis backend ---
+
+def test_redis_queue_enforces_bound_atomically(fake_redis):
+    queue = jobs.RedisJobQueue(get_client=lambda: fake_redis, maxsize=3)
+    queue.put_many(["a", "b"])
+    with pytest.raises(jobs.QueueFull):
+        queue.put_many(["c", "d"])
+    assert fake_redis.lrange(queue.key, 0, -1) == ["a", "b"]
+
+
+def test_redis_store_completes_once_per_index(fake_redis):
+    store = jobs.RedisJobStore(get_client=lambda: fake_redis)
+    store.create("j1", 2, None)
+    body = _result("https://example.com/a").to_json()
+
+    assert store.record_result("j1", 0, body) is None
+    assert store.record_result("j1", 0, body) is None     # duplicate delivery ignored
+    assert store.get("j1")["completed"] == 1
+    job = store.record_result("j1", 1, body)
+    assert job["status"] == "done"
+    assert job["completed"] == 2
+
+
+async def test_redis_queue_polls_outside_the_default_executor():
+    import threading
+
+    threads = []
+
+    def blpop(keys, timeout):
+        threads.append(threading.current_thread().name)
+        return (keys[0], "item")
+
+    client = MagicMock(blpop=blpop)
+    queue = jobs.RedisJobQueue(get_client=lambda: client)
+    assert await queue.get() == "item"
+    assert threads[0].startswith("job-queue")
+
+
+def test_redis_backend_unavailable_is_surfaced():
+    queue = jobs.RedisJobQueue(get_client=lambda: None)
+    with pytest.raises(jobs.QueueUnavailable):
+        queue.put_many(["a"])
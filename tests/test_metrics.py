@@ -0,0 +1,78 @@
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from api import cache
+from api.main import app
+from crawler.core import crawl
+
+client = TestClient(app)
+
+MOCK_HTML = """
+<html lang="en">
+<head><title>Metrics test page</title></head>
+<body><h1>Observability</h1><p>Histograms and counters for every crawl stage.</p></body>
+</html>
+"""
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_crawl_records_stage_latencies():
+    stages = ("parse", "extract_topics", "classify")
+    before = {s: _sample("crawler_stage_duration_seconds_count", stage=s) for s in stages}
+    processed_before = _sample("crawler_urls_processed_total", status="success")
+
+    with patch("crawler.core.fetch_page", new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = (MOCK_HTML, 200, "https://example.com/")
+        await crawl("https://example.com/")
+
+    for stage in stages:
+        assert _sample("crawler_stage_duration_seconds_count", stage=stage) == before[stage] + 1
+    assert _sample("crawler_urls_processed_total", status="success") == processed_before + 1
+    assert _sample("crawler_crawls_in_flight") == 0
+
+
+def test_cache_lookups_are_counted_per_tier():
+    fake_redis = MagicMock()
+    fake_redis.pipeline.return_value.hmget.return_value.pttl.return_value.get.return_value.execute.side_effect = [
+        [['{"url":"x"}', str(time.time() + 60), "200"], 60_000, None],
+        [[None, None, None], -2, None],
+    ]
+    before = {
+        (tier, result): _sample("crawler_cache_lookups_total", tier=tier, result=result)
+        for tier in ("l1", "redis") for result in ("hit", "miss")
+    }
+
+    cache._l1.clear()
+    with patch("api.cache.get_client", return_value=fake_redis):
+        cache.get_cached_entry("https://example.com/a")    # redis hit, now promoted to L1
+        cache.get_cached_entry("https://example.com/a")    # l1 hit
+        cache.get_cached_entry("https://example.com/b")    # miss on both tiers
+    cache._l1.clear()
+
+    def delta(tier, result):
+        return _sample("crawler_cache_lookups_total", tier=tier, result=result) - before[(tier, result)]
+
+    assert delta("l1", "hit") == 1
+    assert delta("l1", "miss") == 2
+    assert delta("redis", "hit") == 1
+    assert delta("redis", "miss") == 1
+
+
+def test_metrics_endpoint_exposes_prometheus_text():
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "crawler_stage_duration_seconds" in body
+    assert "crawler_crawls_in_flight" in body
+    assert "crawler_cache_lookups_total" in body
+    assert "crawler_response_size_bytes" in body
@@ -0,0 +1,85 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.middleware import RateLimitMiddleware, RequestLoggingMiddleware
+
+
+# --- RateLimitMiddleware ---
+
+def _make_client(requests_per_window: int) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, requests_per_window=requests_per_window, window_seconds=60)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    return TestClient(app)
+
+
+def test_middleware_returns_429_with_retry_after():
+    client = _make_client(requests_per_window=2)
+    assert client.get("/ping").status_code == 200
+    assert client.get("/ping").status_code == 200
+
+    response = client.get("/ping")
+    assert response.status_code == 429
+    assert response.json()["code"] == "rate_limit_exceeded"
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_middleware_skips_health_checks():
+    client = _make_client(requests_per_window=1)
+    client.get("/ping")
+    assert all(client.get("/health").status_code == 200 for _ in range(5))
+
+
+def test_middleware_honours_forwarded_for():
+    client = _make_client(requests_per_window=1)
+    assert client.get("/ping", headers={"X-Forwarded-For": "1.1.1.1"}).status_code == 200
+    assert client.get("/ping", headers={"X-Forwarded-For": "2.2.2.2, 10.0.0.1"}).status_code == 200
+    assert client.get("/ping", headers={"X-Forwarded-For": "1.1.1.1"}).status_code == 429
+
+
+# --- RequestLoggingMiddleware ---
+
+def _make_logged_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware)
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"{i}\n".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/missing")
+    async def missing():
+        return StreamingResponse(iter([b"gone"]), status_code=404)
+
+    return TestClient(app)
+
+
+def test_logging_middleware_passes_streams_through(caplog):
+    client = _make_logged_client()
+    with caplog.at_level(logging.INFO, logger="api.middleware"):
+        response = client.get("/stream")
+
+    assert response.text == "0\n1\n2\n"
+    assert "GET /stream -> 200" in caplog.text
+
+
+def test_logging_middleware_logs_response_status(caplog):
+    client = _make_logged_client()
+    with caplog.at_level(logging.INFO, logger="api.middleware"):
+        client.get("/missing")
+
+    assert "GET /missing -> 404" in caplog.text
@@ -0,0 +1,51 @@
+import pytest
+from unittest.mock import patch
+
+from api import cache, negative
+from crawler.models import CrawlResult
+
+
+def _result(status_code, error=None):
+    return CrawlResult(url="https://example.com/", final_url="https://example.com/", status_code=status_code, error=error)
+
+
+@pytest.fixture(autouse=True)
+def no_redis():
+    cache._local_failures.clear()
+    with patch("api.cache.get_client", return_value=None):
+        yield
+    cache._local_failures.clear()
+
+
+def test_failure_families():
+    assert negative.failure_family(_result(200)) is None
+    assert negative.failure_family(_result(0, "timeout")) == "network"
+    assert negative.failure_family(_result(403, "robots.txt disallows crawling https://example.com/")) == "robots"
+    assert negative.failure_family(_result(403, "403 Client Error: Forbidden")) == "4xx"
+    assert negative.failure_family(_result(404, "404 Client Error")) == "4xx"
+    assert negative.failure_family(_result(503, "503 Server Error")) == "5xx"
+
+
+def test_fixed_ttl_per_family():
+    with patch.dict(negative.NEGATIVE_TTLS, {"robots": 600, "4xx": 300, "5xx": 60}):
+        assert negative.negative_ttl("https://example.com/", _result(404)) == 300
+        assert negative.negative_ttl("https://example.com/", _result(502)) == 60
+
+
+def test_family_can_be_disabled():
+    with patch.dict(negative.NEGATIVE_TTLS, {"4xx": 0}):
+        assert negative.negative_ttl("https://example.com/", _result(404)) == 0
+
+
+def test_network_ttl_grows_exponentially_and_is_capped():
+    with patch.object(negative, "NEGATIVE_TTL_NETWORK_BASE", 30), \
+         patch.object(negative, "NEGATIVE_TTL_NETWORK_MAX", 200):
+        ttls = [negative.negative_ttl("https://dead.example.com/", _result(0, "timeout")) for _ in range(5)]
+    assert ttls == [30, 60, 120, 200, 200]
+
+
+def test_success_resets_network_backoff():
+    negative.negative_ttl("https://dead.example.com/", _result(0, "timeout"))
+    negative.negative_ttl("https://dead.example.com/", _result(0, "timeout"))
+    cache.set_cached("https://dead.example.com/", b'{"url":"https://dead.example.com/"}')
+    assert negative.negative_ttl("https://dead.example.com/", _result(0, "timeout")) == negative.NEGATIVE_TTL_NETWORK_BASE
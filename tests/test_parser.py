@@ -97,3 +97,31 @@ def test_empty_html_does_not_crash():
     result = parse_html("")
     assert result["title"] is None
     assert result["h1_tags"] == []
+
+
+LINK_HTML = """
+<html><head><title>Links</title></head>
+<body>
+    <nav><a href="/about">About</a></nav>
+    <a href="post/1#comments">Post</a>
+    <a href="https://other.com/page">Other</a>
+    <a href="/about">About again</a>
+    <a href="/sponsored" rel="sponsored nofollow">Ad</a>
+    <a href="mailto:me@example.com">Mail</a>
+    <a href="#top">Top</a>
+</body></html>
+"""
+
+
+def test_links_resolved_deduped_and_nofollow_skipped():
+    result = parse_html(LINK_HTML, url="https://example.com/blog/")
+    assert result["links"] == [
+        "https://example.com/about",
+        "https://example.com/blog/post/1",
+        "https://other.com/page",
+    ]
+
+
+def test_robots_nofollow_meta_drops_all_links():
+    html = LINK_HTML.replace("<title>", '<meta name="robots" content="index, nofollow"><title>')
+    assert parse_html(html, url="https://example.com/")["links"] == []
@@ -0,0 +1,75 @@
+import pstats
+
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+
+from api import profiling
+from api.main import app
+
+client = TestClient(app)
+
+MOCK_HTML = """
+<html lang="en">
+<head><title>Profiling target</title><meta name="description" content="A page worth profiling."></head>
+<body><h1>Hot paths</h1><p>Parse, extract and classify all show up in the profile.</p></body>
+</html>
+"""
+
+
+@pytest.fixture
+def profiling_on(tmp_path):
+    with patch.object(profiling, "PROFILING_ENABLED", True), \
+         patch.object(profiling, "PROFILE_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+def _post(url: str, **kwargs):
+    with patch("crawler.core.fetch_page", new_callable=AsyncMock) as mock_fetch, \
+         patch("api.routes.set_cached"):
+        mock_fetch.return_value = (MOCK_HTML, 200, url)
+        return client.post("/crawl", json={"url": url}, **kwargs)
+
+
+def test_profile_header_ignored_when_disabled():
+    with patch("api.routes.get_cached_entry", return_value=None):
+        response = _post("https://example.com/profile", headers={"X-Profile": "1"})
+
+    assert response.status_code == 200
+    assert "profile" not in response.json()
+
+
+def test_profile_header_returns_hot_functions(profiling_on):
+    with patch("api.routes.get_cached_entry") as mock_get:
+        response = _post("https://example.com/profile", headers={"X-Profile": "1"})
+
+    # profiling bypasses the cache so the crawl actually runs
+    mock_get.assert_not_called()
+    data = response.json()
+    assert data["title"] == "Profiling target"
+    profile = data["profile"]
+    assert profile["top_functions"]
+    assert "file" not in profile     # no server paths in the response
+    path = profiling_on / f"{profile['id']}.prof"
+    assert path.exists()
+    assert "parse_html" in {fn["function"].split(" ")[0] for fn in _all_functions(str(path))}
+
+
+def test_profile_query_flag(profiling_on):
+    with patch("api.routes.get_cached_entry", return_value=None):
+        response = _post("https://example.com/profile?x=1", params={"profile": "true"})
+
+    assert "profile" in response.json()
+
+
+def test_sampled_requests_are_saved_but_not_returned(profiling_on):
+    with patch.object(profiling, "PROFILE_SAMPLE_RATE", 1.0), \
+         patch("api.routes.get_cached_entry", return_value=None):
+        response = _post("https://example.com/sampled")
+
+    assert "profile" not in response.json()
+    assert len(list(profiling_on.glob("*.prof"))) == 1
+
+
+def _all_functions(path: str) -> list[dict]:
+    return profiling._top_functions(pstats.Stats(path), limit=10_000)
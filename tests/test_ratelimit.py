@@ -0,0 +1,120 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from api.ratelimit import RedisRateLimiter, TokenBucketLimiter
+
+
+# --- TokenBucketLimiter ---
+
+def test_allows_burst_up_to_capacity():
+    limiter = TokenBucketLimiter(capacity=5, window_seconds=10)
+    assert all(limiter.check("ip", now=100.0) == 0.0 for _ in range(5))
+    assert limiter.check("ip", now=100.0) > 0
+
+
+def test_rejection_reports_time_until_next_token():
+    limiter = TokenBucketLimiter(capacity=5, window_seconds=10)   # 0.5 tokens/s
+    for _ in range(5):
+        limiter.check("ip", now=100.0)
+    assert limiter.check("ip", now=100.0) == pytest.approx(2.0)
+
+
+def test_tokens_refill_lazily():
+    limiter = TokenBucketLimiter(capacity=5, window_seconds=10)
+    for _ in range(5):
+        limiter.check("ip", now=100.0)
+    assert limiter.check("ip", now=101.0) > 0     # only half a token back
+    assert limiter.check("ip", now=102.1) == 0.0
+
+
+def test_keys_are_independent():
+    limiter = TokenBucketLimiter(capacity=1, window_seconds=10)
+    assert limiter.check("a", now=100.0) == 0.0
+    assert limiter.check("a", now=100.0) > 0
+    assert limiter.check("b", now=100.0) == 0.0
+
+
+def test_idle_keys_are_swept():
+    limiter = TokenBucketLimiter(capacity=5, window_seconds=10, sweep_interval=30)
+    limiter._next_sweep = 130.0
+    limiter.check("old", now=100.0)
+    limiter.check("recent", now=125.0)
+    limiter.check("trigger", now=131.0)
+    # "old" has refilled completely and is dropped; "recent" is still mid-refill
+    assert "old" not in limiter._buckets
+    assert "recent" in limiter._buckets
+
+
+def test_key_count_is_bounded_under_flood():
+    limiter = TokenBucketLimiter(capacity=5, window_seconds=10, max_keys=100)
+    for i in range(10_000):
+        limiter.check(f"ip-{i}", now=100.0)
+    assert len(limiter) == 100
+    # the most recently seen keys survive
+    assert "ip-9999" in limiter._buckets
+    assert "ip-0" not in limiter._buckets
+
+
+# --- RedisRateLimiter (fakeredis stands in for a real server, Lua included) ---
+
+@pytest.fixture
+def fakeredis():
+    return pytest.importorskip("fakeredis")
+
+
+def _redis_limiter(client, capacity=5, window_seconds=10):
+    fallback = TokenBucketLimiter(capacity=capacity, window_seconds=window_seconds)
+    return RedisRateLimiter(capacity, window_seconds, get_client=lambda: client, fallback=fallback)
+
+
+async def test_redis_limiter_allows_burst_then_rejects(fakeredis):
+    limiter = _redis_limiter(fakeredis.FakeRedis(decode_responses=True))
+    assert [await limiter.check("ip") for _ in range(5)] == [0.0] * 5
+    wait = await limiter.check("ip")
+    assert 1.9 <= wait <= 2.0
+
+
+async def test_redis_limiter_is_shared_between_instances(fakeredis):
+    server = fakeredis.FakeServer()
+    instance_a = _redis_limiter(fakeredis.FakeRedis(server=server, decode_responses=True))
+    instance_b = _redis_limiter(fakeredis.FakeRedis(server=server, decode_responses=True))
+    allowed = [await instance_a.check("ip") == 0.0 for _ in range(3)] + [await instance_b.check("ip") == 0.0 for _ in range(3)]
+    assert allowed.count(True) == 5
+
+
+async def test_redis_limiter_is_atomic_under_concurrency(fakeredis):
+    server = fakeredis.FakeServer()
+    limiter = _redis_limiter(fakeredis.FakeRedis(server=server, decode_responses=True), capacity=20, window_seconds=3600)
+    waits = await asyncio.gather(*(limiter.check("ip") for _ in range(200)))
+    assert waits.count(0.0) == 20
+
+
+async def test_redis_limiter_runs_off_the_event_loop():
+    threads = []
+
+    def script(keys, args, client):
+        threads.append(threading.current_thread())
+        return 0
+
+    limiter = _redis_limiter(MagicMock(register_script=lambda _: script))
+    assert await limiter.check("ip") == 0.0
+    assert threads and threads[0] is not threading.main_thread()
+
+
+async def test_redis_limiter_falls_back_when_redis_unavailable():
+    limiter = _redis_limiter(None, capacity=2)
+    assert await limiter.check("ip") == 0.0
+    assert await limiter.check("ip") == 0.0
+    assert await limiter.check("ip") > 0
+    assert len(limiter.fallback) == 1
+
+
+async def test_redis_limiter_falls_back_on_redis_errors(fakeredis):
+    broken = fakeredis.FakeRedis(decode_responses=True)
+    broken.connected = False     # every command raises ConnectionError
+    limiter = _redis_limiter(broken, capacity=1)
+    assert await limiter.check("ip") == 0.0
+    assert await limiter.check("ip") > 0
@@ -0,0 +1,103 @@
+import math
+
+from unittest.mock import patch
+
+from api.cache import CACHE_TTL, cache_ttl
+from crawler.models import CrawlResult
+from crawler.recrawl import RecrawlScheduler, estimate_change_rate, write_checkpoint
+
+HOUR = 3600.0
+
+
+def _page(body: str, url: str = "https://example.com/page") -> CrawlResult:
+    return CrawlResult(url=url, final_url=url, status_code=200, body_text=body)
+
+
+def _scheduler() -> RecrawlScheduler:
+    return RecrawlScheduler(min_interval=300, max_interval=7 * 24 * HOUR, initial_interval=HOUR)
+
+
+def test_change_rate_estimator():
+    assert estimate_change_rate(0, 0, 0) == 0.0
+    assert estimate_change_rate(10, 0, 10 * HOUR) == 0.0
+    # changed on every hourly visit: true rate is > 1/hour, and the estimate says so
+    assert estimate_change_rate(10, 10, 10 * HOUR) > 1 / HOUR
+    assert math.isclose(estimate_change_rate(4, 2, 4 * HOUR), -math.log(2.5 / 4.5) / HOUR)
+
+
+def test_static_page_backs_off_to_max_interval():
+    scheduler = _scheduler()
+    now = 0.0
+    state = scheduler.observe(_page("same"), now=now)
+    intervals = []
+    for _ in range(12):
+        now = state.next_due
+        state = scheduler.observe(_page("same"), now=now)
+        intervals.append(state.interval)
+    assert intervals[:3] == [2 * HOUR, 4 * HOUR, 8 * HOUR]
+    assert intervals[-1] == scheduler.max_interval
+
+
+def test_busy_page_converges_to_min_interval():
+    scheduler = _scheduler()
+    now = 0.0
+    state = scheduler.observe(_page("v0"), now=now)
+    for version in range(1, 20):
+        now = state.next_due
+        state = scheduler.observe(_page(f"v{version}"), now=now)
+    assert state.interval == scheduler.min_interval
+
+
+def test_pop_due_in_order_with_lease():
+    scheduler = _scheduler()
+    scheduler.observe(_page("a", "https://a.com/"), now=0)
+    scheduler.observe(_page("b", "https://b.com/"), now=100)
+    assert scheduler.pop_due(now=HOUR - 1) == []
+    assert scheduler.pop_due(now=HOUR + 200) == ["https://a.com/", "https://b.com/"]
+    # leased: not handed out again until min_interval passes without an observe()
+    assert scheduler.pop_due(now=HOUR + 300) == []
+    assert scheduler.pop_due(now=HOUR + 200 + 300) == ["https://a.com/", "https://b.com/"]
+
+    scheduler.observe(_page("a", "https://a.com/"), now=HOUR + 600)
+    assert scheduler.pop_due(now=HOUR + 600 + 301) == ["https://b.com/"]
+
+
+def test_failed_crawls_are_not_tracked():
+    scheduler = _scheduler()
+    failure = CrawlResult(url="https://example.com/", final_url="https://example.com/", status_code=0, error="timeout")
+    assert scheduler.observe(failure, now=0) is None
+    assert len(scheduler) == 0
+
+
+def test_checkpoint_round_trip(tmp_path):
+    scheduler = _scheduler()
+    scheduler.observe(_page("a", "https://a.com/"), now=0)
+    path = str(tmp_path / "recrawl.ckpt")
+    scheduler.checkpoint(path)
+
+    restored = RecrawlScheduler.restore(path)
+    assert restored.interval("https://a.com/") == HOUR
+    assert restored.pop_due(now=HOUR) == ["https://a.com/"]
+
+
+def test_snapshot_is_unaffected_by_later_crawls(tmp_path):
+    scheduler = _scheduler()
+    scheduler.observe(_page("a", "https://a.com/"), now=0)
+    state = scheduler.snapshot()
+    scheduler.observe(_page("b", "https://a.com/"), now=HOUR)     # updates the PageState in place
+
+    path = str(tmp_path / "recrawl.ckpt")
+    write_checkpoint(state, path)
+    restored = RecrawlScheduler.restore(path)
+    assert restored.pop_due(now=HOUR) == ["https://a.com/"]
+    assert scheduler.pop_due(now=HOUR) == []
+
+
+def test_cache_ttl_follows_recrawl_interval():
+    scheduler = _scheduler()
+    scheduler.observe(_page("a", "https://a.com/"), now=0)
+    with patch("api.cache.default_scheduler", return_value=scheduler):
+        assert cache_ttl("https://a.com/?utm_source=x") == int(HOUR)
+        assert cache_ttl("https://unknown.com/") == CACHE_TTL
+    with patch("api.cache.default_scheduler", return_value=None):
+        assert cache_ttl("https://a.com/") == CACHE_TTL
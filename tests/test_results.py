@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+import time
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from crawler.core import crawl
+from crawler.models import CrawlResult
+from crawler.results import ResultSink, ResultStore, content_hash
+
+
+def _result(url="https://example.com/a", page_type="blog_post", body="hello world", **kwargs) -> CrawlResult:
+    return CrawlResult(url=url, final_url=url, status_code=200, page_type=page_type, body_text=body, **kwargs)
+
+
+def test_upsert_replaces_by_url(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    store.upsert_many([_result(title="first")], crawled_at=100.0)
+    store.upsert_many([_result(title="second")], crawled_at=200.0)
+
+    assert len(store) == 1
+    assert store.get("https://example.com/a").title == "second"
+    assert store.get("https://example.com/missing") is None
+
+
+def test_succeeded_at_ignores_failed_recrawls(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    url = "https://example.com/a"
+    store.upsert_many([CrawlResult(url=url, final_url=url, status_code=503, error="unavailable")], crawled_at=50.0)
+    assert store.crawled_at(url) == 50.0
+    assert store.succeeded_at(url) is None
+
+    store.upsert_many([_result()], crawled_at=100.0)
+    store.upsert_many([CrawlResult(url=url, final_url=url, status_code=0, error="timeout")], crawled_at=200.0)
+    assert store.crawled_at(url) == 200.0
+    assert store.succeeded_at(url) == 100.0
+    assert store.succeeded_at("https://example.com/missing") is None
+
+
+def test_query_filters(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    store.upsert_many([
+        _result("https://a.com/1", "blog_post"),
+        _result("https://a.com/2", "product", body="different"),
+        _result("https://B.com/1", "blog_post"),
+    ], crawled_at=100.0)
+    store.upsert_many([_result("https://a.com/3", "blog_post")], crawled_at=200.0)
+
+    assert [r.url for r in store.query(host="a.com", page_type="blog_post")] == ["https://a.com/3", "https://a.com/1"]
+    assert [r.url for r in store.query(host="b.com")] == ["https://B.com/1"]
+    assert [r.url for r in store.query(since=150.0)] == ["https://a.com/3"]
+    same_content = store.query(content_hash=content_hash(_result()))
+    assert {r.url for r in same_content} == {"https://a.com/1", "https://B.com/1", "https://a.com/3"}
+
+
+def test_schema_has_query_indexes(tmp_path):
+    path = str(tmp_path / "results.db")
+    ResultStore(path).close()
+    indexed = {
+        row[0] for row in sqlite3.connect(path).execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'crawl_results' AND sql IS NOT NULL"
+        )
+    }
+    for column in ("host", "page_type", "crawled_at", "content_hash"):
+        assert any(f"({column})" in sql for sql in indexed)
+
+
+def test_sink_flushes_in_background(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    sink = ResultSink(store, batch_size=10, flush_interval=0.05)
+    for i in range(25):
+        assert sink.submit(_result(f"https://example.com/{i}"))
+    sink.close()
+    assert len(store) == 25
+
+
+def test_sink_drops_when_full():
+    release = threading.Event()
+    store = MagicMock()
+    store._upsert_rows.side_effect = lambda rows: release.wait(5)      # a stalled disk
+    sink = ResultSink(store, batch_size=1, flush_interval=0.01, max_queue=1)
+
+    assert sink.submit(_result("https://example.com/1"))
+    while sink._queue.qsize():          # writer picks it up and stalls
+        time.sleep(0.01)
+    assert sink.submit(_result("https://example.com/2"))       # fills the queue
+    assert sink.submit(_result("https://example.com/3")) is False
+    release.set()
+    sink.close()
+    assert store._upsert_rows.call_count == 2
+
+
+async def test_crawl_feeds_the_sink():
+    sink = MagicMock()
+    with patch("crawler.core.default_sink", return_value=sink), \
+         patch("crawler.core._crawl", new_callable=AsyncMock, return_value=_result()):
+        result = await crawl("https://example.com/a")
+    sink.submit.assert_called_once_with(result)
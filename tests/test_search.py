@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from crawler.models import CrawlResult
+from crawler.search import TopicIndex
+
+HEADERS = {"X-Forwarded-For": "10.0.0.45"}
+
+
+def _page(url, topics, page_type="blog_post", **kwargs) -> CrawlResult:
+    return CrawlResult(url=url, final_url=url, status_code=200, topics=topics, page_type=page_type, **kwargs)
+
+
+def _index() -> TopicIndex:
+    index = TopicIndex()
+    index.add(_page("https://a.com/1", ["python", "asyncio"]))
+    index.add(_page("https://a.com/2", ["python", "django"], "news_article"))
+    index.add(_page("https://a.com/3", ["Python", "asyncio", "redis"], "product"))
+    index.add(_page("https://a.com/4", ["rust"]))
+    return index
+
+
+def test_search_intersects_topics_newest_first():
+    index = _index()
+    assert index.search(["python"]) == (3, ["https://a.com/3", "https://a.com/2", "https://a.com/1"])
+    assert index.search(["python", "asyncio"]).urls == ["https://a.com/3", "https://a.com/1"]
+    assert index.search(["python", "missing"]).total == 0
+    assert index.search([]).total == 0
+
+
+def test_search_filters_by_page_type_bitmaps():
+    index = _index()
+    assert index.search(["python"], ["blog_post"]).urls == ["https://a.com/1"]
+    assert index.search(["python"], ["blog_post", "product"]).urls == ["https://a.com/3", "https://a.com/1"]
+    assert index.search(["python"], ["homepage"]).total == 0
+
+
+def test_sparse_page_type_bitmap_longer_than_live_mask():
+    # the product bitmap doubles past the live bitmap's length once ids 16 and 24 land in it
+    index = TopicIndex()
+    for i in range(25):
+        index.add(_page(f"https://a.com/{i}", ["python"], "product" if i in (16, 24) else "blog_post"))
+    assert index.search(["python"], ["product"]).urls == ["https://a.com/24", "https://a.com/16"]
+    assert index.search(["python"], ["blog_post", "product"]).total == 25
+
+
+def test_pagination():
+    index = _index()
+    hits = index.search(["python"], limit=1, offset=1)
+    assert hits.total == 3 and hits.urls == ["https://a.com/2"]
+
+
+def test_recrawl_replaces_old_postings():
+    index = _index()
+    index.add(_page("https://a.com/1", ["golang"], "news_article"))
+    assert index.search(["asyncio"]).urls == ["https://a.com/3"]
+    assert index.search(["golang"], ["news_article"]).urls == ["https://a.com/1"]
+
+    # failed recrawls drop the page rather than keeping stale topics
+    index.add(CrawlResult(url="https://a.com/1", final_url="https://a.com/1", status_code=0, error="timeout"))
+    assert index.search(["golang"]).total == 0
+    assert len(index) == 3
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = _index()
+    index.add(_page("https://a.com/2", ["python"], "blog_post"))      # leaves a dead doc to compact away
+    path = str(tmp_path / "topics.idx")
+    index.save(path)
+
+    loaded = TopicIndex.load(path)
+    assert len(loaded) == 4
+    for topics, types in ((["python"], []), (["python", "asyncio"], []), (["python"], ["blog_post"]), (["rust"], [])):
+        assert loaded.search(topics, types) == index.search(topics, types)
+
+    # memory-mapped lists are copied on first write; the mapping itself is untouched
+    loaded.add(_page("https://a.com/5", ["rust", "python"], "product"))
+    assert loaded.search(["rust", "python"]).urls == ["https://a.com/5"]
+    assert TopicIndex.load(path).search(["rust", "python"]).total == 0
+
+
+def test_search_endpoint():
+    with patch("api.routes.default_index", return_value=_index()):
+        response = TestClient(app).get(
+            "/search", params={"topic": ["python", "asyncio"], "page_type": "product"}, headers=HEADERS,
+        )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1 and body["urls"] == ["https://a.com/3"]
+
+
+def test_search_endpoint_requires_topic():
+    response = TestClient(app).get("/search", headers=HEADERS)
+    assert response.status_code == 422
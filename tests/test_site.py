@@ -0,0 +1,54 @@
+from unittest.mock import AsyncMock, patch
+
+from crawler.models import CrawlResult
+from crawler.site import crawl_site
+
+# a small link graph: url -> outlinks
+SITE = {
+    "https://example.com/": ["https://example.com/a", "https://example.com/b", "https://other.com/"],
+    "https://example.com/a": ["https://example.com/a/deep", "https://example.com/"],
+    "https://example.com/b": ["https://example.com/a"],
+    "https://example.com/a/deep": ["https://example.com/a/deeper"],
+    "https://other.com/": ["https://other.com/x"],
+}
+
+
+async def _fake_crawl(url, respect_robots=True):
+    return CrawlResult(url=url, final_url=url, status_code=200, links=SITE.get(url, []))
+
+
+async def _run(**kwargs):
+    with patch("crawler.frontier.crawl", new_callable=AsyncMock, side_effect=_fake_crawl) as mock_crawl:
+        urls = [r.url async for r in crawl_site("https://example.com/", host_delay=0, **kwargs)]
+    return urls, mock_crawl
+
+
+async def test_breadth_first_respects_depth_and_dedupes():
+    urls, mock_crawl = await _run(max_depth=1)
+    assert sorted(urls) == ["https://example.com/", "https://example.com/a", "https://example.com/b"]
+    assert mock_crawl.await_count == 3      # the back-link to / and a -> a are not recrawled
+
+
+async def test_page_limit():
+    urls, _ = await _run(max_depth=5, max_pages=2)
+    assert len(urls) == 2
+
+
+async def test_host_limit():
+    same_host, _ = await _run(max_depth=2)
+    assert not any(url.startswith("https://other.com") for url in same_host)
+
+    two_hosts, _ = await _run(max_depth=2, max_hosts=2)
+    assert {"https://other.com/", "https://other.com/x"} <= set(two_hosts)
+
+
+async def test_duplicate_link_does_not_use_up_a_host():
+    # other.com./ is other.com/ after normalization — already queued, so it must not cost a host
+    graph = {"https://example.com/": ["https://other.com/", "https://other.com./", "https://third.com/"]}
+
+    async def crawl(url, respect_robots=True):
+        return CrawlResult(url=url, final_url=url, status_code=200, links=graph.get(url, []))
+
+    with patch("crawler.frontier.crawl", new_callable=AsyncMock, side_effect=crawl):
+        urls = [r.url async for r in crawl_site("https://example.com/", max_depth=1, max_hosts=3, host_delay=0)]
+    assert sorted(urls) == ["https://example.com/", "https://other.com/", "https://third.com/"]
@@ -0,0 +1,158 @@
+import gzip
+import io
+import itertools
+import tracemalloc
+
+import pytest
+import requests
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from crawler.frontier import Frontier
+from crawler.models import CrawlResult
+from crawler.sitemap import discover_sitemaps, parse_lastmod, parse_sitemap, seed_frontier
+
+HEADERS = {"X-Forwarded-For": "10.0.0.46"}
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url>
+    <loc>https://example.com/a</loc>
+    <lastmod>2024-05-01</lastmod>
+    <priority>0.9</priority>
+    <image:image><image:loc>https://cdn.example.com/a.png</image:loc></image:image>
+  </url>
+  <url><loc>https://example.com/b</loc><lastmod>2024-05-01T12:00:00Z</lastmod></url>
+  <url><loc>https://example.com/c</loc><priority>0.1</priority></url>
+</urlset>"""
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-pages.xml.gz</loc><lastmod>2024-05-02</lastmod></sitemap>
+</sitemapindex>"""
+
+
+class _FakeResponse:
+    def __init__(self, body: bytes):
+        self.text = body.decode("utf-8", "replace")
+        self.raw = io.BytesIO(body)
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _serve(files: dict[str, bytes]):
+    def get(url, **kwargs):
+        if url not in files:
+            raise requests.HTTPError(f"404 for {url}")
+        return _FakeResponse(files[url])
+    return patch("crawler.sitemap.requests.get", side_effect=get)
+
+
+def test_parse_urlset():
+    entries = list(parse_sitemap(io.BytesIO(URLSET)))
+    assert [e.loc for e in entries] == ["https://example.com/a", "https://example.com/b", "https://example.com/c"]
+    assert entries[0].lastmod == parse_lastmod("2024-05-01T00:00:00+00:00")
+    assert entries[0].priority == 0.9 and entries[1].priority is None
+    assert entries[2].lastmod is None
+    assert not any(e.is_sitemap for e in entries)
+
+
+def test_parse_gzipped_index():
+    entries = list(parse_sitemap(io.BytesIO(gzip.compress(INDEX))))
+    assert len(entries) == 1
+    assert entries[0].is_sitemap and entries[0].loc.endswith(".xml.gz")
+
+
+def test_parse_refuses_oversized_input():
+    with pytest.raises(ValueError):
+        list(parse_sitemap(io.BytesIO(URLSET), max_bytes=100))
+
+
+def test_parse_50k_urls_in_flat_memory():
+    body = (
+        b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        + b"".join(b"<url><loc>https://example.com/p/%d</loc><lastmod>2024-01-01</lastmod></url>" % i for i in range(50_000))
+        + b"</urlset>"
+    )
+    entries = parse_sitemap(io.BytesIO(gzip.compress(body)))
+    count = sum(1 for _ in itertools.islice(entries, 40_000))
+    # trace only the tail (tracing is slow): nothing read so far may pile up
+    tracemalloc.start()
+    count += sum(1 for _ in entries)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert count == 50_000
+    assert peak < 512 * 1024
+
+
+def test_discover_from_robots_with_fallback():
+    robots = b"User-agent: *\nDisallow: /admin\nSitemap: https://example.com/s1.xml\nsitemap: https://example.com/s2.xml\n"
+    with _serve({"https://example.com/robots.txt": robots}):
+        assert discover_sitemaps("https://example.com/any/page") == ["https://example.com/s1.xml", "https://example.com/s2.xml"]
+    with _serve({}):
+        assert discover_sitemaps("https://example.com/any/page") == ["https://example.com/sitemap.xml"]
+
+
+def test_seed_frontier_follows_index_and_skips_unchanged():
+    files = {
+        "https://example.com/robots.txt": b"Sitemap: https://example.com/sitemap.xml\n",
+        "https://example.com/sitemap.xml": INDEX,
+        "https://example.com/sitemap-pages.xml.gz": gzip.compress(URLSET),
+    }
+    # /b was crawled after its lastmod, so it is unchanged; /a changed since
+    crawled = {"https://example.com/a": parse_lastmod("2024-04-01"), "https://example.com/b": parse_lastmod("2024-06-01")}
+    frontier = Frontier(host_delay=0)
+    with _serve(files):
+        added, skipped = seed_frontier(frontier, "https://example.com/", last_crawled=crawled.get)
+    assert (added, skipped) == (2, 1)
+
+    popped = []
+    while (url := frontier.pop()) is not None:
+        popped.append(url)
+        frontier.done(url)
+    assert popped == ["https://example.com/a", "https://example.com/c"]       # by sitemap priority
+
+
+def test_seed_frontier_keeps_highest_priority_urls_across_the_whole_sitemap():
+    entries = "".join(
+        f"<url><loc>https://example.com/{i}</loc><priority>{p}</priority></url>"
+        for i, p in enumerate([0.1, 0.2, 0.3, 0.9, 0.1, 0.8, 0.5, 1.0])
+    )
+    files = {
+        "https://example.com/robots.txt": b"",
+        "https://example.com/sitemap.xml": f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'.encode(),
+    }
+    frontier = Frontier(host_delay=0)
+    with _serve(files):
+        added, _ = seed_frontier(frontier, "https://example.com/", max_urls=3)
+    assert added == 3
+
+    popped = []
+    while (url := frontier.pop()) is not None:
+        popped.append(url)
+        frontier.done(url)
+    assert popped == ["https://example.com/7", "https://example.com/3", "https://example.com/5"]
+
+
+def test_crawl_sitemap_endpoint():
+    async def fake_crawl_sitemaps(url, **kwargs):
+        assert kwargs["max_pages"] == 2
+        for path in ("a", "b"):
+            yield CrawlResult(url=f"https://example.com/{path}", final_url=f"https://example.com/{path}", status_code=200)
+
+    with patch("api.routes.crawl_sitemaps", side_effect=fake_crawl_sitemaps):
+        response = TestClient(app).post(
+            "/crawl/sitemap", json={"url": "https://example.com/", "max_pages": 2}, headers=HEADERS,
+        )
+    assert response.status_code == 200
+    assert len(response.text.strip().splitlines()) == 2
@@ -0,0 +1,135 @@
+import gzip
+import io
+import json
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from crawler import core
+from crawler.fetcher import FetchedPage
+from crawler.reprocess import reprocess, reprocess_record
+from crawler.store import RawStore, parse_record, read_record
+
+PAGE = FetchedPage(
+    html="<html><head><title>Stored Page</title></head><body><h1>Hello store</h1></body></html>",
+    status_code=200,
+    final_url="https://example.com/final",
+    headers={"Content-Type": "text/html; charset=utf-8", "ETag": '"abc"'},
+)
+
+
+def test_put_and_get_round_trip(tmp_path):
+    store = RawStore(str(tmp_path))
+    digest = store.put("https://example.com/start", PAGE, fetched_at=1700000000)
+
+    page = store.get("https://example.com/start")
+    assert page.html == PAGE.html
+    assert page.final_url == "https://example.com/final"
+    assert page.headers["ETag"] == '"abc"'
+    assert page.digest == digest
+    assert page.fetched_at == 1700000000
+
+
+def test_records_are_standalone_gzip_warc_members(tmp_path):
+    store = RawStore(str(tmp_path))
+    store.put("https://example.com/start", PAGE)
+    entry = next(store.entries())
+    record = read_record(str(tmp_path), entry.location)
+    assert record.startswith(b"WARC/1.0\r\nWARC-Type: response\r\n")
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    store = RawStore(str(tmp_path))
+    store.put("https://example.com/a", PAGE)
+    store.put("https://example.com/b", PAGE)
+    segment = gzip.decompress(next((tmp_path / "segments").iterdir()).read_bytes())
+    assert segment.count(PAGE.html.encode()) == 1
+    assert b"WARC-Type: revisit\r\n" in segment
+    assert store.get("https://example.com/b").url == "https://example.com/b"
+
+
+def test_shared_body_keeps_each_captures_own_metadata(tmp_path):
+    store = RawStore(str(tmp_path))
+    store.put("https://shop.example.com/item", PAGE)
+    news = PAGE._replace(final_url="https://news.example.com/story", status_code=203, headers={"X-Site": "news"})
+    store.put("https://news.example.com/story?ref=1", news)
+
+    for reader in (store, RawStore(str(tmp_path))):
+        page = reader.get("https://news.example.com/story?ref=1")
+        assert page.html == PAGE.html
+        assert page.final_url == "https://news.example.com/story"
+        assert page.status_code == 203
+        assert page.headers == {"X-Site": "news"}
+
+    entry = next(e for e in store.entries() if e.url == "https://news.example.com/story?ref=1")
+    result = json.loads(reprocess_record((store.root, entry.url, entry.location, entry.payload, entry.fetched_at)))
+    assert result["final_url"] == "https://news.example.com/story"
+    assert result["status_code"] == 203
+
+
+def test_transfer_headers_describe_the_stored_body(tmp_path):
+    store = RawStore(str(tmp_path))
+    gzipped = PAGE._replace(headers={**PAGE.headers, "Content-Encoding": "gzip", "Content-Length": "42"})
+    store.put("https://example.com/start", gzipped)
+
+    headers = store.get("https://example.com/start").headers
+    assert "Content-Encoding" not in headers
+    assert headers["X-Original-Content-Encoding"] == "gzip"
+    assert headers["Content-Length"] == str(len(PAGE.html.encode()))
+
+
+def test_dedup_memory_is_bounded(tmp_path):
+    store = RawStore(str(tmp_path), max_digests=2)
+    for i in range(3):
+        store.put(f"https://example.com/{i}", PAGE._replace(html=PAGE.html + f"<p>{i}</p>"))
+    assert len(store._by_digest) == 2
+
+    # the oldest body was forgotten — storing it again writes a full record, still readable
+    store.put("https://example.com/again", PAGE._replace(html=PAGE.html + "<p>0</p>"))
+    reopened = RawStore(str(tmp_path), max_digests=2)
+    assert len(reopened._by_digest) == 2
+    assert len(reopened) == 4
+    assert reopened.get("https://example.com/again").html.endswith("<p>0</p>")
+    assert reopened.get("https://example.com/0").html.endswith("<p>0</p>")
+
+
+def test_index_survives_reopen_and_segments_roll(tmp_path):
+    store = RawStore(str(tmp_path), segment_max_bytes=1)
+    store.put("https://example.com/a", PAGE)
+    store.put("https://example.com/b", PAGE._replace(html=PAGE.html + "<p>b</p>"))
+    assert len(list((tmp_path / "segments").iterdir())) == 2
+
+    reopened = RawStore(str(tmp_path))
+    assert len(reopened) == 2
+    assert reopened.get("https://example.com/b").html.endswith("<p>b</p>")
+
+
+def test_reprocess_record_reruns_pipeline_offline(tmp_path):
+    store = RawStore(str(tmp_path))
+    store.put("https://example.com/start", PAGE)
+    entry = next(store.entries())
+
+    with patch("crawler.fetcher.requests.get", side_effect=AssertionError("no network")):
+        result = json.loads(reprocess_record((store.root, entry.url, entry.location, entry.payload, entry.fetched_at)))
+    assert result["title"] == "Stored Page"
+    assert result["final_url"] == "https://example.com/final"
+
+
+def test_reprocess_uses_worker_pool(tmp_path):
+    store = RawStore(str(tmp_path))
+    for i in range(5):
+        store.put(f"https://example.com/{i}", PAGE._replace(html=PAGE.html + f"<p>{i}</p>"))
+    out = io.BytesIO()
+    assert reprocess(store, out, workers=2) == 5
+    assert sorted(json.loads(line)["url"] for line in out.getvalue().splitlines()) == [
+        f"https://example.com/{i}" for i in range(5)
+    ]
+
+
+async def test_crawl_archives_when_store_configured(tmp_path):
+    store = RawStore(str(tmp_path))
+    with patch("crawler.core.default_store", return_value=store), \
+         patch("crawler.core.fetch_response", new_callable=AsyncMock, return_value=PAGE):
+        result = await core.crawl("https://example.com/start")
+    assert result.title == "Stored Page"
+    assert store.get("https://example.com/start").html == PAGE.html
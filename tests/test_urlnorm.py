@@ -0,0 +1,43 @@
+from crawler.urlnorm import NormalizeOptions, normalize_url
+
+
+def test_lowercases_host_and_drops_default_port_and_fragment():
+    assert normalize_url("HTTPS://Example.COM:443/Path#section") == "https://example.com/Path"
+
+
+def test_keeps_non_default_port():
+    assert normalize_url("https://example.com:8443/a") == "https://example.com:8443/a"
+
+
+def test_ipv6_host_keeps_brackets_with_port():
+    assert normalize_url("http://[::1]:8080/a") == "https://[::1]:8080/a"
+
+
+def test_strips_tracking_params_and_sorts_query():
+    url = "https://example.com/list?utm_source=x&b=2&fbclid=abc&a=1"
+    assert normalize_url(url) == "https://example.com/list?a=1&b=2"
+
+
+def test_keeps_source_param():
+    # often content-bearing (e.g. a code host's ?source=file view), so it isn't stripped by default
+    url = "https://example.com/view?source=readme.md"
+    assert normalize_url(url) == url
+
+
+def test_amazon_product_urls_share_one_key():
+    urls = [
+        "https://www.amazon.com/dp/B0ABC12345/ref=sr_1_1?qid=1700000000&sr=8-1",
+        "https://www.amazon.com/dp/B0ABC12345/",
+        "http://www.amazon.com/dp/B0ABC12345?pd_rd_w=xyz&pf_rd_p=123",
+    ]
+    assert {normalize_url(u) for u in urls} == {"https://www.amazon.com/dp/B0ABC12345"}
+
+
+def test_trailing_slash_folded_but_root_kept():
+    assert normalize_url("https://example.com/blog/") == "https://example.com/blog"
+    assert normalize_url("https://example.com") == "https://example.com/"
+
+
+def test_options_can_keep_scheme_and_strip_www():
+    options = NormalizeOptions(unify_scheme=False, strip_www=True)
+    assert normalize_url("http://www.example.com/a", options) == "http://example.com/a"
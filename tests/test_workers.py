@@ -0,0 +1,140 @@
+import json
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from crawler.fetcher import FetchedPage
+from crawler.queues import LocalQueue, RedisQueue
+from crawler.workers import WorkerRuntime
+
+HTML = "<html><head><title>Worker Page</title></head><body><h1>Parsed in a worker</h1></body></html>"
+
+
+async def _fake_fetch(url, respect_robots=True):
+    if "broken" in url:
+        raise ConnectionError("connection refused")
+    return FetchedPage(HTML, 200, url, {"Content-Type": "text/html"})
+
+
+# --- queues ---
+
+def test_local_queue_redelivers_unacked_messages():
+    q = LocalQueue()
+    q.put(b"a")
+    q.put(b"b")
+    first = q.get()
+    q.ack(first)
+    second = q.get()
+    assert q.pending() == 1                     # b is in flight, not lost
+
+    q.nack(second)
+    assert q.get().body == b"b"
+    assert q.requeue_expired(visibility_timeout=0) == 1
+    assert q.get().body == b"b"
+
+
+def test_local_queue_get_times_out_when_empty():
+    assert LocalQueue().get(timeout=0.01) is None
+
+
+def test_redis_queue_at_least_once():
+    fakeredis = pytest.importorskip("fakeredis")
+    q = RedisQueue("redis://unused", "test:q", client=fakeredis.FakeRedis())
+    q.put(b"m1")
+    message = q.get()
+    assert message.body == b"m1"
+    assert q.qsize() == 0 and q.pending() == 1
+
+    assert q.requeue_expired(visibility_timeout=0) == 1     # consumer "crashed"
+    message = q.get()
+    q.ack(message)
+    assert q.pending() == 0
+
+
+# --- runtime ---
+
+@pytest.mark.parametrize("backend", ["local", "multiprocessing"])
+async def test_runtime_processes_every_url(backend):
+    urls = [f"https://example.com/{i}" for i in range(6)] + ["https://broken.example.com/"]
+    results = []
+    runtime = WorkerRuntime(backend=backend, fetch_workers=3, parse_workers=2, respect_robots=False)
+
+    with patch("crawler.workers.fetch_response", new_callable=AsyncMock, side_effect=_fake_fetch):
+        counts = await runtime.run(urls, results.append, report_interval=60)
+
+    decoded = [json.loads(r) for r in results]
+    assert sorted(r["url"] for r in decoded) == sorted(urls)
+    assert all(r["title"] == "Worker Page" for r in decoded if r["status_code"] == 200)
+    assert counts["fetched"] == 6 and counts["fetch_failed"] == 1
+    assert counts["parsed"] == 6 and counts["emitted"] == 7
+
+
+async def test_runtime_drops_duplicate_redeliveries():
+    results = []
+    runtime = WorkerRuntime(backend="local", fetch_workers=1, parse_workers=1)
+    # the same result delivered twice, as after a crash between put and ack
+    runtime.result_q.put(b"id-1\n" + json.dumps({"url": "https://example.com/"}).encode())
+    runtime.result_q.put(b"id-1\n" + json.dumps({"url": "https://example.com/"}).encode())
+    runtime.drain()
+
+    counts = await runtime.run(None, results.append)
+    assert len(results) == 1
+    assert counts["duplicates"] == 1
+
+
+async def test_consumer_dedup_window_is_bounded():
+    results = []
+    runtime = WorkerRuntime(backend="local", fetch_workers=1, parse_workers=1, dedup_window=2)
+    for message_id in (b"id-1", b"id-2", b"id-1", b"id-3", b"id-4", b"id-1"):
+        runtime.result_q.put(message_id + b"\n{}")
+    runtime.drain()
+
+    counts = await runtime.run(None, results.append)
+    # the second id-1 is inside the window; the third arrives after it was forgotten
+    assert counts["duplicates"] == 1 and counts["emitted"] == 5
+
+
+async def test_submitting_run_counts_only_its_own_results():
+    results = []
+    runtime = WorkerRuntime(backend="local", fetch_workers=1, parse_workers=1, respect_robots=False)
+    foreign = b"otherrun.id-1\n" + json.dumps({"url": "https://other.example.com/"}).encode()
+    runtime.result_q.put(foreign)
+
+    with patch("crawler.workers.fetch_response", new_callable=AsyncMock, side_effect=_fake_fetch):
+        counts = await runtime.run(["https://example.com/a", "https://example.com/b"], results.append, report_interval=60)
+
+    assert sorted(json.loads(r)["url"] for r in results) == ["https://example.com/a", "https://example.com/b"]
+    assert counts["emitted"] == 2 and counts["handed_back"] >= 1
+    assert runtime.result_q.get().body == foreign          # left for its owner
+
+
+def test_consumer_leaves_results_of_live_waiting_runs():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    runtime = WorkerRuntime(backend="redis", visibility_timeout=60)
+    runtime.result_q = RedisQueue("redis://unused", "crawler:workers:result", client=client)
+    client.hset("crawler:workers:runs", "live", time.time())
+    client.hset("crawler:workers:runs", "crashed", time.time() - 120)
+
+    assert runtime._is_waiting_run(b"live")
+    assert not runtime._is_waiting_run(b"crashed")
+    assert not runtime._is_waiting_run(b"unknown")
+    assert client.hkeys("crawler:workers:runs") == [b"live"]
+
+
+def test_cli_sizes_fetch_threads_to_fetch_workers(tmp_path):
+    import asyncio
+    from crawler.workers import main
+
+    seen = {}
+
+    async def run(self, urls, on_result, report_interval=10.0):
+        seen["threads"] = asyncio.get_running_loop()._default_executor._max_workers
+        return {}
+
+    urls = tmp_path / "urls.txt"
+    urls.write_text("https://example.com/\n")
+    with patch("crawler.workers.WorkerRuntime.run", run):
+        assert main([str(urls), "--out", str(tmp_path / "out.jsonl"), "--fetch-workers", "48", "--parse-workers", "1"]) == 0
+    assert seen["threads"] == 48